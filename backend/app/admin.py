@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.hashers import make_password
-from .models import Persona, GrupoInvestigacion, TipoDePersonal, ProgramaActividades, TipoDeRegistro, TipoTrabajoPublicado, LineaDeInvestigacion, Autor
+from .models import Persona, GrupoInvestigacion, TipoDePersonal, ProgramaActividades, TipoDeRegistro, TipoTrabajoPublicado, LineaDeInvestigacion, Autor, CorreoSaliente
 
 # Register your models here.
 
@@ -21,4 +21,11 @@ admin.site.register(ProgramaActividades)
 admin.site.register(TipoDeRegistro)
 admin.site.register(TipoTrabajoPublicado)
 admin.site.register(LineaDeInvestigacion)
-admin.site.register(Autor)
\ No newline at end of file
+admin.site.register(Autor)
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ['oidCorreoSaliente', 'destinatario', 'asunto', 'estado', 'intentos', 'fechaCreacion', 'fechaEnvio']
+    list_filter = ['estado']
+    search_fields = ['destinatario', 'asunto']
\ No newline at end of file
@@ -1,5 +1,115 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import Persona
+from .replicas import marcar_persona
+
+
+# Valores por defecto de settings.PERSONA_AUTH
+PERSONA_AUTH_DEFAULTS = {
+    # Segundos que una Persona resuelta se reutiliza sin volver a la base (0 desactiva la caché)
+    'CACHE_TTL': 60,
+    # Cantidad máxima de personas en la caché del proceso (se descarta la menos usada)
+    'CACHE_MAX_ENTRIES': 1024,
+    # Alias de settings.CACHES a usar como caché compartida entre workers (None = solo memoria local)
+    'CACHE_ALIAS': None,
+    # Si es True no se consulta la base: el usuario se arma con los claims del token
+    'USE_TOKEN_CLAIMS': False,
+}
+
+
+def persona_auth_setting(nombre):
+    return getattr(settings, 'PERSONA_AUTH', {}).get(nombre, PERSONA_AUTH_DEFAULTS[nombre])
+
+
+class PersonaCache:
+    """Caché LRU con TTL de `Persona` por `oidpersona`.
+
+    Sin `CACHE_ALIAS` vive en memoria del proceso. Con `CACHE_ALIAS` se usa solo el
+    backend de caché de Django, compartido entre workers: una copia local por worker
+    seguiría autenticando a una Persona borrada o modificada en otro worker hasta que
+    venza su TTL. Las señales de `Persona` llaman a `invalidate` al guardar o eliminar.
+
+    `get` retorna siempre una copia: la instancia cacheada no se comparte entre hilos.
+    """
+
+    key_prefix = 'persona_auth:'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        alias = persona_auth_setting('CACHE_ALIAS')
+        return caches[alias] if alias else None
+
+    def get(self, oid):
+        ttl = persona_auth_setting('CACHE_TTL')
+        if not ttl:
+            return None
+        shared = self._shared()
+        if shared is not None:
+            # Cada get de la caché compartida deserializa una instancia nueva
+            return shared.get(f'{self.key_prefix}{oid}')
+        with self._lock:
+            entry = self._entries.get(oid)
+            if entry is not None:
+                persona, expira = entry
+                if expira > time.monotonic():
+                    self._entries.move_to_end(oid)
+                    return copy.copy(persona)
+                del self._entries[oid]
+        return None
+
+    def set(self, oid, persona):
+        ttl = persona_auth_setting('CACHE_TTL')
+        if not ttl:
+            return
+        shared = self._shared()
+        if shared is not None:
+            shared.set(f'{self.key_prefix}{oid}', persona, ttl)
+            return
+        with self._lock:
+            self._entries[oid] = (copy.copy(persona), time.monotonic() + ttl)
+            self._entries.move_to_end(oid)
+            while len(self._entries) > persona_auth_setting('CACHE_MAX_ENTRIES'):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, oid):
+        with self._lock:
+            self._entries.pop(oid, None)
+        shared = self._shared()
+        if shared is not None:
+            shared.delete(f'{self.key_prefix}{oid}')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+persona_cache = PersonaCache()
+
+
+class TokenPersona:
+    """Usuario liviano construido solo con los claims del token (sin consultar la base)."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, validated_token, oid):
+        self.oidpersona = oid
+        self.pk = oid
+        self.nombre = validated_token.get('nombre', '')
+        self.apellido = validated_token.get('apellido', '')
+        self.correo = validated_token.get('correo', '')
+
+    def __str__(self):
+        return f"{self.nombre} {self.apellido}"
 
 
 class PersonaJWTAuthentication(JWTAuthentication):
@@ -10,6 +120,12 @@ class PersonaJWTAuthentication(JWTAuthentication):
     custom `Persona` model; tokens emitted by the login view include an `oidpersona`
     claim. This class will try to extract `oidpersona` (then `user_id` fallback)
     and return the corresponding Persona instance as the request.user.
+
+    Resolved personas are kept in `persona_cache` (see `PERSONA_AUTH` in settings).
+    With `USE_TOKEN_CLAIMS` enabled the database is skipped entirely and a
+    `TokenPersona` is built from the `nombre`/`apellido`/`correo` claims.
+
+    The resolved oid is also reported to app/replicas.py for sticky-after-write reads.
     """
 
     def get_user(self, validated_token):
@@ -17,8 +133,23 @@ class PersonaJWTAuthentication(JWTAuthentication):
         oid = validated_token.get('oidpersona') or validated_token.get('user_id')
         if oid is None:
             return None
+        try:
+            oid = int(oid)
+        except (TypeError, ValueError):
+            return None
+        # Antes de leer la Persona: si escribió hace poco, el request lee de la primaria
+        marcar_persona(oid)
+
+        if persona_auth_setting('USE_TOKEN_CLAIMS'):
+            return TokenPersona(validated_token, oid)
+
+        persona = persona_cache.get(oid)
+        if persona is not None:
+            return persona
 
         try:
-            return Persona.objects.get(oidpersona=oid)
+            persona = Persona.objects.get(oidpersona=oid)
         except Persona.DoesNotExist:
             return None
+        persona_cache.set(oid, persona)
+        return persona
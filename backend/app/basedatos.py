@@ -0,0 +1,36 @@
+"""
+Ajustes por conexión según el perfil de base de datos (DB_PERFIL en core/settings.py).
+
+SQLite no guarda la mayoría de los pragmas en el archivo: se aplican a cada conexión
+nueva desde la señal connection_created. journal_mode=wal sí queda en el archivo,
+pero repetirlo no cuesta nada.
+"""
+import re
+
+from django.conf import settings
+
+NOMBRE_PRAGMA = re.compile(r'^[a-z_]+$')
+VALOR_PRAGMA = re.compile(r'^-?\w+$')
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas.items():
+            # Los pragmas no admiten parámetros: se validan antes de armar la sentencia
+            if not NOMBRE_PRAGMA.match(nombre) or not VALOR_PRAGMA.match(str(valor)):
+                raise ValueError(f'Pragma inválido en SQLITE_PRAGMAS: {nombre}={valor!r}')
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
+
+
+def pragmas_actuales(connection, nombres=None):
+    """Valores vigentes de los pragmas en la conexión (para diagnósticos y el benchmark)."""
+    valores = {}
+    with connection.cursor() as cursor:
+        for nombre in nombres or getattr(settings, 'SQLITE_PRAGMAS', {}):
+            cursor.execute(f'PRAGMA {nombre}')
+            fila = cursor.fetchone()
+            valores[nombre] = fila[0] if fila else None
+    return valores
@@ -0,0 +1,232 @@
+"""
+Búsqueda de texto completo sobre publicaciones, patentes, proyectos, documentación
+de biblioteca y trabajos presentados.
+
+Todos los documentos van a una única tabla `app_busqueda`: una tabla virtual FTS5
+en SQLite, o una tabla con columna `tsvector` generada e índice GIN en PostgreSQL.
+El rowid de cada documento se deriva del tipo y del oid (`oid * 8 + código`), así
+que reindexar o borrar un objeto es una operación por clave. Las señales mantienen
+el índice al día; `reindexar_busqueda` lo reconstruye completo en lotes.
+"""
+import re
+
+from django.db import connection
+
+from .models import (
+    TrabajoPublicado, Patente, ProyectoInvestigacion, DocumentacionBiblioteca, TrabajoPresentado
+)
+
+TABLA_BUSQUEDA = 'app_busqueda'
+
+# tipo -> (modelo, código para el rowid, campo de título, campos de contenido)
+FUENTES_BUSQUEDA = {
+    'trabajos-publicados': (TrabajoPublicado, 1, 'titulo', ['nombreRevista', 'editorial']),
+    'patentes': (Patente, 2, 'descripcion', ['inventor']),
+    'proyectos': (ProyectoInvestigacion, 3, 'nombre', ['descripcion']),
+    'documentacion': (DocumentacionBiblioteca, 4, 'titulo', ['autor']),
+    'trabajos-presentados': (TrabajoPresentado, 5, 'tituloTrabajo', []),
+}
+
+TIPO_POR_MODELO = {fuente[0]: tipo for tipo, fuente in FUENTES_BUSQUEDA.items()}
+
+
+def rowid(tipo, oid):
+    return oid * 8 + FUENTES_BUSQUEDA[tipo][1]
+
+
+def terminos(q):
+    """Palabras de la consulta; cualquier sintaxis del motor se descarta."""
+    return re.findall(r'\w+', q or '')[:20]
+
+
+class BusquedaSQLite:
+    vendor = 'sqlite'
+
+    def crear(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_BUSQUEDA} USING fts5('
+            "tipo UNINDEXED, oid UNINDEXED, grupo UNINDEXED, titulo, contenido, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def eliminar_tabla(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLA_BUSQUEDA}')
+
+    def guardar(self, cursor, filas):
+        # FTS5 no tiene UPSERT: se borra el rowid y se vuelve a insertar
+        cursor.executemany(f'DELETE FROM {TABLA_BUSQUEDA} WHERE rowid = %s', [(f[0],) for f in filas])
+        cursor.executemany(
+            f'INSERT INTO {TABLA_BUSQUEDA} (rowid, tipo, oid, grupo, titulo, contenido) VALUES (%s, %s, %s, %s, %s, %s)',
+            filas,
+        )
+
+    def consulta(self, palabras):
+        # Cada palabra como prefijo entre comillas: "energ"* "solar"*
+        return ' '.join('"%s"*' % p for p in palabras)
+
+    def filtro(self, palabras, tipos, grupo):
+        condiciones = [f'{TABLA_BUSQUEDA} MATCH %s']
+        parametros = [self.consulta(palabras)]
+        if tipos:
+            condiciones.append('tipo IN (%s)' % ', '.join(['%s'] * len(tipos)))
+            parametros += tipos
+        if grupo is not None:
+            condiciones.append('grupo = %s')
+            parametros.append(grupo)
+        return ' AND '.join(condiciones), parametros
+
+    def buscar(self, cursor, palabras, tipos, grupo, limite, desde):
+        where, parametros = self.filtro(palabras, tipos, grupo)
+        # bm25 es menor cuanto más relevante; el título pesa el doble que el contenido
+        cursor.execute(
+            f'SELECT tipo, oid, titulo, contenido, -bm25({TABLA_BUSQUEDA}, 0, 0, 0, 2.0, 1.0) AS rank '
+            f'FROM {TABLA_BUSQUEDA} WHERE {where} ORDER BY rank DESC, rowid LIMIT %s OFFSET %s',
+            parametros + [limite, desde],
+        )
+        return cursor.fetchall()
+
+    def facetas(self, cursor, palabras, grupo):
+        where, parametros = self.filtro(palabras, None, grupo)
+        cursor.execute(f'SELECT tipo, COUNT(*) FROM {TABLA_BUSQUEDA} WHERE {where} GROUP BY tipo', parametros)
+        return dict(cursor.fetchall())
+
+
+class BusquedaPostgres(BusquedaSQLite):
+    vendor = 'postgresql'
+    configuracion = 'spanish'
+
+    def crear(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLA_BUSQUEDA} ('
+            'rowid bigint PRIMARY KEY, tipo varchar(32) NOT NULL, oid integer NOT NULL, grupo integer, '
+            "titulo text NOT NULL DEFAULT '', contenido text NOT NULL DEFAULT '', "
+            f"documento tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{self.configuracion}', titulo), 'A') || "
+            f"setweight(to_tsvector('{self.configuracion}', contenido), 'B')) STORED)"
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {TABLA_BUSQUEDA}_documento_idx ON {TABLA_BUSQUEDA} USING GIN (documento)')
+
+    def guardar(self, cursor, filas):
+        cursor.executemany(
+            f'INSERT INTO {TABLA_BUSQUEDA} (rowid, tipo, oid, grupo, titulo, contenido) VALUES (%s, %s, %s, %s, %s, %s) '
+            'ON CONFLICT (rowid) DO UPDATE SET tipo = EXCLUDED.tipo, oid = EXCLUDED.oid, grupo = EXCLUDED.grupo, '
+            'titulo = EXCLUDED.titulo, contenido = EXCLUDED.contenido',
+            filas,
+        )
+
+    def consulta(self, palabras):
+        return ' & '.join(f'{p}:*' for p in palabras)
+
+    def filtro(self, palabras, tipos, grupo):
+        condiciones = [f"documento @@ to_tsquery('{self.configuracion}', %s)"]
+        parametros = [self.consulta(palabras)]
+        if tipos:
+            condiciones.append('tipo = ANY(%s)')
+            parametros.append(list(tipos))
+        if grupo is not None:
+            condiciones.append('grupo = %s')
+            parametros.append(grupo)
+        return ' AND '.join(condiciones), parametros
+
+    def buscar(self, cursor, palabras, tipos, grupo, limite, desde):
+        where, parametros = self.filtro(palabras, tipos, grupo)
+        cursor.execute(
+            f"SELECT tipo, oid, titulo, contenido, ts_rank(documento, to_tsquery('{self.configuracion}', %s)) AS rank "
+            f'FROM {TABLA_BUSQUEDA} WHERE {where} ORDER BY rank DESC, rowid LIMIT %s OFFSET %s',
+            [self.consulta(palabras)] + parametros + [limite, desde],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS_BUSQUEDA = {backend.vendor: backend for backend in (BusquedaSQLite(), BusquedaPostgres())}
+
+
+def backend_busqueda(conexion=None):
+    """Backend para el motor configurado, o None si el motor no tiene soporte de búsqueda."""
+    return BACKENDS_BUSQUEDA.get((conexion or connection).vendor)
+
+
+def documento(tipo, valores):
+    """Fila del índice a partir de un dict con pk, grupo y los campos de la fuente."""
+    _, _, campo_titulo, campos_contenido = FUENTES_BUSQUEDA[tipo]
+    contenido = ' '.join(str(valores[c]) for c in campos_contenido if valores.get(c))
+    return (
+        rowid(tipo, valores['pk']), tipo, valores['pk'], valores.get('GrupoInvestigacion_id'),
+        valores.get(campo_titulo) or '', contenido,
+    )
+
+
+def valores_de(tipo, objeto):
+    _, _, campo_titulo, campos_contenido = FUENTES_BUSQUEDA[tipo]
+    valores = {c: getattr(objeto, c) for c in [campo_titulo] + campos_contenido}
+    valores['pk'] = objeto.pk
+    valores['GrupoInvestigacion_id'] = objeto.GrupoInvestigacion_id
+    return valores
+
+
+def indexar_objetos(modelo, objetos):
+    """Agrega o actualiza en el índice los objetos dados (ya guardados)."""
+    backend = backend_busqueda()
+    tipo = TIPO_POR_MODELO.get(modelo)
+    if backend is None or tipo is None:
+        return
+    filas = [documento(tipo, valores_de(tipo, objeto)) for objeto in objetos if objeto.pk is not None]
+    if filas:
+        with connection.cursor() as cursor:
+            backend.guardar(cursor, filas)
+
+
+def desindexar(modelo, oids):
+    backend = backend_busqueda()
+    tipo = TIPO_POR_MODELO.get(modelo)
+    if backend is None or tipo is None or not oids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLA_BUSQUEDA} WHERE rowid = %s', [(rowid(tipo, oid),) for oid in oids])
+
+
+def reindexar(tipos=None, lote=1000, salida=None):
+    """Vacía y reconstruye el índice de los tipos dados (todos por defecto), en lotes por pk."""
+    backend = backend_busqueda()
+    if backend is None:
+        raise RuntimeError(f'La búsqueda no está disponible para el motor {connection.vendor}.')
+    totales = {}
+    for tipo in tipos or FUENTES_BUSQUEDA:
+        modelo, _, campo_titulo, campos_contenido = FUENTES_BUSQUEDA[tipo]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLA_BUSQUEDA} WHERE tipo = %s', [tipo])
+        campos = ['pk', 'GrupoInvestigacion_id', campo_titulo] + campos_contenido
+        ultimo, totales[tipo] = None, 0
+        while True:
+            queryset = modelo.objects.order_by('pk')
+            if ultimo is not None:
+                queryset = queryset.filter(pk__gt=ultimo)
+            bloque = list(queryset.values(*campos)[:lote])
+            if not bloque:
+                break
+            with connection.cursor() as cursor:
+                backend.guardar(cursor, [documento(tipo, valores) for valores in bloque])
+            ultimo = bloque[-1]['pk']
+            totales[tipo] += len(bloque)
+        if salida:
+            salida(f'{tipo}: {totales[tipo]} documentos')
+    return totales
+
+
+def buscar(q, tipos=None, grupo=None, limite=20, desde=0):
+    """
+    Retorna (resultados, facetas). Los resultados vienen ordenados por relevancia;
+    las facetas cuentan los documentos que coinciden por tipo (sin filtrar por tipo).
+    """
+    backend = backend_busqueda()
+    palabras = terminos(q)
+    if backend is None or not palabras:
+        return [], {}
+    with connection.cursor() as cursor:
+        filas = backend.buscar(cursor, palabras, tipos, grupo, limite, desde)
+        facetas = backend.facetas(cursor, palabras, grupo)
+    resultados = [
+        {'tipo': tipo, 'oid': oid, 'titulo': titulo, 'detalle': contenido, 'rank': round(rank, 6)}
+        for tipo, oid, titulo, contenido, rank in filas
+    ]
+    return resultados, facetas
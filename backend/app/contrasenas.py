@@ -0,0 +1,194 @@
+"""
+Hash y verificación de contraseñas en un pool de hilos acotado.
+
+Con el hasher por defecto (PBKDF2) cada check_password/make_password ocupa la CPU
+cerca de cien milisegundos. Si una ráfaga de logins corre esos hashes en los hilos
+del servidor, el resto de los endpoints se queda sin CPU. Acá corren en un pool de
+CONTRASENAS['HILOS'] hilos (hashlib suelta el GIL mientras calcula), con a lo sumo
+CONTRASENAS['COLA_MAXIMA'] pedidos esperando:
+
+- con la cola llena, el request recibe 429 y Retry-After, sin encolar nada;
+- si el resultado no llega en CONTRASENAS['ESPERA_SEGUNDOS'], 503 y Retry-After.
+
+`verificar_contrasena(contrasena, None)` hashea contra un hash ficticio del hasher
+actual, para que un correo inexistente tarde lo mismo que una contraseña incorrecta.
+
+Los tiempos de espera y de hash y los rechazos se publican junto con las métricas
+por request en /api/internal/metricas/ (app/metricas.py).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import exceptions
+
+from .metricas import BUCKETS_SEGUNDOS, Histograma
+
+# Valores por defecto de settings.CONTRASENAS
+CONTRASENAS_DEFAULTS = {
+    'HILOS': 2,
+    # Pedidos esperando un hilo libre; con más, 429
+    'COLA_MAXIMA': 32,
+    # Máximo que un request espera su resultado (cola + hash); después, 503
+    'ESPERA_SEGUNDOS': 5,
+    # Valor de Retry-After en las respuestas 429/503
+    'REINTENTAR_SEGUNDOS': 2,
+}
+
+
+def contrasenas_setting(nombre):
+    return getattr(settings, 'CONTRASENAS', {}).get(nombre, CONTRASENAS_DEFAULTS[nombre])
+
+
+class HashingSaturado(exceptions.Throttled):
+    default_detail = 'Demasiados pedidos de inicio de sesión en curso.'
+    default_code = 'hashing_saturado'
+    extra_detail_singular = 'Intente nuevamente en {wait} segundo.'
+    extra_detail_plural = 'Intente nuevamente en {wait} segundos.'
+
+
+class HashingNoDisponible(exceptions.APIException):
+    status_code = 503
+    default_detail = 'El servicio de contraseñas está demorado. Intente nuevamente en unos segundos.'
+    default_code = 'hashing_no_disponible'
+
+    def __init__(self, wait=None):
+        super().__init__()
+        # El exception_handler de DRF lo envía como Retry-After
+        self.wait = wait
+
+
+class MetricasHashing:
+    """Histogramas por operación (verificar/generar) y rechazos, en formato Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.espera = {}
+        self.hash = {}
+        self.rechazos = {}
+
+    def observar(self, operacion, espera, duracion):
+        with self._lock:
+            self.espera.setdefault(operacion, Histograma(BUCKETS_SEGUNDOS)).observar(espera)
+            self.hash.setdefault(operacion, Histograma(BUCKETS_SEGUNDOS)).observar(duracion)
+
+    def rechazar(self, motivo):
+        with self._lock:
+            self.rechazos[motivo] = self.rechazos.get(motivo, 0) + 1
+
+    def prometheus(self, pendientes):
+        lineas = []
+        with self._lock:
+            for nombre, ayuda, histogramas in (
+                ('app_password_hash_queue_seconds', 'Espera de un hilo libre para hashear', self.espera),
+                ('app_password_hash_seconds', 'Duración del hash de contraseña', self.hash),
+            ):
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for operacion, histograma in sorted(histogramas.items()):
+                    lineas.extend(histograma.lineas(nombre, f'operation="{operacion}"'))
+            lineas.append('# HELP app_password_hash_rejected_total Pedidos de hash rechazados (429/503)')
+            lineas.append('# TYPE app_password_hash_rejected_total counter')
+            for motivo, cantidad in sorted(self.rechazos.items()):
+                lineas.append(f'app_password_hash_rejected_total{{reason="{motivo}"}} {cantidad}')
+        lineas.append('# HELP app_password_hash_pending Pedidos de hash en curso o en cola')
+        lineas.append('# TYPE app_password_hash_pending gauge')
+        lineas.append(f'app_password_hash_pending {pendientes}')
+        return '\n'.join(lineas) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self.espera.clear()
+            self.hash.clear()
+            self.rechazos.clear()
+
+
+metricas_hashing = MetricasHashing()
+
+
+class PoolHashing:
+    """Pool del proceso actual, creado en el primer pedido."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.pendientes = 0
+
+    def liberar(self, futuro):
+        with self._lock:
+            self.pendientes -= 1
+
+    def ejecutar(self, operacion, funcion, *args):
+        """Corre `funcion` en el pool y espera su resultado; 429/503 si está saturado."""
+        reintentar = contrasenas_setting('REINTENTAR_SEGUNDOS')
+        with self._lock:
+            hilos = contrasenas_setting('HILOS')
+            if self.pendientes >= hilos + contrasenas_setting('COLA_MAXIMA'):
+                metricas_hashing.rechazar('cola_llena')
+                raise HashingSaturado(wait=reintentar)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hashing')
+            self.pendientes += 1
+            encolado = time.perf_counter()
+            futuro = self._pool.submit(self.medir, operacion, encolado, funcion, *args)
+        futuro.add_done_callback(self.liberar)
+        try:
+            return futuro.result(timeout=contrasenas_setting('ESPERA_SEGUNDOS'))
+        except TimeoutError:
+            # Si todavía no empezó, no ocupa un hilo que otro request puede usar
+            futuro.cancel()
+            metricas_hashing.rechazar('espera')
+            raise HashingNoDisponible(wait=reintentar)
+
+    def medir(self, operacion, encolado, funcion, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            metricas_hashing.observar(operacion, inicio - encolado, time.perf_counter() - inicio)
+
+    def cerrar(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        # Fuera del lock: los hashes que terminan llaman a `liberar`, que lo toma
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+pool_hashing = PoolHashing()
+
+
+class HashFicticio:
+    """Hash de una contraseña cualquiera con el hasher actual, calculado una sola vez."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hash = None
+
+    def obtener(self):
+        with self._lock:
+            if self._hash is None:
+                self._hash = make_password('contraseña-ficticia')
+            return self._hash
+
+
+hash_ficticio = HashFicticio()
+
+
+def comparar(contrasena, codificada):
+    if codificada is None:
+        check_password(contrasena, hash_ficticio.obtener())
+        return False
+    return check_password(contrasena, codificada)
+
+
+def verificar_contrasena(contrasena, codificada):
+    """check_password en el pool; con `codificada=None` hace el mismo trabajo y retorna False."""
+    return pool_hashing.ejecutar('verificar', comparar, contrasena, codificada)
+
+
+def generar_hash(contrasena):
+    """make_password en el pool."""
+    return pool_hashing.ejecutar('generar', make_password, contrasena)
@@ -0,0 +1,246 @@
+"""
+Estadísticas por grupo de investigación mantenidas en la tabla EstadisticaGrupo.
+
+Cada métrica se define por el modelo que la origina, el camino hasta el grupo, los
+campos que forman la clave del desglose y el campo que se suma. Las señales leen
+los valores de la fila antes y después de cada cambio y aplican solo la diferencia
+con UPDATE ... SET cantidad = cantidad + n, así el panel del grupo se responde con
+una consulta a la tabla resumen sin importar el tamaño del grupo.
+`recalcular_estadisticas` reconstruye la tabla con GROUP BY (comando
+`recalcular_estadisticas` y altas masivas que no disparan señales); la migración
+0013 tiene su propia copia de las métricas.
+"""
+import datetime
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import EstadisticaGrupo, TipoDePersonal, TipoTrabajoPublicado
+
+# metrica -> (modelo, camino al grupo, campos de la clave, campo a sumar)
+METRICAS_GRUPO = {
+    'trabajos_estado': ('TrabajoPublicado', 'GrupoInvestigacion_id', ['estado'], None),
+    'trabajos_tipo': ('TrabajoPublicado', 'GrupoInvestigacion_id', ['tipoTrabajoPublicado_id'], None),
+    'trabajos_presentados': ('TrabajoPresentado', 'GrupoInvestigacion_id', [], None),
+    'patentes': ('Patente', 'GrupoInvestigacion_id', [], None),
+    'registros': ('Registro', 'Patente__GrupoInvestigacion_id', [], None),
+    'proyectos_periodo': ('ProyectoInvestigacion', 'GrupoInvestigacion_id', ['fechaInicio', 'fechaFinalizacion'], None),
+    'equipamiento': ('EquipamientoInfraestructura', 'GrupoInvestigacion_id', [], 'montoInvertido'),
+    'transferencia': ('ActividadTransferencia', 'GrupoInvestigacion_id', [], 'monto'),
+    'personal_tipo': ('Persona', 'GrupoInvestigacion_id', ['tipoDePersonal_id'], None),
+}
+
+# Métricas desglosadas por un tipo que el panel muestra con su nombre
+TIPOS_PANEL = {'trabajos_tipo': TipoTrabajoPublicado, 'personal_tipo': TipoDePersonal}
+
+MODELOS_ESTADISTICA = sorted({modelo for modelo, _, _, _ in METRICAS_GRUPO.values()})
+
+
+def metricas_de(nombre_modelo):
+    return {m: d for m, d in METRICAS_GRUPO.items() if d[0] == nombre_modelo}
+
+
+def clave_de(valores, campos):
+    return '|'.join('' if valores[c] is None else str(valores[c]) for c in campos)
+
+
+def monto(valor):
+    return Decimal(str(valor)).quantize(Decimal('0.01')) if valor is not None else Decimal(0)
+
+
+def campos_de(nombre_modelo):
+    campos = set()
+    for _, camino, claves, suma in metricas_de(nombre_modelo).values():
+        campos.update([camino, *claves] + ([suma] if suma else []))
+    return campos
+
+
+def valores_actuales(modelo, pk):
+    """Valores de la fila que usan las métricas del modelo, leídos de la base (None si no existe)."""
+    return modelo.objects.filter(pk=pk).values(*campos_de(modelo.__name__)).first()
+
+
+def contribuciones(nombre_modelo, valores, signo=1):
+    """{(grupo, metrica, clave): (cantidad, suma)} que aporta una fila."""
+    aportes = {}
+    if valores is None:
+        return aportes
+    for metrica, (_, camino, claves, suma) in metricas_de(nombre_modelo).items():
+        grupo = valores[camino]
+        if grupo is None:
+            continue
+        aportes[(grupo, metrica, clave_de(valores, claves))] = (signo, signo * monto(valores[suma]) if suma else Decimal(0))
+    return aportes
+
+
+def acumular(deltas, aportes):
+    for clave, (cantidad, suma) in aportes.items():
+        actual = deltas.get(clave, (0, Decimal(0)))
+        deltas[clave] = (actual[0] + cantidad, actual[1] + suma)
+    return deltas
+
+
+def diferencia(nombre_modelo, antes, despues):
+    deltas = contribuciones(nombre_modelo, despues)
+    return acumular(deltas, contribuciones(nombre_modelo, antes, signo=-1))
+
+
+def aplicar_deltas(deltas):
+    for (grupo, metrica, clave), (cantidad, suma) in deltas.items():
+        if cantidad == 0 and suma == 0:
+            continue
+        fila = EstadisticaGrupo.objects.filter(GrupoInvestigacion_id=grupo, metrica=metrica, clave=clave)
+        if fila.update(cantidad=F('cantidad') + cantidad, suma=F('suma') + suma):
+            continue
+        try:
+            with transaction.atomic():
+                EstadisticaGrupo.objects.create(
+                    GrupoInvestigacion_id=grupo, metrica=metrica, clave=clave, cantidad=cantidad, suma=suma
+                )
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            fila.update(cantidad=F('cantidad') + cantidad, suma=F('suma') + suma)
+
+
+def sumar_objetos(modelo, objetos):
+    """Suma a las estadísticas filas creadas con bulk_create (que no disparan señales)."""
+    if modelo.__name__ not in MODELOS_ESTADISTICA:
+        return
+    deltas = {}
+    pks = [objeto.pk for objeto in objetos]
+    for inicio in range(0, len(pks), 1000):
+        for valores in modelo.objects.filter(pk__in=pks[inicio:inicio + 1000]).values(*campos_de(modelo.__name__)):
+            acumular(deltas, contribuciones(modelo.__name__, valores))
+    aplicar_deltas(deltas)
+
+
+def valores_en_lote(modelo, pks):
+    """{pk: valores} de las filas que usan las métricas del modelo, en lotes de mil."""
+    if modelo.__name__ not in MODELOS_ESTADISTICA:
+        return {}
+    valores = {}
+    for inicio in range(0, len(pks), 1000):
+        for fila in modelo.objects.filter(pk__in=pks[inicio:inicio + 1000]).values('pk', *campos_de(modelo.__name__)):
+            valores[fila.pop('pk')] = fila
+    return valores
+
+
+def aplicar_cambios_en_lote(modelo, antes, despues):
+    """
+    Aplica la diferencia de filas cambiadas con QuerySet.update/bulk_update (que no
+    disparan señales); `antes` y `despues` son los de `valores_en_lote`.
+    """
+    if modelo.__name__ not in MODELOS_ESTADISTICA:
+        return
+    deltas = {}
+    for pk in antes.keys() | despues.keys():
+        acumular(deltas, diferencia(modelo.__name__, antes.get(pk), despues.get(pk)))
+    aplicar_deltas(deltas)
+    if modelo.__name__ == 'Patente':
+        # Como en signals.actualizar_estadistica: los registros cuentan para el grupo de la patente
+        grupos = {
+            grupo for pk in antes.keys() & despues.keys()
+            if antes[pk]['GrupoInvestigacion_id'] != despues[pk]['GrupoInvestigacion_id']
+            for grupo in (antes[pk]['GrupoInvestigacion_id'], despues[pk]['GrupoInvestigacion_id'])
+        }
+        if grupos:
+            recalcular_estadisticas(grupos=sorted(grupos))
+
+
+@transaction.atomic
+def recalcular_estadisticas(grupos=None):
+    """Reconstruye EstadisticaGrupo con GROUP BY; `grupos` limita a esos oids."""
+    existentes = EstadisticaGrupo.objects.all()
+    if grupos is not None:
+        existentes = existentes.filter(GrupoInvestigacion_id__in=grupos)
+    existentes.delete()
+
+    filas = []
+    for metrica, (nombre_modelo, camino, claves, suma) in METRICAS_GRUPO.items():
+        queryset = apps.get_model('app', nombre_modelo).objects.exclude(**{f'{camino}__isnull': True})
+        if grupos is not None:
+            queryset = queryset.filter(**{f'{camino}__in': grupos})
+        agregados = {'cantidad': Count('pk')}
+        if suma:
+            agregados['total'] = Sum(suma)
+        for valores in queryset.values(camino, *claves).annotate(**agregados).order_by():
+            filas.append(EstadisticaGrupo(
+                GrupoInvestigacion_id=valores[camino], metrica=metrica, clave=clave_de(valores, claves),
+                cantidad=valores['cantidad'], suma=monto(valores.get('total')),
+            ))
+    EstadisticaGrupo.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def filas_estadisticas(grupo):
+    """{metrica: [(clave, cantidad, suma)]} del grupo, sin las claves en cero."""
+    por_metrica = {}
+    for metrica, clave, cantidad, suma in EstadisticaGrupo.objects.filter(
+        GrupoInvestigacion_id=grupo, cantidad__gt=0
+    ).values_list('metrica', 'clave', 'cantidad', 'suma'):
+        por_metrica.setdefault(metrica, []).append((clave, cantidad, suma))
+    return por_metrica
+
+
+def nombres_tipos(por_metrica):
+    """{metrica: {id: nombre}} de los tipos que aparecen en el desglose."""
+    nombres = {}
+    for metrica, modelo in TIPOS_PANEL.items():
+        ids = [int(c) for c, _, _ in por_metrica.get(metrica, []) if c]
+        nombres[metrica] = dict(modelo.objects.filter(pk__in=ids).values_list('pk', 'nombre')) if ids else {}
+    return nombres
+
+
+def estadisticas_grupo(grupo, desde=None, hasta=None):
+    """
+    Panel del grupo a partir de EstadisticaGrupo. Los proyectos activos son los que
+    se superponen con [desde, hasta] (por defecto, hoy).
+    """
+    por_metrica = filas_estadisticas(grupo)
+    return armar_estadisticas(grupo, por_metrica, nombres_tipos(por_metrica), desde, hasta)
+
+
+def armar_estadisticas(grupo, por_metrica, nombres, desde=None, hasta=None):
+    """Arma el panel con las filas de `filas_estadisticas` y los nombres de `nombres_tipos`."""
+    hoy = datetime.date.today()
+    desde, hasta = desde or hoy, hasta or desde or hoy
+
+    def total(metrica):
+        return sum(cantidad for _, cantidad, _ in por_metrica.get(metrica, []))
+
+    def suma_total(metrica):
+        return str(sum((suma for _, _, suma in por_metrica.get(metrica, [])), Decimal('0.00')))
+
+    def por_tipo(metrica):
+        return [
+            {'id': int(c) if c else None, 'nombre': nombres[metrica].get(int(c), 'Sin tipo') if c else 'Sin tipo',
+             'cantidad': cantidad}
+            for c, cantidad, _ in por_metrica.get(metrica, [])
+        ]
+
+    activos = 0
+    for clave, cantidad, _ in por_metrica.get('proyectos_periodo', []):
+        inicio, fin = clave.split('|')
+        if inicio <= hasta.isoformat() and fin >= desde.isoformat():
+            activos += cantidad
+
+    return {
+        'GrupoInvestigacion': grupo,
+        'trabajosPublicados': {
+            'total': total('trabajos_estado'),
+            'porEstado': {clave: cantidad for clave, cantidad, _ in por_metrica.get('trabajos_estado', [])},
+            'porTipo': por_tipo('trabajos_tipo'),
+        },
+        'trabajosPresentados': total('trabajos_presentados'),
+        'patentes': total('patentes'),
+        'registros': total('registros'),
+        'proyectos': {
+            'total': total('proyectos_periodo'), 'activos': activos,
+            'desde': desde.isoformat(), 'hasta': hasta.isoformat(),
+        },
+        'equipamiento': {'cantidad': total('equipamiento'), 'montoInvertido': suma_total('equipamiento')},
+        'transferencia': {'cantidad': total('transferencia'), 'monto': suma_total('transferencia')},
+        'personal': {'total': total('personal_tipo'), 'porTipo': por_tipo('personal_tipo')},
+    }
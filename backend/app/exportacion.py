@@ -0,0 +1,356 @@
+"""
+Exportación de una memoria anual completa a CSV, XLSX o JSON por líneas.
+
+Cada sección (integrantes, actividades, publicaciones, patentes y proyectos) se lee
+con values_list + iterator(chunk_size), con los datos de la tabla referenciada en el
+mismo JOIN, y se escribe a medida que llega: la memoria usada no depende de la
+cantidad de filas. Las partes se agrupan en bloques de TAMANO_BLOQUE bytes para no
+entregar una escritura por fila al servidor.
+
+El XLSX se arma a mano (SpreadsheetML con cadenas en línea, una hoja por sección)
+sobre un zipfile que escribe en un buffer que se vacía en cada bloque, así no hace
+falta una dependencia ni un archivo temporal.
+
+El archivo generado se guarda en la caché EXPORTACION['CACHE_ALIAS'] (una caché aparte
+y acotada, no 'default') si no supera EXPORTACION['CACHE_MAX_BYTES']. La clave lleva la
+memoria, el formato y las versiones (app/versiones.py) de todos los modelos que se
+exportan: la memoria, las tablas intermedias y las personas, actividades, trabajos,
+patentes y proyectos que se leen por JOIN. Cualquier cambio en uno de ellos genera
+una clave nueva; las entradas viejas vencen con EXPORTACION['CACHE_TTL'].
+"""
+import csv
+import datetime
+import json
+import re
+import zipfile
+from decimal import Decimal
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import (
+    ActividadMemoria, IntegranteMemoria, MemoriaAnual, PatenteMemoria, ProyectoMemoria, PublicacionMemoria,
+)
+from .relaciones import relaciones_de_serializer
+from .replicas import lectura_en_replica
+from .serializers import MemoriaAnualSerializer
+from .versiones import calcular_etag, leer_versiones, modelos_de_relaciones, recien_cambiado
+
+TAMANO_BLOQUE = 64 * 1024
+
+# sección -> (tabla intermedia, [(columna, campo para values_list)]).
+# Las columnas siguen los nombres de los serializers que usa /completa/.
+SECCIONES_EXPORTACION = {
+    'integrantes': (IntegranteMemoria, [
+        ('Persona', 'Persona_id'),
+        ('persona_nombre', 'Persona__nombre'),
+        ('persona_apellido', 'Persona__apellido'),
+        ('rol', 'rol'),
+        ('dedicacion', 'dedicacion'),
+        ('horasSemanales', 'horasSemanales'),
+    ]),
+    'actividades': (ActividadMemoria, [
+        ('Actividad', 'Actividad_id'),
+        ('actividad_descripcion', 'Actividad__descripcion'),
+        ('actividad_fechaInicio', 'Actividad__fechaInicio'),
+        ('actividad_fechaFin', 'Actividad__fechaFin'),
+        ('actividad_presupuesto', 'Actividad__presupuestoAsignado'),
+        ('observaciones', 'observaciones'),
+    ]),
+    'publicaciones': (PublicacionMemoria, [
+        ('TrabajoPublicado', 'TrabajoPublicado_id'),
+        ('trabajo_titulo', 'TrabajoPublicado__titulo'),
+        ('trabajo_issn', 'TrabajoPublicado__ISSN'),
+        ('trabajo_editorial', 'TrabajoPublicado__editorial'),
+        ('trabajo_estado', 'TrabajoPublicado__estado'),
+    ]),
+    'patentes': (PatenteMemoria, [
+        ('Patente', 'Patente_id'),
+        ('patente_numero', 'Patente__numero'),
+        ('patente_descripcion', 'Patente__descripcion'),
+        ('patente_tipo', 'Patente__tipo'),
+        ('patente_fecha', 'Patente__fecha'),
+        ('patente_inventor', 'Patente__inventor'),
+    ]),
+    'proyectos': (ProyectoMemoria, [
+        ('ProyectoInvestigacion', 'ProyectoInvestigacion_id'),
+        ('proyecto_nombre', 'ProyectoInvestigacion__nombre'),
+        ('proyecto_codigo', 'ProyectoInvestigacion__codigoProyecto'),
+        ('proyecto_descripcion', 'ProyectoInvestigacion__descripcion'),
+        ('proyecto_tipo', 'ProyectoInvestigacion__tipoProyecto'),
+        ('proyecto_fechaInicio', 'ProyectoInvestigacion__fechaInicio'),
+    ]),
+}
+
+# formato -> (content type, extensión)
+FORMATOS_EXPORTACION = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+
+def exportacion_setting(nombre):
+    defaults = {
+        'LOTE': 2000, 'CACHE_ALIAS': 'exportacion', 'CACHE_TTL': 60 * 60, 'CACHE_MAX_BYTES': 5 * 1024 * 1024,
+    }
+    return getattr(settings, 'EXPORTACION', {}).get(nombre, defaults[nombre])
+
+
+def cache_exportacion():
+    return caches[exportacion_setting('CACHE_ALIAS')]
+
+
+def columnas(seccion):
+    return [columna for columna, _ in SECCIONES_EXPORTACION[seccion][1]]
+
+
+def filas_seccion(memoria, seccion):
+    """Itera las filas (tuplas) de una sección en el orden de las columnas."""
+    modelo, campos = SECCIONES_EXPORTACION[seccion]
+    return modelo.objects.filter(MemoriaAnual_id=memoria.pk).order_by('pk').values_list(
+        *[campo for _, campo in campos]
+    ).iterator(chunk_size=exportacion_setting('LOTE'))
+
+
+def datos_memoria(memoria):
+    """Encabezado de la memoria con los mismos campos que la API."""
+    return dict(MemoriaAnualSerializer(memoria).data)
+
+
+def en_texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def agrupar(partes, tamano=TAMANO_BLOQUE):
+    """Junta las partes (str o bytes) en bloques de bytes de al menos `tamano`."""
+    bloque, largo = [], 0
+    for parte in partes:
+        if isinstance(parte, str):
+            parte = parte.encode('utf-8')
+        bloque.append(parte)
+        largo += len(parte)
+        if largo >= tamano:
+            yield b''.join(bloque)
+            bloque, largo = [], 0
+    if bloque:
+        yield b''.join(bloque)
+
+
+class Eco:
+    """Destino de csv.writer que devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def partes_csv(memoria):
+    escritor = csv.writer(Eco())
+    # BOM para que Excel lea el archivo como UTF-8
+    yield '\ufeff'
+    yield escritor.writerow(['seccion', 'campo', 'valor'])
+    for campo, valor in datos_memoria(memoria).items():
+        yield escritor.writerow(['memoria', campo, en_texto(valor)])
+    for seccion in SECCIONES_EXPORTACION:
+        yield '\r\n'
+        yield escritor.writerow(['seccion'] + columnas(seccion))
+        for fila in filas_seccion(memoria, seccion):
+            yield escritor.writerow([seccion] + [en_texto(valor) for valor in fila])
+
+
+def partes_jsonl(memoria):
+    yield json.dumps({'seccion': 'memoria', **datos_memoria(memoria)}, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+    for seccion in SECCIONES_EXPORTACION:
+        nombres = columnas(seccion)
+        for fila in filas_seccion(memoria, seccion):
+            yield json.dumps(
+                {'seccion': seccion, **dict(zip(nombres, fila))}, cls=DjangoJSONEncoder, ensure_ascii=False
+            ) + '\n'
+
+
+# Caracteres que XML 1.0 no admite
+CONTROL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_TIPOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{hojas}</Types>'
+)
+XLSX_TIPO_HOJA = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+XLSX_LIBRO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{hojas}</sheets></workbook>'
+)
+XLSX_LIBRO_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{hojas}<Relationship Id="rIdEstilos" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+XLSX_ESTILOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+    '<cellXfs count="1"><xf xfId="0"/></cellXfs>'
+    '</styleSheet>'
+)
+XLSX_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_HOJA_FIN = '</sheetData></worksheet>'
+
+
+def celda_xlsx(valor):
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    texto = escape(CONTROL_XML.sub('', en_texto(valor)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def fila_xlsx(valores):
+    return '<row>' + ''.join(celda_xlsx(valor) for valor in valores) + '</row>'
+
+
+class BufferZip:
+    """Archivo de solo escritura y sin seek: zipfile escribe en modo streaming."""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes.clear()
+        return datos
+
+
+def hojas_xlsx(memoria):
+    """Itera (nombre de hoja, partes de texto de sus filas)."""
+    yield 'Memoria', (fila_xlsx(fila) for fila in chain([('campo', 'valor')], datos_memoria(memoria).items()))
+    for seccion in SECCIONES_EXPORTACION:
+        filas = chain([columnas(seccion)], filas_seccion(memoria, seccion))
+        yield seccion.capitalize(), (fila_xlsx(fila) for fila in filas)
+
+
+def partes_xlsx(memoria):
+    buffer = BufferZip()
+    nombres = []
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        for n, (nombre, filas) in enumerate(hojas_xlsx(memoria), start=1):
+            nombres.append(nombre)
+            with libro.open(f'xl/worksheets/sheet{n}.xml', 'w', force_zip64=True) as hoja:
+                hoja.write(XLSX_HOJA_INICIO.encode('utf-8'))
+                for bloque in agrupar(filas):
+                    hoja.write(bloque)
+                    yield buffer.vaciar()
+                hoja.write(XLSX_HOJA_FIN.encode('utf-8'))
+        # Las partes fijas van al final: recién acá se conocen todas las hojas
+        libro.writestr('[Content_Types].xml', XLSX_TIPOS.format(
+            hojas=''.join(XLSX_TIPO_HOJA.format(n=n) for n in range(1, len(nombres) + 1))
+        ))
+        libro.writestr('_rels/.rels', XLSX_RELS)
+        libro.writestr('xl/workbook.xml', XLSX_LIBRO.format(hojas=''.join(
+            f'<sheet name="{escape(nombre)}" sheetId="{n}" r:id="rId{n}"/>' for n, nombre in enumerate(nombres, start=1)
+        )))
+        libro.writestr('xl/_rels/workbook.xml.rels', XLSX_LIBRO_RELS.format(hojas=''.join(
+            f'<Relationship Id="rId{n}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n}.xml"/>' for n in range(1, len(nombres) + 1)
+        )))
+        libro.writestr('xl/styles.xml', XLSX_ESTILOS)
+    yield buffer.vaciar()
+
+
+@lru_cache(maxsize=None)
+def modelos_exportados():
+    """Modelos que lee una exportación: el encabezado y los JOIN de cada sección."""
+    select, prefetch = relaciones_de_serializer(MemoriaAnualSerializer)
+    modelos = modelos_de_relaciones(MemoriaAnual, select + prefetch)
+    for modelo, campos in SECCIONES_EXPORTACION.values():
+        caminos = {campo.rsplit('__', 1)[0] for _, campo in campos if '__' in campo}
+        modelos |= modelos_de_relaciones(modelo, caminos)
+    return frozenset(modelos)
+
+
+def clave_exportacion(memoria, formato, versiones):
+    version = calcular_etag(versiones, f'memoria:{memoria.pk}', formato).strip('"')
+    return f'exportacion:memoria:{memoria.pk}:{formato}:{version}'
+
+
+def guardar_al_terminar(clave, bloques):
+    """
+    Entrega los bloques y, si el archivo entero entra en el límite, lo guarda en caché.
+    `clave` None: se entrega sin guardar.
+    """
+    maximo = exportacion_setting('CACHE_MAX_BYTES')
+    guardados, largo = [], 0
+    if clave is None:
+        guardados = None
+    for bloque in bloques:
+        if guardados is not None:
+            largo += len(bloque)
+            if largo <= maximo:
+                guardados.append(bloque)
+            else:
+                guardados = None
+        yield bloque
+    if guardados is not None:
+        cache_exportacion().set(clave, b''.join(guardados), exportacion_setting('CACHE_TTL'))
+
+
+def exportar_memoria(memoria, formato):
+    """
+    Retorna un iterador de bloques de bytes con la memoria exportada en `formato`
+    ('csv', 'xlsx' o 'jsonl'), desde la caché si ya se generó para esta versión.
+    """
+    versiones = leer_versiones(modelos_exportados())
+    clave = clave_exportacion(memoria, formato, versiones)
+    contenido = cache_exportacion().get(clave)
+    if contenido is not None:
+        return iter([contenido])
+    if lectura_en_replica() and recien_cambiado(versiones):
+        # La réplica puede no tener todavía el último cambio: no se guarda con esta clave
+        clave = None
+    if formato == 'xlsx':
+        bloques = (bloque for bloque in partes_xlsx(memoria) if bloque)
+    else:
+        bloques = agrupar(partes_csv(memoria) if formato == 'csv' else partes_jsonl(memoria))
+    return guardar_al_terminar(clave, bloques)
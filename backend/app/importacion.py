@@ -0,0 +1,256 @@
+"""
+Importación masiva de trabajos publicados desde CSV o JSONL.
+
+El archivo se lee como stream y se procesa en lotes de tamaño fijo, así que la
+memoria usada no depende del tamaño del archivo. Por lote: una consulta para los
+títulos/ISSN ya existentes, una para los autores, una para los tipos de trabajo,
+una para los grupos y un bulk_create. Cada fila rechazada se informa con su número
+(1 = primer registro, sin contar la cabecera del CSV) y los errores por campo.
+
+Columnas: titulo, ISSN, editorial, nombreRevista, pais, estado (opcional, por
+defecto 'Realizado'), tipoTrabajoPublicado (nombre), autorNombre, autorApellido y
+GrupoInvestigacion (oid; puede omitirse si se indica un grupo para todo el archivo).
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .busqueda import indexar_objetos
+from .estadisticas import sumar_objetos
+from .models import Autor, GrupoInvestigacion, TipoTrabajoPublicado, TrabajoPublicado
+from .validacion import errores_de_integridad
+from .versiones import incrementar_versiones
+
+LOTE_IMPORTACION = 500
+
+# Filas rechazadas que el endpoint detalla en la respuesta; del resto solo informa la cantidad
+MAX_ERRORES_RESPUESTA = 100
+
+CAMPOS_TEXTO = ['titulo', 'ISSN', 'editorial', 'nombreRevista', 'pais']
+CAMPO_REQUERIDO = 'Este campo es requerido.'
+
+# Columnas que se resuelven a otra tabla, con el campo del modelo que las guarda
+CAMPOS_RELACION = {
+    'tipoTrabajoPublicado': TipoTrabajoPublicado._meta.get_field('nombre'),
+    'autorNombre': Autor._meta.get_field('nombre'),
+    'autorApellido': Autor._meta.get_field('apellido'),
+}
+
+
+class ArchivoIlegible(Exception):
+    """
+    El archivo dejó de poder leerse (codificación, CSV mal formado) a mitad de camino.
+    Los lotes anteriores ya quedaron confirmados: `resumen` es lo importado hasta ahí.
+    """
+
+    def __init__(self, error, resumen):
+        super().__init__(str(error))
+        self.resumen = resumen
+
+
+def leer_filas(archivo, formato):
+    """Itera (numero, dict o None, error) sobre un archivo de texto CSV o JSONL."""
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(archivo), start=1):
+            yield numero, fila, None
+        return
+    if formato != 'jsonl':
+        raise ValueError(f'Formato no soportado: {formato}')
+    numero = 0
+    for linea in archivo:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            fila = json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield numero, None, f'JSON inválido: {e.msg}'
+            continue
+        if not isinstance(fila, dict):
+            yield numero, None, 'Se esperaba un objeto JSON por línea.'
+            continue
+        yield numero, fila, None
+
+
+def formato_desde_nombre(nombre):
+    return 'jsonl' if nombre.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def texto(fila, campo):
+    valor = fila.get(campo)
+    return '' if valor is None else str(valor).strip()
+
+
+def validar_fila(fila, grupo_defecto):
+    """Retorna (datos normalizados, errores por campo) sin consultar la base."""
+    datos, errores = {}, {}
+    for campo in CAMPOS_TEXTO:
+        valor = texto(fila, campo)
+        max_length = TrabajoPublicado._meta.get_field(campo).max_length
+        if not valor:
+            errores[campo] = CAMPO_REQUERIDO
+        elif max_length and len(valor) > max_length:
+            errores[campo] = f'Asegúrese de que este campo no tenga más de {max_length} caracteres.'
+        datos[campo] = valor
+    datos['estado'] = texto(fila, 'estado') or 'Realizado'
+
+    for campo, campo_modelo in CAMPOS_RELACION.items():
+        datos[campo] = texto(fila, campo)
+        if not datos[campo]:
+            errores[campo] = CAMPO_REQUERIDO
+        elif len(datos[campo]) > campo_modelo.max_length:
+            errores[campo] = f'Asegúrese de que este campo no tenga más de {campo_modelo.max_length} caracteres.'
+
+    grupo = texto(fila, 'GrupoInvestigacion') or grupo_defecto
+    if not grupo:
+        errores['GrupoInvestigacion'] = CAMPO_REQUERIDO
+    else:
+        try:
+            datos['GrupoInvestigacion'] = int(grupo)
+        except (TypeError, ValueError):
+            errores['GrupoInvestigacion'] = 'Debe ser el oid de un grupo de investigación.'
+    return datos, errores
+
+
+def resolver_tipos(nombres):
+    tipos = {}
+    for oid, nombre in TipoTrabajoPublicado.objects.filter(nombre__in=nombres).order_by('-pk').values_list('pk', 'nombre'):
+        tipos[nombre] = oid
+    faltantes = [TipoTrabajoPublicado(nombre=n) for n in nombres if n not in tipos]
+    for tipo in TipoTrabajoPublicado.objects.bulk_create(faltantes):
+        tipos[tipo.nombre] = tipo.pk
+    if faltantes:
+        # bulk_create no dispara señales; la versión invalida también la caché de referencia
+        incrementar_versiones(TipoTrabajoPublicado)
+    return tipos
+
+
+def resolver_autores(pares):
+    autores = {}
+    filtro = Q()
+    for nombre, apellido in pares:
+        filtro |= Q(nombre=nombre, apellido=apellido)
+    for oid, nombre, apellido in Autor.objects.filter(filtro).order_by('-pk').values_list('pk', 'nombre', 'apellido'):
+        autores[(nombre, apellido)] = oid
+    faltantes = [Autor(nombre=n, apellido=a) for n, a in pares if (n, a) not in autores]
+    for autor in Autor.objects.bulk_create(faltantes):
+        autores[(autor.nombre, autor.apellido)] = autor.pk
+    if faltantes:
+        incrementar_versiones(Autor)
+    return autores
+
+
+def importar_lote(filas, grupo_defecto):
+    """Procesa un lote de (numero, fila, error); retorna (creados, [(numero, errores)])."""
+    rechazadas = []
+    validas = []
+    for numero, fila, error in filas:
+        if error:
+            rechazadas.append((numero, {'fila': error}))
+            continue
+        datos, errores = validar_fila(fila, grupo_defecto)
+        if errores:
+            rechazadas.append((numero, errores))
+        else:
+            validas.append((numero, datos))
+    if not validas:
+        return 0, rechazadas
+
+    titulos = {datos['titulo'] for _, datos in validas}
+    issns = {datos['ISSN'] for _, datos in validas}
+    existentes = TrabajoPublicado.objects.filter(Q(titulo__in=titulos) | Q(ISSN__in=issns)).values_list('titulo', 'ISSN')
+    titulos_usados, issns_usados = set(), set()
+    for titulo, issn in existentes:
+        titulos_usados.add(titulo)
+        issns_usados.add(issn)
+    grupos = set(GrupoInvestigacion.objects.filter(
+        pk__in={datos['GrupoInvestigacion'] for _, datos in validas}
+    ).values_list('pk', flat=True))
+
+    aceptadas = []
+    for numero, datos in validas:
+        errores = {}
+        # Los usados incluyen los del propio lote: la segunda aparición es un duplicado
+        if datos['titulo'] in titulos_usados:
+            errores['titulo'] = TrabajoPublicado._meta.get_field('titulo').error_messages['unique']
+        if datos['ISSN'] in issns_usados:
+            errores['ISSN'] = TrabajoPublicado._meta.get_field('ISSN').error_messages['unique']
+        if datos['GrupoInvestigacion'] not in grupos:
+            errores['GrupoInvestigacion'] = 'El grupo de investigación no existe.'
+        if errores:
+            rechazadas.append((numero, errores))
+            continue
+        titulos_usados.add(datos['titulo'])
+        issns_usados.add(datos['ISSN'])
+        aceptadas.append((numero, datos))
+    if not aceptadas:
+        return 0, rechazadas
+
+    with transaction.atomic():
+        tipos = resolver_tipos({datos['tipoTrabajoPublicado'] for _, datos in aceptadas})
+        autores = resolver_autores({(datos['autorNombre'], datos['autorApellido']) for _, datos in aceptadas})
+        trabajos = [
+            (numero, TrabajoPublicado(
+                titulo=datos['titulo'], ISSN=datos['ISSN'], editorial=datos['editorial'],
+                nombreRevista=datos['nombreRevista'], pais=datos['pais'], estado=datos['estado'],
+                tipoTrabajoPublicado_id=tipos[datos['tipoTrabajoPublicado']],
+                Autor_id=autores[(datos['autorNombre'], datos['autorApellido'])],
+                GrupoInvestigacion_id=datos['GrupoInvestigacion'],
+            ))
+            for numero, datos in aceptadas
+        ]
+        try:
+            with transaction.atomic():
+                TrabajoPublicado.objects.bulk_create([trabajo for _, trabajo in trabajos])
+            # bulk_create no dispara señales: el índice de búsqueda y las estadísticas se actualizan acá
+            indexar_objetos(TrabajoPublicado, [trabajo for _, trabajo in trabajos])
+            sumar_objetos(TrabajoPublicado, [trabajo for _, trabajo in trabajos])
+            incrementar_versiones(TrabajoPublicado)
+            creados = len(trabajos)
+        except IntegrityError:
+            # Otro proceso insertó alguno de estos títulos/ISSN entre la consulta y el INSERT
+            creados = 0
+            for numero, trabajo in trabajos:
+                try:
+                    with transaction.atomic():
+                        trabajo.save(force_insert=True)
+                    creados += 1
+                except IntegrityError as e:
+                    errores = errores_de_integridad(e, TrabajoPublicado) or {'fila': 'Error de integridad en la base de datos.'}
+                    rechazadas.append((numero, {campo: mensajes[0] for campo, mensajes in errores.items()}))
+    return creados, rechazadas
+
+
+def importar_trabajos(filas, lote=None, grupo=None, al_rechazar=None):
+    """
+    Importa las filas de `leer_filas` en lotes. Retorna {'filas', 'creados', 'rechazados',
+    'ultimaFila'}; ultimaFila es el número de la última fila procesada (0 si ninguna).
+    Cada fila rechazada se pasa a `al_rechazar(numero, errores)`; así el que llama decide
+    si acumular el reporte o escribirlo a medida que avanza.
+
+    Cada lote se confirma por separado. Si el archivo deja de poder leerse lanza
+    ArchivoIlegible con el resumen de los lotes ya confirmados; las filas leídas del
+    lote en curso no se importan, así que se puede reanudar desde ultimaFila + 1.
+    """
+    lote = lote or LOTE_IMPORTACION
+    resumen = {'filas': 0, 'creados': 0, 'rechazados': 0, 'ultimaFila': 0}
+    filas = iter(filas)
+    while True:
+        try:
+            bloque = list(islice(filas, lote))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ArchivoIlegible(e, resumen) from e
+        if not bloque:
+            break
+        creados, rechazadas = importar_lote(bloque, grupo)
+        resumen['filas'] += len(bloque)
+        resumen['ultimaFila'] = bloque[-1][0]
+        resumen['creados'] += creados
+        resumen['rechazados'] += len(rechazadas)
+        if al_rechazar:
+            for numero, errores in sorted(rechazadas, key=lambda r: r[0]):
+                al_rechazar(numero, errores)
+    return resumen
@@ -0,0 +1,178 @@
+"""
+Modificación y baja de muchas filas en un solo request.
+
+`OperacionesEnLoteMixin` agrega a un ModelViewSet las acciones de lista
+`bulk-update/` (PATCH) y `bulk-destroy/` (POST). El cuerpo puede ser:
+
+- una lista de objetos `{"id": 1, "estado": "Publicado"}`, cada uno con sus campos;
+- `{"ids": [1, 2, 3], "campos": {"estado": "Publicado"}}`, los mismos campos para todos;
+- en bulk-destroy, además, una lista de ids (`[1, 2, 3]`) o solo `{"ids": [...]}`.
+
+Todo el lote se valida antes de escribir: las filas se leen en una consulta, cada
+objeto pasa por el serializer (partial) sin la consulta de unicidad por fila, y los
+campos únicos se validan para todo el lote con `errores_unicidad_en_lote`. Si algo
+falla responde 400 y no se aplica nada; si no, los cambios se aplican en una
+transacción con QuerySet.update (mismos valores para todas las filas) o bulk_update.
+Como esos caminos no disparan señales, el índice de búsqueda, las estadísticas y la
+versión del modelo se actualizan acá. La baja usa QuerySet.delete, que sí las
+dispara (y borra en cascada como el DELETE de a una).
+
+La respuesta trae un resultado por elemento, en el orden recibido.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .busqueda import indexar_objetos
+from .estadisticas import aplicar_cambios_en_lote, valores_en_lote
+from .validacion import errores_de_integridad, errores_unicidad_en_lote
+from .versiones import incrementar_versiones
+
+MAX_ELEMENTOS_LOTE = 1000
+
+ACTUALIZADO, ELIMINADO, ERROR, NO_APLICADO = 'actualizado', 'eliminado', 'error', 'no_aplicado'
+
+
+def leer_elementos(data, con_campos):
+    """
+    [(id, campos)] del cuerpo, en orden; ValueError con el mensaje para el 400.
+    Con `con_campos` cada elemento tiene que traer algún campo para modificar.
+    """
+    if isinstance(data, dict) and 'ids' in data:
+        campos = data.get('campos', {})
+        if not isinstance(data['ids'], list) or not isinstance(campos, dict):
+            raise ValueError('ids debe ser una lista y campos un objeto.')
+        elementos = [{'id': oid, **campos} for oid in data['ids']]
+    elif isinstance(data, list):
+        elementos = data
+    else:
+        raise ValueError('Se espera una lista de ids u objetos {id, ...}, o {"ids": [...], "campos": {...}}.')
+
+    if not elementos:
+        raise ValueError('El lote está vacío.')
+    if len(elementos) > MAX_ELEMENTOS_LOTE:
+        raise ValueError(f'El lote admite hasta {MAX_ELEMENTOS_LOTE} elementos.')
+
+    leidos, vistos = [], set()
+    for indice, elemento in enumerate(elementos):
+        if isinstance(elemento, dict):
+            campos = {k: v for k, v in elemento.items() if k != 'id'}
+            oid = elemento.get('id')
+        else:
+            campos, oid = {}, elemento
+        if isinstance(oid, bool) or not isinstance(oid, (int, str)) or not str(oid).isdigit():
+            raise ValueError(f'Elemento {indice}: id debe ser un número entero.')
+        oid = int(oid)
+        if oid in vistos:
+            raise ValueError(f'Elemento {indice}: el id {oid} está repetido.')
+        if con_campos and not campos:
+            raise ValueError(f'Elemento {indice}: no indica campos para modificar.')
+        vistos.add(oid)
+        leidos.append((oid, campos))
+    return leidos
+
+
+def respuesta_lote(resultados, codigo=status.HTTP_200_OK, **totales):
+    return Response({**totales, 'resultados': resultados}, status=codigo)
+
+
+def con_errores(elementos, errores):
+    """400 con el error de cada elemento que falló; los demás quedan sin aplicar."""
+    return respuesta_lote([
+        {'id': oid, 'resultado': ERROR, 'errores': errores[oid]} if oid in errores
+        else {'id': oid, 'resultado': NO_APLICADO}
+        for oid, _ in elementos
+    ], status.HTTP_400_BAD_REQUEST)
+
+
+class OperacionesEnLoteMixin:
+    """Para ModelViewSets: acciones `bulk-update/` y `bulk-destroy/` (ver docstring del módulo)."""
+
+    def validar_lote(self, elementos):
+        """({pk: instancia}, {pk: validated_data}, {pk: errores}) de todo el lote."""
+        instancias = self.get_queryset().in_bulk([oid for oid, _ in elementos])
+        validados, errores = {}, {}
+        contexto = {**self.get_serializer_context(), 'unicidad_en_lote': True}
+        for oid, campos in elementos:
+            instancia = instancias.get(oid)
+            if instancia is None:
+                errores[oid] = {'detail': 'No encontrado.'}
+                continue
+            serializer = self.get_serializer_class()(instancia, data=campos, partial=True, context=contexto)
+            if serializer.is_valid():
+                validados[oid] = serializer.validated_data
+            else:
+                errores[oid] = serializer.errors
+        for oid, errores_unicidad in errores_unicidad_en_lote(self.get_queryset().model, validados).items():
+            errores.setdefault(oid, {}).update(errores_unicidad)
+        return instancias, validados, errores
+
+    def aplicar_lote(self, modelo, instancias, validados):
+        pks = list(validados)
+        antes = valores_en_lote(modelo, pks)
+        campos = sorted({nombre for datos in validados.values() for nombre in datos})
+        for pk, datos in validados.items():
+            for nombre, valor in datos.items():
+                setattr(instancias[pk], nombre, valor)
+
+        primeros = next(iter(validados.values()))
+        if all(datos == primeros for datos in validados.values()):
+            # Los mismos valores para todas: un solo UPDATE ... WHERE pk IN (...)
+            modelo.objects.filter(pk__in=pks).update(**primeros)
+        else:
+            modelo.objects.bulk_update([instancias[pk] for pk in pks], campos, batch_size=500)
+
+        # QuerySet.update y bulk_update no disparan señales
+        indexar_objetos(modelo, [instancias[pk] for pk in pks])
+        aplicar_cambios_en_lote(modelo, antes, valores_en_lote(modelo, pks))
+        incrementar_versiones(modelo)
+
+    @action(detail=False, methods=['patch'], url_path='bulk-update', permission_classes=[IsAuthenticated])
+    def bulk_update(self, request):
+        """Modifica muchas filas: `[{id, campos...}]` o `{ids, campos}`. Todo o nada."""
+        try:
+            elementos = leer_elementos(request.data, con_campos=True)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        instancias, validados, errores = self.validar_lote(elementos)
+        if errores:
+            return con_errores(elementos, errores)
+
+        modelo = self.get_queryset().model
+        try:
+            with transaction.atomic():
+                self.aplicar_lote(modelo, instancias, validados)
+        except IntegrityError as e:
+            # Otro request ocupó un valor único entre la validación y el UPDATE
+            errores = errores_de_integridad(e, modelo) or {'detail': 'Error de integridad en la base de datos.'}
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+        return respuesta_lote(
+            [{'id': oid, 'resultado': ACTUALIZADO} for oid, _ in elementos], actualizados=len(elementos)
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-destroy', permission_classes=[IsAuthenticated])
+    def bulk_destroy(self, request):
+        """Elimina muchas filas: `[ids]`, `[{id}]` o `{ids}`. Todo o nada."""
+        try:
+            elementos = leer_elementos(request.data, con_campos=False)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        pks = [oid for oid, _ in elementos]
+        queryset = self.get_queryset().filter(pk__in=pks)
+        existentes = set(queryset.values_list('pk', flat=True))
+        faltantes = {oid: {'detail': 'No encontrado.'} for oid in pks if oid not in existentes}
+        if faltantes:
+            return con_errores(elementos, faltantes)
+
+        modelo = queryset.model
+        with transaction.atomic():
+            _, por_modelo = queryset.delete()
+        # Filas de otras tablas borradas en cascada (p. ej. el registro de una patente)
+        cascada = {etiqueta.split('.')[-1]: n for etiqueta, n in por_modelo.items() if etiqueta != modelo._meta.label}
+        return respuesta_lote(
+            [{'id': oid, 'resultado': ELIMINADO} for oid in pks], eliminados=len(pks), en_cascada=cascada
+        )
@@ -0,0 +1,215 @@
+import asyncio
+import itertools
+import os
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from app.models import GrupoInvestigacion, MemoriaAnual, Persona
+from app.sinteticos import PARAMETROS_DEFAULT, generar_corpus
+from app.views import get_token_for_user
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara throughput y latencia de las lecturas más pedidas con muchos clientes a la vez: '
+        'la vista sync servida por WSGI (un pool de hilos, como gunicorn --threads), la misma vista '
+        'sync bajo ASGI y la vista async de /api/async/ bajo ASGI. Los handlers de Django se llaman en '
+        'el mismo proceso, sin servidor HTTP, sobre una base de pruebas con corpus sintético. '
+        '--latencia-ms agrega una demora a cada consulta para simular una base en red.'
+    )
+
+    # nombre -> (ruta sync, ruta async)
+    RUTAS = {
+        'memoria': ('/api/memorias-anuales/{memoria}/completa/', '/api/async/memorias-anuales/{memoria}/completa/'),
+        'panel': ('/api/grupos/{grupo}/estadisticas/', '/api/async/grupos/{grupo}/estadisticas/'),
+        'referencia': ('/api/auth/opciones-perfil/', '/api/async/opciones-perfil/'),
+        'listado': ('/api/proyectos/?page_size=50', '/api/async/proyectos/?page_size=50'),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=200, help='Clientes pidiendo a la vez')
+        parser.add_argument('--pedidos', type=int, default=2000, help='Pedidos por escenario')
+        parser.add_argument('--hilos-wsgi', type=int, default=16, help='Hilos del servidor WSGI')
+        parser.add_argument('--latencia-ms', type=float, default=2,
+                            help='Demora agregada a cada consulta (red hasta la base); 0 para no agregar')
+        parser.add_argument('--ruta', action='append', choices=sorted(self.RUTAS), dest='rutas',
+                            help='Ruta a medir (repetible; por defecto todas)')
+        for nombre, valor in PARAMETROS_DEFAULT.items():
+            parser.add_argument(f'--{nombre.replace("_", "-")}', dest=nombre, type=int, default=None,
+                                help=f'Parámetro del corpus (por defecto {valor})')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        archivo = None
+        if connection.vendor == 'sqlite':
+            # La base en memoria de los tests no se comparte bien entre tantos hilos
+            descriptor, archivo = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(descriptor)
+            connection.settings_dict['TEST']['NAME'] = archivo
+        latencia = options['latencia_ms'] / 1000
+
+        def demorar(execute, sql, params, many, context):
+            # Los PRAGMA que SQLite corre al conectar (app/basedatos.py) no viajan por la red
+            if not sql.startswith('PRAGMA'):
+                time.sleep(latencia)
+            return execute(sql, params, many, context)
+
+        def instalar_demora(sender, connection, **kwargs):
+            if demorar not in connection.execute_wrappers:
+                connection.execute_wrappers.append(demorar)
+
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            generar_corpus(salida=self.stdout.write, **{nombre: options[nombre] for nombre in PARAMETROS_DEFAULT})
+            if latencia:
+                connection_created.connect(instalar_demora, dispatch_uid='benchmark_asgi_demora')
+            # Con cientos de pedidos en cola casi todos superan el umbral de request lento
+            with override_settings(METRICAS={**getattr(settings, 'METRICAS', {}), 'SLOW_REQUEST_MS': None}):
+                self.medir(options)
+        finally:
+            connection_created.disconnect(dispatch_uid='benchmark_asgi_demora')
+            connections.close_all()
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+            if archivo:
+                for sufijo in ('', '-wal', '-shm'):
+                    if os.path.exists(archivo + sufijo):
+                        os.remove(archivo + sufijo)
+
+    def medir(self, options):
+        persona = Persona.objects.order_by('pk').first()
+        valores = {
+            'memoria': MemoriaAnual.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'grupo': GrupoInvestigacion.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+        token = get_token_for_user(persona)['access'] if persona else None
+        wsgi, asgi = WSGIHandler(), ASGIHandler()
+
+        self.stdout.write(
+            f'{options["clientes"]} clientes, {options["pedidos"]} pedidos por escenario, '
+            f'{options["hilos_wsgi"]} hilos WSGI, {options["latencia_ms"]} ms por consulta'
+        )
+        self.stdout.write(f'{"ruta":12} {"escenario":11} {"ok":>6} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"errores":>8}')
+        for nombre in options['rutas'] or list(self.RUTAS):
+            ruta_sync, ruta_async = (ruta.format(**valores) for ruta in self.RUTAS[nombre])
+            escenarios = [
+                ('wsgi', lambda ruta=ruta_sync: self.correr_wsgi(wsgi, ruta, token, options)),
+                ('asgi sync', lambda ruta=ruta_sync: asyncio.run(self.correr_asgi(asgi, ruta, token, options))),
+                ('asgi async', lambda ruta=ruta_async: asyncio.run(self.correr_asgi(asgi, ruta, token, options))),
+            ]
+            for escenario, correr in escenarios:
+                connections.close_all()
+                duracion, latencias, errores = correr()
+                self.imprimir(nombre, escenario, duracion, latencias, errores)
+
+    def pedido_wsgi(self, handler, ruta, token):
+        partes = urlsplit(ruta)
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': partes.path, 'QUERY_STRING': partes.query,
+                   'HTTP_HOST': 'testserver', 'SERVER_NAME': 'testserver'}
+        if token:
+            environ['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        setup_testing_defaults(environ)
+        estado = []
+        cuerpo = handler(environ, lambda status, headers, exc_info=None: estado.append(status))
+        try:
+            for _ in cuerpo:
+                pass
+        finally:
+            # close() dispara request_finished, que cierra la conexión como en un servidor real
+            cuerpo.close()
+        return int(estado[0].split()[0])
+
+    def correr_wsgi(self, handler, ruta, token, options):
+        """Cada cliente es un hilo; solo `hilos_wsgi` atienden a la vez, el resto espera en cola."""
+        servidor = threading.BoundedSemaphore(options['hilos_wsgi'])
+        contador = itertools.count()
+        latencias, errores = [], []
+        lock = threading.Lock()
+        self.pedido_wsgi(handler, ruta, token)  # calentamiento
+
+        def cliente():
+            while next(contador) < options['pedidos']:
+                inicio = time.perf_counter()
+                with servidor:
+                    codigo = self.pedido_wsgi(handler, ruta, token)
+                with lock:
+                    (latencias if codigo == 200 else errores).append((time.perf_counter() - inicio) * 1000)
+
+        hilos = [threading.Thread(target=cliente) for _ in range(options['clientes'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return time.perf_counter() - inicio, latencias, errores
+
+    async def pedido_asgi(self, aplicacion, ruta, token):
+        partes = urlsplit(ruta)
+        headers = [(b'host', b'testserver')]
+        if token:
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': partes.path, 'raw_path': partes.path.encode(), 'root_path': '',
+            'query_string': partes.query.encode(), 'headers': headers,
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        terminado = asyncio.Event()
+        pedido_enviado = False
+        estado = []
+
+        async def receive():
+            nonlocal pedido_enviado
+            if not pedido_enviado:
+                pedido_enviado = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Django escucha la desconexión del cliente mientras arma la respuesta
+            await terminado.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                estado.append(mensaje['status'])
+            elif mensaje['type'] == 'http.response.body' and not mensaje.get('more_body'):
+                terminado.set()
+
+        await aplicacion(scope, receive, send)
+        terminado.set()
+        return estado[0]
+
+    async def correr_asgi(self, aplicacion, ruta, token, options):
+        """Cada cliente es una tarea del mismo event loop, como un worker de uvicorn."""
+        contador = itertools.count()
+        latencias, errores = [], []
+        await self.pedido_asgi(aplicacion, ruta, token)  # calentamiento
+
+        async def cliente():
+            while next(contador) < options['pedidos']:
+                inicio = time.perf_counter()
+                codigo = await self.pedido_asgi(aplicacion, ruta, token)
+                (latencias if codigo == 200 else errores).append((time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(options['clientes'])))
+        return time.perf_counter() - inicio, latencias, errores
+
+    def imprimir(self, nombre, escenario, duracion, latencias, errores):
+        p50 = statistics.median(latencias) if latencias else 0
+        p95 = statistics.quantiles(latencias, n=20)[18] if len(latencias) >= 20 else max(latencias, default=0)
+        self.stdout.write(
+            f'{nombre:12} {escenario:11} {len(latencias):>6} {len(latencias) / duracion:>9.1f} '
+            f'{p50:>9.1f} {p95:>9.1f} {len(errores):>8}'
+        )
@@ -0,0 +1,122 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from app.basedatos import pragmas_actuales
+from app.models import Autor
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide escrituras por segundo con varios hilos escribiendo a la vez (y lectores en paralelo) '
+        'sobre una base de pruebas. Con SQLite compara los pragmas por defecto de SQLite contra el '
+        'perfil de core/settings.py (WAL, busy_timeout, BEGIN IMMEDIATE); con PostgreSQL mide el '
+        'perfil configurado (pool o conexiones persistentes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos que escriben')
+        parser.add_argument('--lectores', type=int, default=2, help='Hilos que leen mientras se escribe')
+        parser.add_argument('--escrituras', type=int, default=200, help='Transacciones por hilo escritor')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        archivo = None
+        if connection.vendor == 'sqlite':
+            # Una base en memoria no tiene locks de archivo: se mide sobre un archivo temporal
+            descriptor, archivo = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(descriptor)
+            connection.settings_dict['TEST']['NAME'] = archivo
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            if connection.vendor == 'sqlite':
+                opciones = connection.settings_dict['OPTIONS']
+                perfil = dict(opciones)
+                # Los valores por defecto de SQLite y de Django, antes de DB_PERFIL
+                opciones.clear()
+                self.medir('sqlite por defecto', options, {'journal_mode': 'delete', 'synchronous': 'full'})
+                opciones.update(perfil)
+                self.medir('sqlite perfil', options, settings.SQLITE_PRAGMAS)
+            else:
+                self.medir(f'{connection.vendor} perfil', options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+            if archivo:
+                for sufijo in ('', '-wal', '-shm'):
+                    if os.path.exists(archivo + sufijo):
+                        os.remove(archivo + sufijo)
+
+    def medir(self, nombre, options, pragmas=None):
+        connections.close_all()
+        with override_settings(**({'SQLITE_PRAGMAS': pragmas} if pragmas is not None else {})):
+            if pragmas is not None:
+                self.stdout.write(f'{nombre}: {pragmas_actuales(connection, pragmas)} {connection.settings_dict["OPTIONS"]}')
+            connection.close()
+            latencias, errores, lecturas = [], [], [0]
+            terminado = threading.Event()
+            lock = threading.Lock()
+
+            def escritor(numero):
+                try:
+                    for i in range(options['escrituras']):
+                        inicio = time.perf_counter()
+                        try:
+                            # Leer y después escribir en la misma transacción, como las validaciones de unicidad
+                            with transaction.atomic():
+                                datos = {'nombre': f'{nombre}-{numero}', 'apellido': str(i)}
+                                if not Autor.objects.filter(**datos).exists():
+                                    Autor.objects.create(**datos)
+                        except OperationalError as e:
+                            with lock:
+                                errores.append(str(e))
+                            continue
+                        with lock:
+                            latencias.append((time.perf_counter() - inicio) * 1000)
+                finally:
+                    connection.close()
+
+            def lector():
+                try:
+                    while not terminado.is_set():
+                        try:
+                            Autor.objects.filter(nombre__startswith=nombre).count()
+                        except OperationalError as e:
+                            with lock:
+                                errores.append(str(e))
+                            continue
+                        with lock:
+                            lecturas[0] += 1
+                finally:
+                    connection.close()
+
+            escritores = [threading.Thread(target=escritor, args=(n,)) for n in range(options['hilos'])]
+            lectores = [threading.Thread(target=lector) for _ in range(options['lectores'])]
+            inicio = time.perf_counter()
+            for hilo in escritores + lectores:
+                hilo.start()
+            for hilo in escritores:
+                hilo.join()
+            duracion = time.perf_counter() - inicio
+            terminado.set()
+            for hilo in lectores:
+                hilo.join()
+
+        total = options['hilos'] * options['escrituras']
+        p95 = statistics.quantiles(latencias, n=20)[18] if len(latencias) >= 20 else max(latencias, default=0)
+        self.stdout.write(
+            f'{nombre:20} {len(latencias):>6}/{total} escrituras  {len(latencias) / duracion:>8.1f} escr/s  '
+            f'p50 {statistics.median(latencias) if latencias else 0:>7.1f} ms  p95 {p95:>7.1f} ms  '
+            f'{lecturas[0] / duracion:>8.1f} lect/s  {len(errores)} errores'
+        )
+        for mensaje in sorted(set(errores))[:3]:
+            self.stdout.write(f'    {mensaje} (x{errores.count(mensaje)})')
@@ -0,0 +1,133 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from app.models import MemoriaAnual, Persona
+from app.sinteticos import PARAMETROS_DEFAULT, generar_corpus
+from app.views import get_token_for_user
+from core.urls import router
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide p50/p95 y cantidad de consultas de las rutas de core/urls.py con el cliente de '
+        'pruebas de Django. Por defecto crea una base de pruebas y genera un corpus sintético. '
+        'Con --baseline compara contra una corrida anterior y falla si alguna ruta empeoró. '
+        'Que las consultas no crezcan con el tamaño de página lo verifica app/tests.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--usar-base-actual', action='store_true',
+                            help='Medir sobre la base configurada en lugar de una base de pruebas con corpus sintético')
+        parser.add_argument('--baseline', default=None,
+                            help='Archivo JSON con una corrida anterior para detectar regresiones')
+        parser.add_argument('--guardar-baseline', default=None,
+                            help='Guardar los resultados de esta corrida como baseline en el archivo indicado')
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help='Aumento relativo del p95 permitido respecto del baseline (0.25 = 25%%)')
+        parser.add_argument('--piso-ms', type=float, default=5,
+                            help='Diferencias de p95 menores a esto (ms) se consideran ruido')
+        for nombre, valor in PARAMETROS_DEFAULT.items():
+            parser.add_argument(f'--{nombre.replace("_", "-")}', dest=nombre, type=int, default=None,
+                                help=f'Parámetro del corpus (por defecto {valor})')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nombre_original = None
+        try:
+            if not options['usar_base_actual']:
+                nombre_original = connection.settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                parametros = {nombre: options[nombre] for nombre in PARAMETROS_DEFAULT}
+                generar_corpus(salida=self.stdout.write, **parametros)
+            rutas, persona = self.rutas()
+            client, headers = self.cliente(persona)
+            resultados = self.medir(rutas, client, headers, options['repeticiones'])
+        finally:
+            if nombre_original is not None:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        self.imprimir(resultados)
+        if options['guardar_baseline']:
+            Path(options['guardar_baseline']).write_text(json.dumps(resultados, indent=2, sort_keys=True))
+            self.stdout.write(f'Baseline guardado en {options["guardar_baseline"]}')
+        if options['baseline']:
+            regresiones = self.comparar(resultados, options)
+            if regresiones:
+                raise CommandError('Regresiones respecto del baseline:\n' + '\n'.join(regresiones))
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto del baseline'))
+
+    def rutas(self):
+        """(nombre, url, requiere token) para cada listado/detalle del router y las vistas sueltas."""
+        rutas = []
+        for prefijo, viewset, basename in router.registry:
+            rutas.append((f'{prefijo}-list', f'/api/{prefijo}/'))
+            pk = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+            if pk is not None:
+                rutas.append((f'{prefijo}-detail', f'/api/{prefijo}/{pk}/'))
+        memoria = MemoriaAnual.objects.order_by('pk').values_list('pk', flat=True).first()
+        if memoria is not None:
+            rutas.append(('memorias-anuales-completa', f'/api/memorias-anuales/{memoria}/completa/'))
+        rutas += [
+            ('opciones-perfil', '/api/auth/opciones-perfil/'),
+            ('tipos-personal', '/api/auth/tipos-personal/'),
+            ('listar-personas', '/api/auth/personas/'),
+        ]
+        persona = Persona.objects.order_by('pk').first()
+        if persona is not None:
+            rutas.append(('perfil', f'/api/auth/perfil/{persona.pk}/'))
+        return rutas, persona
+
+    def cliente(self, persona):
+        headers = {}
+        if persona is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {get_token_for_user(persona)["access"]}'
+        return Client(), headers
+
+    def medir(self, rutas, client, headers, repeticiones):
+        resultados = {}
+        for nombre, url in rutas:
+            client.get(url, **headers)  # calentamiento
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                with CaptureQueriesContext(connection) as consultas:
+                    response = client.get(url, **headers)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            tiempos.sort()
+            resultados[nombre] = {
+                'url': url,
+                'status': response.status_code,
+                'p50': round(statistics.median(tiempos), 2),
+                'p95': round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 2),
+                'consultas': len(consultas),
+            }
+        return resultados
+
+    def imprimir(self, resultados):
+        self.stdout.write(f'{"ruta":40} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"consultas":>10}')
+        for nombre, r in sorted(resultados.items()):
+            self.stdout.write(f'{nombre:40} {r["status"]:>6} {r["p50"]:>9.2f} {r["p95"]:>9.2f} {r["consultas"]:>10}')
+
+    def comparar(self, resultados, options):
+        baseline = json.loads(Path(options['baseline']).read_text())
+        regresiones = []
+        for nombre, actual in sorted(resultados.items()):
+            anterior = baseline.get(nombre)
+            if anterior is None:
+                continue
+            if actual['consultas'] > anterior['consultas']:
+                regresiones.append(f'  {nombre}: {anterior["consultas"]} -> {actual["consultas"]} consultas')
+            limite = anterior['p95'] * (1 + options['tolerancia'])
+            if actual['p95'] > limite and actual['p95'] - anterior['p95'] > options['piso_ms']:
+                regresiones.append(f'  {nombre}: p95 {anterior["p95"]} -> {actual["p95"]} ms')
+        return regresiones
@@ -0,0 +1,124 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from app.memoria_views import MemoriaAnualViewSet
+from app.models import (
+    ProgramaActividades, GrupoInvestigacion, Persona, LineaDeInvestigacion,
+    Actividad, Autor, TipoTrabajoPublicado, TrabajoPublicado, Patente,
+    ProyectoInvestigacion, MemoriaAnual, IntegranteMemoria, ActividadMemoria,
+    PublicacionMemoria, PatenteMemoria, ProyectoMemoria
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la creación de una memoria anual fila por fila contra el endpoint '
+        'transaccional con bulk_create. Todo corre en una transacción que se deshace al '
+        'terminar: en la base no queda nada de lo generado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000,
+                            help='Cantidad total de filas intermedias (se reparten entre las cinco tablas)')
+
+    def handle(self, *args, **options):
+        por_tabla = max(options['filas'] // 5, 1)
+        # Ambos caminos escriben dentro de la misma transacción, así que la comparación mide
+        # consultas y señales, no los commits; el rollback final no depende de borrar en cascada
+        with transaction.atomic():
+            try:
+                programa = ProgramaActividades.objects.create(anio=1900, objetivosEstrategicos='benchmark')
+                autor = Autor.objects.create(nombre='Benchmark', apellido='Benchmark')
+                tipo = TipoTrabajoPublicado.objects.create(nombre='Benchmark')
+                ids = self.crear_datos(programa, autor, tipo, por_tabla)
+
+                inicio = time.perf_counter()
+                self.crear_fila_por_fila(ids)
+                por_fila = time.perf_counter() - inicio
+
+                inicio = time.perf_counter()
+                respuesta = self.crear_por_endpoint(ids)
+                por_lote = time.perf_counter() - inicio
+            finally:
+                transaction.set_rollback(True)
+        if respuesta.status_code != 201:
+            self.stderr.write(f'El endpoint respondió {respuesta.status_code}: {respuesta.data}')
+            return
+
+        total = por_tabla * 5
+        self.stdout.write(f'Filas intermedias: {total}')
+        self.stdout.write(f'Fila por fila:     {por_fila * 1000:.1f} ms')
+        self.stdout.write(f'bulk_create:       {por_lote * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Aceleración:       x{por_fila / por_lote:.1f}'))
+
+    def crear_datos(self, programa, autor, tipo, cantidad):
+        grupo = GrupoInvestigacion.objects.create(
+            nombre='Grupo benchmark', facultadReginalAsignada='-', correo='benchmark@utn.edu.ar',
+            organigrama='-', sigla='BENCH', fuenteFinanciamiento='-', ProgramaActividades=programa
+        )
+        linea = LineaDeInvestigacion.objects.create(nombre='Benchmark', descripcion='-', ProgramaActividades=programa)
+        hoy = datetime.date.today()
+        Persona.objects.bulk_create([
+            Persona(nombre='Bench', apellido=str(i), correo=f'bench{i}@benchmark.invalid', contrasena='-',
+                    horasSemanales=10, GrupoInvestigacion=grupo)
+            for i in range(cantidad)
+        ])
+        Actividad.objects.bulk_create([
+            Actividad(descripcion=f'Actividad {i}', fechaFin=hoy, fechaInicio=hoy, nro=i,
+                      presupuestoAsignado=0, resultadosEsperados='-', LineaDeInvestigacion=linea)
+            for i in range(cantidad)
+        ])
+        TrabajoPublicado.objects.bulk_create([
+            TrabajoPublicado(titulo=f'Benchmark {i}', ISSN=f'BENCH-{i}', editorial='-', nombreRevista='-',
+                             pais='-', tipoTrabajoPublicado=tipo, Autor=autor, GrupoInvestigacion=grupo)
+            for i in range(cantidad)
+        ])
+        Patente.objects.bulk_create([
+            Patente(descripcion=f'Patente {i}', tipo='-', numero=f'BENCH-{i}', GrupoInvestigacion=grupo)
+            for i in range(cantidad)
+        ])
+        ProyectoInvestigacion.objects.bulk_create([
+            ProyectoInvestigacion(codigoProyecto=f'BENCH-{i}', descripcion='-', objectType='-', fechaInicio=hoy,
+                                  fechaFinalizacion=hoy, nombre=f'Proyecto {i}', tipoProyecto='-',
+                                  logrosObtenidos='-', fuenteFinanciamiento='-', GrupoInvestigacion=grupo)
+            for i in range(cantidad)
+        ])
+        return {
+            'grupo': grupo.pk,
+            'personas': list(Persona.objects.filter(GrupoInvestigacion=grupo).values_list('pk', flat=True)),
+            'actividades': list(Actividad.objects.filter(LineaDeInvestigacion=linea).values_list('pk', flat=True)),
+            'publicaciones': list(TrabajoPublicado.objects.filter(GrupoInvestigacion=grupo).values_list('pk', flat=True)),
+            'patentes': list(Patente.objects.filter(GrupoInvestigacion=grupo).values_list('pk', flat=True)),
+            'proyectos': list(ProyectoInvestigacion.objects.filter(GrupoInvestigacion=grupo).values_list('pk', flat=True)),
+        }
+
+    def crear_fila_por_fila(self, ids):
+        # Reproduce el camino anterior: un INSERT autocommit por cada fila
+        memoria = MemoriaAnual.objects.create(ano=1900, GrupoInvestigacion_id=ids['grupo'])
+        for oid in ids['personas']:
+            IntegranteMemoria.objects.create(MemoriaAnual=memoria, Persona_id=oid)
+        for oid in ids['actividades']:
+            ActividadMemoria.objects.create(MemoriaAnual=memoria, Actividad_id=oid)
+        for oid in ids['publicaciones']:
+            PublicacionMemoria.objects.create(MemoriaAnual=memoria, TrabajoPublicado_id=oid)
+        for oid in ids['patentes']:
+            PatenteMemoria.objects.create(MemoriaAnual=memoria, Patente_id=oid)
+        for oid in ids['proyectos']:
+            ProyectoMemoria.objects.create(MemoriaAnual=memoria, ProyectoInvestigacion_id=oid)
+
+    def crear_por_endpoint(self, ids):
+        payload = {
+            'ano': 1900,
+            'GrupoInvestigacion': ids['grupo'],
+            'integrantes': [{'personaId': oid} for oid in ids['personas']],
+            'actividades': [{'actividadId': oid} for oid in ids['actividades']],
+            'publicaciones': ids['publicaciones'],
+            'patentes': ids['patentes'],
+            'proyectos': ids['proyectos'],
+        }
+        request = APIRequestFactory().post('/api/memorias-anuales/', payload, format='json')
+        return MemoriaAnualViewSet.as_view({'post': 'create'})(request)
@@ -0,0 +1,85 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from app.models import Erogacion, GrupoInvestigacion
+from app.rendicion import calcular_resumen, resumen_rendicion
+from app.sinteticos import generar_corpus
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el armado de totales de rendición leyendo todas las erogaciones (como hacía el '
+        'cliente) contra el GROUP BY de app/rendicion.py, en frío y desde caché, sobre una base de '
+        'pruebas con erogaciones sintéticas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--erogaciones', type=int, default=1_000_000, help='Total de erogaciones a generar')
+        parser.add_argument('--grupos', type=int, default=5)
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        try:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            inicio = time.perf_counter()
+            generar_corpus(
+                grupos=options['grupos'], erogaciones=options['erogaciones'] // options['grupos'],
+                personas=5, proyectos=2, publicaciones=10, patentes=2, memorias=1, filas_memoria=5,
+                salida=self.stdout.write,
+            )
+            self.stdout.write(f'Corpus generado en {time.perf_counter() - inicio:.1f} s')
+            self.medir(options['repeticiones'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+    def cronometrar(self, nombre, funcion, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            with CaptureQueriesContext(connection) as consultas:
+                resultado = funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        self.stdout.write(
+            f'{nombre:45} p50 {statistics.median(tiempos):>10.2f} ms   máx {max(tiempos):>10.2f} ms   '
+            f'{len(consultas)} consultas'
+        )
+        return resultado, statistics.median(tiempos)
+
+    def medir(self, repeticiones):
+        self.stdout.write(f'{Erogacion.objects.count()} erogaciones')
+
+        def leer_todo():
+            # Lo que hacía el cliente: traer cada erogación y sumar
+            ingresos, egresos = Decimal(0), Decimal(0)
+            for ingreso, egreso in Erogacion.objects.values_list('ingresos', 'egresos').iterator(chunk_size=10_000):
+                ingresos += ingreso
+                egresos += egreso
+            return ingresos, egresos
+
+        (ingresos, egresos), lento = self.cronometrar('leer todas las filas y sumar', leer_todo, max(1, repeticiones // 2))
+        resumen, sql = self.cronometrar('GROUP BY (sin caché)', calcular_resumen, repeticiones)
+        if (str(ingresos), str(egresos)) != (resumen['totales']['ingresos'], resumen['totales']['egresos']):
+            raise CommandError(
+                f'Los totales no coinciden: filas {ingresos}/{egresos}, GROUP BY '
+                f'{resumen["totales"]["ingresos"]}/{resumen["totales"]["egresos"]}'
+            )
+
+        grupo = GrupoInvestigacion.objects.order_by('pk').values_list('pk', flat=True).first()
+        self.cronometrar('GROUP BY de un grupo (sin caché)', lambda: calcular_resumen(grupo=grupo), repeticiones)
+        cache.clear()
+        resumen_rendicion()
+        _, cacheado = self.cronometrar('resumen global desde caché', resumen_rendicion, repeticiones)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Totales exactos ({resumen["totales"]["ingresos"]} / {resumen["totales"]["egresos"]}); '
+            f'GROUP BY x{lento / sql:.1f} más rápido que leer las filas, caché x{lento / max(cacheado, 0.001):.0f}'
+        ))
@@ -0,0 +1,182 @@
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from app.models import Persona
+from app.sinteticos import PARAMETROS_DEFAULT, generar_corpus
+from app.views import get_token_for_user
+from core.urls import router
+
+
+class Command(BaseCommand):
+    help = (
+        'Pide el listado de cada viewset del router, sin filtros y con cada filtro que acepta, '
+        'captura las consultas y corre EXPLAIN sobre ellas (EXPLAIN QUERY PLAN en SQLite, EXPLAIN '
+        'con enable_seqscan=off en PostgreSQL). Falla si una consulta con WHERE recorre una tabla '
+        'completa. Por defecto trabaja sobre una base de pruebas con corpus sintético.'
+    )
+
+    # Parámetros que el get_queryset de algunos viewsets lee a mano, sin filterset_fields
+    FILTROS_MANUALES = {
+        'integrantes-memoria': ['MemoriaAnual'],
+        'actividades-memoria': ['MemoriaAnual'],
+        'publicaciones-memoria': ['MemoriaAnual'],
+        'patentes-memoria': ['MemoriaAnual'],
+        'proyectos-memoria': ['MemoriaAnual'],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usar-base-actual', action='store_true',
+                            help='Revisar la base configurada en lugar de una base de pruebas con corpus sintético')
+        parser.add_argument('--planes', action='store_true', help='Mostrar el plan de cada consulta')
+        for nombre, valor in PARAMETROS_DEFAULT.items():
+            parser.add_argument(f'--{nombre.replace("_", "-")}', dest=nombre, type=int, default=None,
+                                help=f'Parámetro del corpus (por defecto {valor})')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'EXPLAIN no está soportado para {connection.vendor}.')
+        setup_test_environment()
+        nombre_original = None
+        try:
+            if not options['usar_base_actual']:
+                nombre_original = connection.settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                generar_corpus(salida=self.stdout.write, **{nombre: options[nombre] for nombre in PARAMETROS_DEFAULT})
+            escaneos = self.revisar(options['planes'])
+        finally:
+            if nombre_original is not None:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        if escaneos:
+            raise CommandError('Consultas filtradas que recorren tablas completas:\n' + '\n'.join(escaneos))
+        if self.por_orden:
+            self.stdout.write(
+                f'{self.por_orden} listados marcados pk: hay índice, pero con ORDER BY pk LIMIT SQLite eligió '
+                'recorrer la tabla en orden de pk'
+            )
+        self.stdout.write(self.style.SUCCESS('Todas las consultas filtradas usan índices'))
+
+    def filtros(self, prefijo, viewset):
+        """Nombres de parámetro de filtro que acepta el listado."""
+        campos = getattr(viewset, 'filterset_fields', None) or self.FILTROS_MANUALES.get(prefijo, [])
+        if isinstance(campos, dict):
+            return [campo if lookup == 'exact' else f'{campo}__{lookup}' for campo, lookups in campos.items() for lookup in lookups]
+        return list(campos)
+
+    def valor_ejemplo(self, modelo, parametro):
+        campo, _, lookup = parametro.partition('__')
+        # Rangos selectivos: con un extremo que abarca casi toda la tabla recorrerla es lo correcto
+        orden = {'gte': f'-{campo}', 'gt': f'-{campo}', 'lte': campo, 'lt': campo}.get(lookup, 'pk')
+        valor = modelo.objects.exclude(**{f'{campo}__isnull': True}).order_by(orden).values_list(campo, flat=True).first()
+        if isinstance(valor, (datetime.date, datetime.datetime)):
+            return valor.isoformat()
+        return valor
+
+    def consultas_de(self, prefijo, viewset):
+        """[(descripción, parámetros)]: sin filtros, cada filtro solo y los exactos juntos."""
+        modelo = viewset.queryset.model
+        consultas = [('sin filtros', {})]
+        exactos = {}
+        for parametro in self.filtros(prefijo, viewset):
+            valor = self.valor_ejemplo(modelo, parametro)
+            if valor is None:
+                self.stdout.write(f'  {prefijo}: sin datos para probar ?{parametro}=')
+                continue
+            consultas.append((f'?{parametro}={valor}', {parametro: valor}))
+            if '__' not in parametro:
+                exactos[parametro] = valor
+        if len(exactos) > 1:
+            consultas.append(('?' + '&'.join(f'{p}={v}' for p, v in exactos.items()), exactos))
+        return consultas
+
+    def capturar(self, client, url, parametros, headers):
+        """(sql, params) de los SELECT que ejecuta el pedido."""
+        consultas = []
+
+        def registrar(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                consultas.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(registrar):
+            respuesta = client.get(url, parametros, **headers)
+        return respuesta.status_code, consultas
+
+    def explicar(self, sql, params):
+        """Retorna (líneas del plan, tablas recorridas completas)."""
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [fila[-1] for fila in cursor.fetchall()]
+                # "SCAN tabla" sin índice y "SCAN tabla USING INDEX" (recorre el índice entero)
+                completas = [linea for linea in plan if linea.startswith('SCAN ') and 'CONSTANT ROW' not in linea]
+            else:
+                # Sin seq scan como opción, el plan muestra si algún índice sirve (en tablas chicas
+                # PostgreSQL prefiere recorrerlas aunque el índice exista)
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql, params)
+                plan = [fila[0] for fila in cursor.fetchall()]
+                completas = [linea.strip() for linea in plan if 'Seq Scan on ' in linea]
+        return plan, completas
+
+    def indice_sin_orden(self, sql, params):
+        """
+        Sin estadísticas, SQLite estima que un rango devuelve un cuarto de la tabla y con
+        ORDER BY pk LIMIT prefiere recorrerla en orden de pk antes que ordenar. Si sin el
+        ORDER BY/LIMIT la consulta usa un índice, el índice existe y es una elección del
+        planificador (que cambia con ANALYZE), no una falta de índice.
+        """
+        if connection.vendor != 'sqlite':
+            return False
+        sin_orden = re.sub(r' ORDER BY [^()]+?( LIMIT \d+)?( OFFSET \d+)?$', '', sql)
+        if sin_orden == sql:
+            return False
+        return not self.explicar(sin_orden, params)[1]
+
+    def revisar(self, mostrar_planes):
+        persona = Persona.objects.order_by('pk').first()
+        headers = {}
+        if persona is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {get_token_for_user(persona)["access"]}'
+        client = Client()
+
+        escaneos = []
+        self.por_orden = 0
+        for prefijo, viewset, _ in router.registry:
+            url = f'/api/{prefijo}/'
+            client.get(url, **headers)  # calentamiento: autenticación y cachés fuera de la medición
+            for descripcion, parametros in self.consultas_de(prefijo, viewset):
+                codigo, consultas = self.capturar(client, url, parametros, headers)
+                if codigo != 200:
+                    self.stdout.write(self.style.WARNING(f'  {prefijo} {descripcion}: respuesta {codigo}'))
+                    continue
+                problemas, por_orden = [], False
+                for sql, params in consultas:
+                    plan, completas = self.explicar(sql, params)
+                    if mostrar_planes:
+                        self.stdout.write(f'    {sql[:160]}')
+                        for linea in plan:
+                            self.stdout.write(f'      {linea}')
+                    # Un listado sin filtros recorre la tabla a propósito (paginado o completo)
+                    if not completas or ' WHERE ' not in sql.upper():
+                        continue
+                    if self.indice_sin_orden(sql, params):
+                        por_orden = True
+                    else:
+                        problemas += completas
+                if problemas:
+                    estado = self.style.ERROR('SCAN')
+                elif por_orden:
+                    self.por_orden += 1
+                    estado = self.style.WARNING('pk  ')
+                else:
+                    estado = 'ok  '
+                self.stdout.write(f'  {estado} {prefijo} {descripcion} ({len(consultas)} consultas)')
+                escaneos += [f'  {prefijo} {descripcion}: {problema}' for problema in dict.fromkeys(problemas)]
+        return escaneos
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.outbox import despachar_pendientes, recuperar_huerfanos
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida (CorreoSaliente).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=None, help='Hilos de envío (por defecto OUTBOX["HILOS"])')
+        parser.add_argument('--lote', type=int, default=None, help='Correos tomados por ronda (por defecto OUTBOX["LOTE"])')
+        parser.add_argument('--continuo', action='store_true', help='Seguir despachando hasta que se interrumpa el proceso')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera entre rondas sin correos (con --continuo)')
+
+    def handle(self, *args, **options):
+        while True:
+            # En cada ronda: con --continuo, un despachador que muere deja huérfanos mientras este sigue corriendo
+            recuperados = recuperar_huerfanos()
+            if recuperados:
+                self.stdout.write(f'{recuperados} correos huérfanos vueltos a pendiente')
+            tomados, enviados = despachar_pendientes(options['hilos'], options['lote'])
+            if tomados:
+                self.stdout.write(f'Enviados {enviados} de {tomados} correos')
+            if not options['continuo']:
+                break
+            if not tomados:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,54 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.importacion import LOTE_IMPORTACION, ArchivoIlegible, formato_desde_nombre, importar_trabajos, leer_filas
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa trabajos publicados desde un archivo CSV o JSONL, en lotes. '
+        'Las filas rechazadas se informan como JSONL ({"fila", "errores"}) a medida que aparecen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo a importar ("-" para leer de la entrada estándar)')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], default=None,
+                            help='Por defecto según la extensión del archivo')
+        parser.add_argument('--lote', type=int, default=LOTE_IMPORTACION, help='Filas por lote')
+        parser.add_argument('--grupo', default=None, help='oid del grupo para las filas que no lo indiquen')
+        parser.add_argument('--reporte', default=None, help='Archivo donde escribir las filas rechazadas (por defecto stderr)')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        formato = options['formato'] or formato_desde_nombre(ruta)
+        reporte = open(options['reporte'], 'w', encoding='utf-8') if options['reporte'] else self.stderr
+
+        def al_rechazar(numero, errores):
+            reporte.write(json.dumps({'fila': numero, 'errores': errores}, ensure_ascii=False) + '\n')
+
+        try:
+            archivo = sys.stdin if ruta == '-' else open(ruta, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir {ruta}: {e}')
+        try:
+            resumen = importar_trabajos(
+                leer_filas(archivo, formato), lote=options['lote'], grupo=options['grupo'], al_rechazar=al_rechazar
+            )
+        except ArchivoIlegible as e:
+            r = e.resumen
+            raise CommandError(
+                f'No se pudo leer el archivo después de la fila {r["ultimaFila"]}: {e}. '
+                f'Ya quedaron importados {r["creados"]} trabajos ({r["rechazados"]} filas rechazadas de {r["filas"]}); '
+                f'las filas siguientes no se importaron.'
+            )
+        finally:
+            if archivo is not sys.stdin:
+                archivo.close()
+            if options['reporte']:
+                reporte.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{resumen["creados"]} trabajos creados, {resumen["rechazados"]} filas rechazadas de {resumen["filas"]}'
+        ))
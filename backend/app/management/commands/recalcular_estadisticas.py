@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app.estadisticas import recalcular_estadisticas
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye la tabla EstadisticaGrupo con GROUP BY. Sirve después de cargas o '
+        'cambios hechos por fuera del ORM, que no pasan por las señales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grupo', type=int, action='append', default=None,
+                            help='Recalcular solo este grupo (se puede repetir)')
+
+    def handle(self, *args, **options):
+        filas = recalcular_estadisticas(grupos=options['grupo'])
+        self.stdout.write(self.style.SUCCESS(f'{filas} filas de estadísticas recalculadas'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.busqueda import FUENTES_BUSQUEDA, backend_busqueda, reindexar
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de texto completo, en lotes por tipo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', action='append', choices=list(FUENTES_BUSQUEDA), default=None,
+                            help='Reindexar solo este tipo (se puede repetir)')
+        parser.add_argument('--lote', type=int, default=1000, help='Objetos leídos por consulta')
+
+    def handle(self, *args, **options):
+        if backend_busqueda() is None:
+            raise CommandError('La búsqueda no está disponible para este motor de base de datos.')
+        # Cada tipo se vacía y reconstruye en una transacción: las búsquedas no ven un índice a medias
+        totales = {}
+        for tipo in options['tipo'] or FUENTES_BUSQUEDA:
+            with transaction.atomic():
+                totales.update(reindexar([tipo], lote=options['lote'], salida=self.stdout.write))
+        self.stdout.write(self.style.SUCCESS(f'{sum(totales.values())} documentos indexados'))
@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.memoria_pdf import (
+    ERROR, archivo_trabajo, cache_local, crear_pool, estado_trabajo, guardar_resultado, id_trabajo, nombre_archivo,
+    pdf_setting, renderizar_memoria
+)
+from app.models import MemoriaAnual
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera en paralelo el PDF de todas las memorias de un año y los deja en la caché de PDF '
+        '(PDF["CACHE_ALIAS"]; los pedidos a /pdf/ responden al instante). Con --directorio también '
+        'escribe los archivos. Si esa caché es de memoria del proceso solo funciona con --directorio.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ano', type=int, required=True)
+        parser.add_argument('--procesos', type=int, default=None, help='Procesos del pool (por defecto PDF["PROCESOS"])')
+        parser.add_argument('--directorio', default=None, help='Carpeta donde escribir los PDF')
+        parser.add_argument('--forzar', action='store_true', help='Regenerar aunque el PDF de esa versión ya esté en caché')
+
+    def handle(self, *args, **options):
+        if cache_local():
+            # Lo que se guarde en una LocMemCache desaparece con este proceso
+            if not options['directorio']:
+                raise CommandError(
+                    f'La caché de PDF ({pdf_setting("CACHE_ALIAS")}) es de memoria del proceso: los PDF se '
+                    'perderían al terminar. Configurar PDF["CACHE_ALIAS"] con una caché compartida o usar --directorio.'
+                )
+            self.stderr.write('La caché de PDF es de memoria del proceso: solo se escriben los archivos.')
+        memorias = list(MemoriaAnual.objects.filter(ano=options['ano']).order_by('pk'))
+        if not memorias:
+            raise CommandError(f'No hay memorias del año {options["ano"]}.')
+        directorio = Path(options['directorio']) if options['directorio'] else None
+        if directorio:
+            directorio.mkdir(parents=True, exist_ok=True)
+
+        pendientes = [m for m in memorias if options['forzar'] or archivo_trabajo(id_trabajo(m)) is None]
+        self.stdout.write(
+            f'{len(memorias)} memorias del año {options["ano"]}, {len(memorias) - len(pendientes)} ya en caché'
+        )
+        inicio = time.perf_counter()
+        procesos = options['procesos'] or pdf_setting('PROCESOS')
+        errores = 0
+        pool = crear_pool(procesos)
+        try:
+            futuros = {pool.submit(renderizar_memoria, memoria.pk): memoria for memoria in pendientes}
+            for futuro in as_completed(futuros):
+                memoria = futuros[futuro]
+                guardar_resultado(id_trabajo(memoria), memoria.pk, futuro)
+                estado = estado_trabajo(id_trabajo(memoria))
+                if estado is None or estado['estado'] == ERROR:
+                    errores += 1
+                    self.stderr.write(f'memoria {memoria.pk}: {estado["error"] if estado else "sin resultado"}')
+                    continue
+                self.stdout.write(f'memoria {memoria.pk}: {estado["bytes"]} bytes')
+                if directorio:
+                    (directorio / nombre_archivo(memoria)).write_bytes(futuro.result())
+        finally:
+            pool.shutdown(wait=True)
+
+        if directorio:
+            # Las que ya estaban en caché no pasaron por el pool
+            for memoria in memorias:
+                if memoria not in pendientes:
+                    (directorio / nombre_archivo(memoria)).write_bytes(archivo_trabajo(id_trabajo(memoria)))
+
+        mensaje = f'{len(pendientes) - errores} PDF generados con {procesos} procesos en {time.perf_counter() - inicio:.1f} s'
+        if errores:
+            raise CommandError(f'{mensaje}; {errores} con error')
+        self.stdout.write(self.style.SUCCESS(mensaje))
@@ -0,0 +1,226 @@
+"""
+PDF imprimible de una memoria anual, generado en un pool de procesos.
+
+La vista no renderiza: encola un trabajo y responde con su id. El trabajo corre en
+un ProcessPoolExecutor (contexto spawn, cada proceso hace django.setup() y abre su
+propia conexión), lee la memoria con las mismas consultas que la exportación
+(app/exportacion.py) y arma el PDF con app/pdf.py.
+
+El id del trabajo es "<memoria>-<fechaModificacion en microsegundos>": dos pedidos
+sobre la misma versión comparten trabajo y PDF, y cualquier cambio en la memoria o
+en sus tablas intermedias (que actualizan fechaModificacion) genera un id nuevo.
+El estado y el PDF se guardan en la caché PDF['CACHE_ALIAS'] (por defecto 'pdf', en
+disco). Tiene que ser una caché compartida entre procesos: con LocMemCache el worker
+que atiende la consulta del estado no ve el trabajo que encoló otro, y lo que genera
+renderizar_memorias se pierde al terminar el comando.
+"""
+import datetime
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .exportacion import SECCIONES_EXPORTACION, datos_memoria, filas_seccion
+from .models import GrupoInvestigacion, MemoriaAnual
+from .pdf import DocumentoPDF
+
+PENDIENTE, LISTO, ERROR = 'pendiente', 'listo', 'error'
+
+# sección -> (título, [(columna de la exportación, encabezado, ancho relativo)])
+TABLAS_PDF = {
+    'integrantes': ('Integrantes', [
+        ('persona_apellido', 'Apellido', 2), ('persona_nombre', 'Nombre', 2), ('rol', 'Rol', 2),
+        ('dedicacion', 'Dedicación', 2), ('horasSemanales', 'Horas sem.', 1),
+    ]),
+    'actividades': ('Actividades', [
+        ('actividad_descripcion', 'Descripción', 4), ('actividad_fechaInicio', 'Inicio', 1.3),
+        ('actividad_fechaFin', 'Fin', 1.3), ('actividad_presupuesto', 'Presupuesto', 1.4), ('observaciones', 'Observaciones', 3),
+    ]),
+    'publicaciones': ('Publicaciones', [
+        ('trabajo_titulo', 'Título', 5), ('trabajo_issn', 'ISSN', 1.5), ('trabajo_editorial', 'Editorial', 2),
+        ('trabajo_estado', 'Estado', 1.3),
+    ]),
+    'patentes': ('Patentes', [
+        ('patente_numero', 'Número', 1.5), ('patente_descripcion', 'Descripción', 4), ('patente_tipo', 'Tipo', 1.5),
+        ('patente_fecha', 'Fecha', 1.3), ('patente_inventor', 'Inventor', 2),
+    ]),
+    'proyectos': ('Proyectos', [
+        ('proyecto_codigo', 'Código', 1.5), ('proyecto_nombre', 'Nombre', 3), ('proyecto_descripcion', 'Descripción', 3),
+        ('proyecto_tipo', 'Tipo', 1.5), ('proyecto_fechaInicio', 'Inicio', 1.3),
+    ]),
+}
+
+TEXTOS_ACTIVIDADES = [
+    ('objetivosGenerales', 'Objetivos generales'),
+    ('objetivosEspecificos', 'Objetivos específicos'),
+    ('actividadesRealizadas', 'Actividades realizadas'),
+    ('resultadosObtenidos', 'Resultados obtenidos'),
+]
+
+
+def pdf_setting(nombre):
+    defaults = {'PROCESOS': 2, 'CACHE_ALIAS': 'default', 'CACHE_TTL': 24 * 60 * 60, 'TIMEOUT_TRABAJO': 10 * 60}
+    return getattr(settings, 'PDF', {}).get(nombre, defaults[nombre])
+
+
+def cache_pdf():
+    return caches[pdf_setting('CACHE_ALIAS')]
+
+
+def cache_local():
+    """True si la caché de PDF vive solo en la memoria de este proceso."""
+    return isinstance(cache_pdf(), LocMemCache)
+
+
+def id_trabajo(memoria):
+    return f'{memoria.pk}-{int(memoria.fechaModificacion.timestamp() * 1_000_000)}'
+
+
+def clave_estado(trabajo):
+    return f'pdf:trabajo:{trabajo}'
+
+
+def clave_archivo(trabajo):
+    return f'pdf:archivo:{trabajo}'
+
+
+def nombre_archivo(memoria):
+    return f'memoria-{memoria.pk}-{memoria.ano}.pdf'
+
+
+def texto_fecha(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.strftime('%d/%m/%Y')
+    return valor
+
+
+def documento_memoria(memoria):
+    """Arma el PDF de la memoria: pestañas 1 a 3 y las tablas relacionadas."""
+    datos = datos_memoria(memoria)
+    grupo = GrupoInvestigacion.objects.filter(pk=memoria.GrupoInvestigacion_id).values_list('nombre', flat=True).first()
+    documento = DocumentoPDF(memoria.titulo or f'Memoria anual {memoria.ano}')
+    documento.titulo(memoria.titulo or f'Memoria anual {memoria.ano}')
+
+    documento.subtitulo('Información general')
+    documento.campo('Año', memoria.ano)
+    documento.campo('Grupo de investigación', grupo)
+    documento.campo('Período', f'{texto_fecha(memoria.fechaInicio) or "-"} a {texto_fecha(memoria.fechaFin) or "-"}')
+    documento.campo('Última modificación', timezone.localtime(memoria.fechaModificacion).strftime('%d/%m/%Y %H:%M'))
+
+    documento.subtitulo('Integrantes del grupo')
+    documento.campo('Director', datos['director_nombre'])
+    documento.campo('Vicedirector', datos['vicedirector_nombre'])
+
+    documento.subtitulo('Actividades desarrolladas')
+    for campo, etiqueta in TEXTOS_ACTIVIDADES:
+        documento.escribir(etiqueta, negrita=True, espacio_despues=1)
+        documento.parrafo(getattr(memoria, campo))
+
+    for seccion, (titulo, columnas) in TABLAS_PDF.items():
+        indices = [
+            [columna for columna, _ in SECCIONES_EXPORTACION[seccion][1]].index(nombre) for nombre, _, _ in columnas
+        ]
+        filas = ([texto_fecha(fila[i]) for i in indices] for fila in filas_seccion(memoria, seccion))
+        documento.subtitulo(titulo)
+        documento.tabla([encabezado for _, encabezado, _ in columnas], filas, [ancho for _, _, ancho in columnas])
+    return documento.generar()
+
+
+def renderizar_memoria(oid):
+    """Tarea del pool: retorna los bytes del PDF o None si la memoria ya no existe."""
+    close_old_connections()
+    try:
+        memoria = MemoriaAnual.objects.filter(pk=oid).first()
+        return documento_memoria(memoria) if memoria else None
+    finally:
+        close_old_connections()
+
+
+def crear_pool(procesos=None):
+    # spawn: el proceso hijo no hereda conexiones abiertas ni hilos del servidor
+    return ProcessPoolExecutor(
+        max_workers=procesos or pdf_setting('PROCESOS'), mp_context=get_context('spawn'), initializer=django.setup
+    )
+
+
+class PoolPDF:
+    """Pool del proceso actual, creado en el primer pedido."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def enviar(self, funcion, *args):
+        with self._lock:
+            if self._pool is None:
+                self._pool = crear_pool()
+            try:
+                return self._pool.submit(funcion, *args)
+            except BrokenProcessPool:
+                # Un proceso murió (p. ej. sin memoria): se reemplaza el pool entero
+                self._pool = crear_pool()
+                return self._pool.submit(funcion, *args)
+
+    def cerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+pool_pdf = PoolPDF()
+
+
+def guardar_resultado(trabajo, memoria, futuro):
+    """Guarda el PDF y el estado del trabajo cuando el pool termina."""
+    cache = cache_pdf()
+    error = futuro.exception()
+    contenido = None if error else futuro.result()
+    if contenido is None:
+        cache.set(clave_estado(trabajo), {
+            'trabajo': trabajo, 'memoria': memoria, 'estado': ERROR,
+            'error': str(error) if error else 'La memoria ya no existe.',
+        }, pdf_setting('TIMEOUT_TRABAJO'))
+        return
+    cache.set(clave_archivo(trabajo), contenido, pdf_setting('CACHE_TTL'))
+    cache.set(clave_estado(trabajo), {
+        'trabajo': trabajo, 'memoria': memoria, 'estado': LISTO, 'bytes': len(contenido),
+    }, pdf_setting('CACHE_TTL'))
+
+
+def estado_trabajo(trabajo):
+    return cache_pdf().get(clave_estado(trabajo))
+
+
+def archivo_trabajo(trabajo):
+    return cache_pdf().get(clave_archivo(trabajo))
+
+
+def solicitar_pdf(memoria):
+    """
+    Retorna el estado del trabajo de la versión actual de la memoria, encolándolo si
+    no hay uno pendiente ni un PDF ya generado.
+    """
+    cache = cache_pdf()
+    trabajo = id_trabajo(memoria)
+    estado = cache.get(clave_estado(trabajo))
+    if estado and (estado['estado'] == PENDIENTE or (estado['estado'] == LISTO and cache.has_key(clave_archivo(trabajo)))):
+        return estado
+    nuevo = {'trabajo': trabajo, 'memoria': memoria.pk, 'estado': PENDIENTE}
+    if estado is None:
+        if not cache.add(clave_estado(trabajo), nuevo, pdf_setting('TIMEOUT_TRABAJO')):
+            # Otro pedido encoló la misma versión entre el get y el add
+            return cache.get(clave_estado(trabajo)) or nuevo
+    else:
+        # Reintento después de un error o de que el PDF saliera de la caché
+        cache.set(clave_estado(trabajo), nuevo, pdf_setting('TIMEOUT_TRABAJO'))
+    futuro = pool_pdf.enviar(renderizar_memoria, memoria.pk)
+    futuro.add_done_callback(lambda f: guardar_resultado(trabajo, memoria.pk, f))
+    return nuevo
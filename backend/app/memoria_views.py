@@ -1,9 +1,20 @@
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Prefetch
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import (
     MemoriaAnual, IntegranteMemoria, ActividadMemoria, 
-    PublicacionMemoria, PatenteMemoria, ProyectoMemoria
+    PublicacionMemoria, PatenteMemoria, ProyectoMemoria,
+    Persona, Actividad, TrabajoPublicado, Patente, ProyectoInvestigacion
 )
+from .exportacion import FORMATOS_EXPORTACION, exportar_memoria
+from .memoria_pdf import LISTO, PENDIENTE, archivo_trabajo, estado_trabajo, nombre_archivo, solicitar_pdf
+from .metricas import MetricasMixin
+from .versiones import VersionesMixin, incrementar_versiones
+from .relaciones import RelacionesMixin, relaciones_de_serializer
 from .serializers import (
     MemoriaAnualSerializer, IntegranteMemoriaSerializer, 
     ActividadMemoriaSerializer, PublicacionMemoriaSerializer,
@@ -11,21 +22,239 @@ from .serializers import (
 )
 
 
-class MemoriaAnualViewSet(viewsets.ModelViewSet):
+# Relaciones que se cargan junto con la memoria:
+# clave del payload -> (tabla intermedia, campo FK, modelo referenciado, clave del id si el elemento es un objeto)
+RELACIONES_MEMORIA = {
+    'integrantes': (IntegranteMemoria, 'Persona_id', Persona, 'personaId'),
+    'actividades': (ActividadMemoria, 'Actividad_id', Actividad, 'actividadId'),
+    'publicaciones': (PublicacionMemoria, 'TrabajoPublicado_id', TrabajoPublicado, None),
+    'patentes': (PatenteMemoria, 'Patente_id', Patente, None),
+    'proyectos': (ProyectoMemoria, 'ProyectoInvestigacion_id', ProyectoInvestigacion, None),
+}
+
+
+# Campos propios de cada tabla intermedia (además de las dos FK) -> valor si el elemento no lo trae
+EXTRAS_RELACION = {
+    'integrantes': {'rol': '', 'dedicacion': '', 'horasSemanales': 0},
+    'actividades': {'observaciones': ''},
+}
+
+
+def extras_relacion(clave, elemento):
+    """
+    Campos propios de la tabla intermedia para un elemento del payload, validados con
+    los campos del modelo (tipo, largo máximo, validadores). Retorna (extras, errores).
+    """
+    modelo = RELACIONES_MEMORIA[clave][0]
+    extras, errores = {}, {}
+    for nombre, defecto in EXTRAS_RELACION.get(clave, {}).items():
+        try:
+            extras[nombre] = modelo._meta.get_field(nombre).clean(elemento.get(nombre, defecto), None)
+        except ValidationError as e:
+            errores[nombre] = e.messages
+    return extras, errores
+
+
+def preparar_relaciones_memoria(data):
+    """
+    Valida los ids de todas las relaciones de una memoria con una consulta IN por modelo.
+    Retorna (relaciones, errores); relaciones es {clave: [(id, extras), ...]}.
+    """
+    relaciones = {}
+    errores = {}
+    for clave, (_, _, modelo, campo_id) in RELACIONES_MEMORIA.items():
+        elementos = data.get(clave)
+        relaciones[clave] = filas = []
+        if elementos is None:
+            continue
+        if not isinstance(elementos, list):
+            errores[clave] = {'formato': 'Debe ser una lista.'}
+            continue
+        invalidos = []
+        duplicados = []
+        campos_invalidos = []
+        vistos = set()
+        for elemento in elementos:
+            if campo_id and not isinstance(elemento, dict):
+                invalidos.append(elemento)
+                continue
+            valor = elemento.get(campo_id) if campo_id else elemento
+            try:
+                oid = int(valor)
+            except (TypeError, ValueError):
+                invalidos.append(valor)
+                continue
+            if oid in vistos:
+                duplicados.append(oid)
+                continue
+            vistos.add(oid)
+            extras, errores_extras = extras_relacion(clave, elemento) if campo_id else ({}, {})
+            if errores_extras:
+                campos_invalidos.append({'id': oid, **errores_extras})
+            filas.append((oid, extras))
+
+        existentes = set(
+            modelo.objects.filter(pk__in=vistos).values_list('pk', flat=True)
+        ) if vistos else set()
+        inexistentes = sorted(vistos - existentes)
+
+        error = {}
+        if invalidos:
+            error['invalidos'] = invalidos
+        if duplicados:
+            error['duplicados'] = duplicados
+        if inexistentes:
+            error['inexistentes'] = inexistentes
+        if campos_invalidos:
+            error['campos'] = campos_invalidos
+        if error:
+            errores[clave] = error
+    return relaciones, errores
+
+
+def crear_relaciones_memoria(memoria, relaciones):
+    """
+    Inserta cada tabla intermedia con un único bulk_create (sin señales: la versión
+    de la tabla se sube acá).
+    """
+    for clave, filas in relaciones.items():
+        if not filas:
+            continue
+        modelo, campo_fk = RELACIONES_MEMORIA[clave][:2]
+        modelo.objects.bulk_create([
+            modelo(MemoriaAnual=memoria, **{campo_fk: oid}, **extras)
+            for oid, extras in filas
+        ])
+        incrementar_versiones(modelo)
+
+
+# Relaciones que /clonar/ copia si el pedido no indica `secciones`
+SECCIONES_CLONAR = ['integrantes', 'proyectos', 'actividades']
+
+# Años que acepta /clonar/ (las fechas corridas tienen que entrar en datetime.date)
+ANO_MINIMO, ANO_MAXIMO = 1900, 9999
+
+# Campos de la memoria que pasan al año siguiente; lo realizado y los resultados se escriben de nuevo
+CAMPOS_CLONAR = [
+    'director', 'vicedirector', 'objetivosGenerales', 'objetivosEspecificos', 'GrupoInvestigacion_id',
+]
+
+
+def correr_fecha(fecha, anos):
+    """La misma fecha `anos` años después; el 29 de febrero pasa al 28 si el año no es bisiesto."""
+    if fecha is None:
+        return None
+    try:
+        return fecha.replace(year=fecha.year + anos)
+    except ValueError:
+        return fecha.replace(year=fecha.year + anos, day=28)
+
+
+def fechas_corridas_validas(memoria, ano):
+    """False si alguna fecha de `memoria` corrida a `ano` cae fuera del rango de datetime.date."""
+    try:
+        for fecha in (memoria.fechaInicio, memoria.fechaFin):
+            correr_fecha(fecha, ano - memoria.ano)
+    except (ValueError, OverflowError):
+        return False
+    return True
+
+
+def copiar_relacion(modelo, origen, destino):
+    """
+    Copia las filas de la tabla intermedia `modelo` de la memoria `origen` a `destino`
+    con un INSERT ... SELECT (sin pasar las filas por Python ni disparar señales).
+    Retorna la cantidad de filas copiadas.
+    """
+    quote = connection.ops.quote_name
+    campo_memoria = modelo._meta.get_field('MemoriaAnual')
+    columnas = [
+        campo.column for campo in modelo._meta.concrete_fields
+        if not campo.primary_key and campo is not campo_memoria
+    ]
+    lista = ', '.join(quote(columna) for columna in columnas)
+    tabla, columna_memoria = quote(modelo._meta.db_table), quote(campo_memoria.column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {tabla} ({lista}, {columna_memoria}) '
+            f'SELECT {lista}, %s FROM {tabla} WHERE {columna_memoria} = %s',
+            [destino.pk, origen.pk]
+        )
+        return cursor.rowcount
+
+
+def clonar_memoria(memoria, ano, secciones, titulo=None):
+    """
+    Crea la memoria de `ano` a partir de `memoria`: director, vicedirector, objetivos y
+    grupo, las fechas corridas los años que correspondan y las tablas intermedias de
+    `secciones`. Se llama dentro de una transacción. Retorna (nueva, {seccion: filas}).
+    """
+    if titulo is None:
+        titulo = memoria.titulo.replace(str(memoria.ano), str(ano))
+    nueva = MemoriaAnual(
+        ano=ano,
+        titulo=titulo,
+        fechaInicio=correr_fecha(memoria.fechaInicio, ano - memoria.ano),
+        fechaFin=correr_fecha(memoria.fechaFin, ano - memoria.ano),
+        **{campo: getattr(memoria, campo) for campo in CAMPOS_CLONAR}
+    )
+    nueva.save()
+
+    copiadas = {}
+    for clave in secciones:
+        modelo = RELACIONES_MEMORIA[clave][0]
+        copiadas[clave] = copiar_relacion(modelo, memoria, nueva)
+        if copiadas[clave]:
+            incrementar_versiones(modelo)
+    return nueva, copiadas
+
+
+class MemoriaAnualViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = MemoriaAnual.objects.all()
     serializer_class = MemoriaAnualSerializer
+    filterset_fields = ['ano', 'GrupoInvestigacion']
+    # De a PAGE_SIZE: el frontend sigue X-Next-Cursor (ver app/pagination.py)
+    paginar = True
+
+    # Tabla intermedia -> serializer con que se muestra en /completa/
+    SERIALIZERS_COMPLETA = {
+        'integrantememoria_set': (IntegranteMemoria, IntegranteMemoriaSerializer),
+        'actividadmemoria_set': (ActividadMemoria, ActividadMemoriaSerializer),
+        'publicacionmemoria_set': (PublicacionMemoria, PublicacionMemoriaSerializer),
+        'patentememoria_set': (PatenteMemoria, PatenteMemoriaSerializer),
+        'proyectomemoria_set': (ProyectoMemoria, ProyectoMemoriaSerializer),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'completa':
+            # Una consulta por tabla intermedia, con las relaciones de su serializer en el mismo JOIN
+            queryset = queryset.prefetch_related(*[
+                Prefetch(nombre, queryset=modelo.objects.select_related(*relaciones_de_serializer(serializer)[0]))
+                for nombre, (modelo, serializer) in self.SERIALIZERS_COMPLETA.items()
+            ])
+        return queryset
     
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        memorias = page if page is not None else list(queryset)
+
+        # Nombres de director/vicedirector resueltos en lote para toda la página
+        context = self.get_serializer_context()
+        context['personas'] = MemoriaAnualSerializer.resolver_personas(memorias)
+        serializer = self.get_serializer(memorias, many=True, context=context)
+
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         """
         Crear una memoria anual con todas sus relaciones
         """
         data = request.data
         
-        print("=" * 80)
-        print("CREANDO MEMORIA ANUAL")
-        print("Datos recibidos:", data)
-        print("=" * 80)
-        
         # Crear la memoria anual
         memoria_data = {
             'ano': data.get('ano'),
@@ -43,125 +272,213 @@ class MemoriaAnualViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=memoria_data)
         serializer.is_valid(raise_exception=True)
-        memoria = serializer.save()
-        
-        print(f"Memoria creada con ID: {memoria.oidMemoriaAnual}")
-        
-        # Agregar integrantes
-        if 'integrantes' in data:
-            print(f"Procesando {len(data['integrantes'])} integrantes...")
-            for integrante in data['integrantes']:
-                print(f"  - Creando integrante: {integrante}")
-                IntegranteMemoria.objects.create(
-                    MemoriaAnual=memoria,
-                    Persona_id=integrante['personaId'],
-                    rol=integrante.get('rol', ''),
-                    dedicacion=integrante.get('dedicacion', ''),
-                    horasSemanales=integrante.get('horasSemanales', 0)
-                )
-        
-        # Agregar actividades
-        if 'actividades' in data:
-            print(f"Procesando {len(data['actividades'])} actividades...")
-            for actividad in data['actividades']:
-                print(f"  - Creando actividad: {actividad}")
-                ActividadMemoria.objects.create(
-                    MemoriaAnual=memoria,
-                    Actividad_id=actividad['actividadId'],
-                    observaciones=actividad.get('observaciones', '')
-                )
-        
-        # Agregar publicaciones
-        if 'publicaciones' in data:
-            print(f"Procesando {len(data['publicaciones'])} publicaciones...")
-            for pub_id in data['publicaciones']:
-                print(f"  - Creando publicacion ID: {pub_id}")
-                PublicacionMemoria.objects.create(
-                    MemoriaAnual=memoria,
-                    TrabajoPublicado_id=pub_id
-                )
-        
-        # Agregar patentes
-        if 'patentes' in data:
-            print(f"Procesando {len(data['patentes'])} patentes...")
-            for pat_id in data['patentes']:
-                print(f"  - Creando patente ID: {pat_id}")
-                PatenteMemoria.objects.create(
-                    MemoriaAnual=memoria,
-                    Patente_id=pat_id
-                )
-        
-        # Agregar proyectos
-        if 'proyectos' in data:
-            print(f"Procesando {len(data['proyectos'])} proyectos...")
-            for proy_id in data['proyectos']:
-                print(f"  - Creando proyecto ID: {proy_id}")
-                ProyectoMemoria.objects.create(
-                    MemoriaAnual=memoria,
-                    ProyectoInvestigacion_id=proy_id
-                )
-        
-        print("Memoria guardada exitosamente con todas las relaciones")
-        print("=" * 80)
+
+        # Validar todas las relaciones antes de escribir nada
+        relaciones, errores = preparar_relaciones_memoria(data)
+        if errores:
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+
+        # La memoria y sus relaciones se guardan juntas o no se guarda nada
+        with transaction.atomic():
+            memoria = serializer.save()
+            crear_relaciones_memoria(memoria, relaciones)
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=True, methods=['post'])
+    def clonar(self, request, pk=None):
+        """
+        Crea la memoria de otro año (por defecto el siguiente) a partir de esta.
+        `secciones` elige las tablas intermedias a copiar, de las claves de
+        RELACIONES_MEMORIA; por defecto integrantes, proyectos y actividades.
+        Responde 201 con la memoria nueva y las filas copiadas por sección.
+        """
+        memoria = self.get_object()
+        data = request.data
+        errores = {}
+
+        ano = data.get('ano', memoria.ano + 1)
+        if isinstance(ano, bool) or not str(ano).strip().lstrip('-').isdecimal():
+            errores['ano'] = 'Debe ser un número entero.'
+        else:
+            ano = int(ano)
+            if not ANO_MINIMO <= ano <= ANO_MAXIMO:
+                errores['ano'] = f'Debe estar entre {ANO_MINIMO} y {ANO_MAXIMO}.'
+            elif ano == memoria.ano:
+                errores['ano'] = 'Debe ser distinto del año de la memoria original.'
+            elif not fechas_corridas_validas(memoria, ano):
+                errores['ano'] = 'Las fechas de la memoria corridas a ese año quedan fuera de rango.'
+            elif MemoriaAnual.objects.filter(
+                ano=ano, GrupoInvestigacion_id=memoria.GrupoInvestigacion_id
+            ).exists():
+                errores['ano'] = f'El grupo ya tiene una memoria del año {ano}.'
+
+        secciones = data.get('secciones', SECCIONES_CLONAR)
+        if not isinstance(secciones, list) or any(seccion not in RELACIONES_MEMORIA for seccion in secciones):
+            errores['secciones'] = f'Debe ser una lista con valores de: {", ".join(RELACIONES_MEMORIA)}.'
+
+        titulo = data.get('titulo')
+        limite = MemoriaAnual._meta.get_field('titulo').max_length
+        if titulo is not None and (not isinstance(titulo, str) or len(titulo) > limite):
+            errores['titulo'] = f'Debe ser un texto de hasta {limite} caracteres.'
+
+        if errores:
+            return Response(errores, status=status.HTTP_400_BAD_REQUEST)
+
+        # La memoria nueva y todas sus filas se crean juntas o no se crea nada
+        with transaction.atomic():
+            nueva, copiadas = clonar_memoria(memoria, ano, list(dict.fromkeys(secciones)), titulo)
+
+        data = self.get_serializer(nueva).data
+        data['copiadas'] = copiadas
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+
+    @action(detail=True, methods=['get'])
+    def completa(self, request, pk=None):
+        """
+        Devuelve la memoria anual junto con integrantes, actividades, publicaciones,
+        patentes y proyectos en una sola respuesta.
+        """
+        memoria = self.get_object()
+        context = self.get_serializer_context()
+
+        data = MemoriaAnualSerializer(memoria, context=context).data
+        data['integrantes'] = IntegranteMemoriaSerializer(
+            memoria.integrantememoria_set.all(), many=True, context=context
+        ).data
+        data['actividades'] = ActividadMemoriaSerializer(
+            memoria.actividadmemoria_set.all(), many=True, context=context
+        ).data
+        data['publicaciones'] = PublicacionMemoriaSerializer(
+            memoria.publicacionmemoria_set.all(), many=True, context=context
+        ).data
+        data['patentes'] = PatenteMemoriaSerializer(
+            memoria.patentememoria_set.all(), many=True, context=context
+        ).data
+        data['proyectos'] = ProyectoMemoriaSerializer(
+            memoria.proyectomemoria_set.all(), many=True, context=context
+        ).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def exportar(self, request, pk=None):
+        """
+        Descarga la memoria con integrantes, actividades, publicaciones, patentes y
+        proyectos. `?formato=csv|xlsx|jsonl` (por defecto csv). El archivo se genera
+        como stream y queda cacheado hasta el próximo cambio en lo que exporta.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACION:
+            return Response(
+                {'formato': f'Debe ser uno de: {", ".join(FORMATOS_EXPORTACION)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        memoria = self.get_object()
+        content_type, extension = FORMATOS_EXPORTACION[formato]
+        response = StreamingHttpResponse(exportar_memoria(memoria, formato), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="memoria-{memoria.pk}-{memoria.ano}.{extension}"'
+        return response
+
+    def respuesta_trabajo_pdf(self, estado):
+        datos = dict(estado)
+        datos['estadoUrl'] = self.reverse_action('pdf-trabajo', kwargs={'trabajo': estado['trabajo']})
+        if estado['estado'] == LISTO:
+            datos['descargaUrl'] = self.reverse_action('pdf-descargar', kwargs={'trabajo': estado['trabajo']})
+        codigo = status.HTTP_202_ACCEPTED if estado['estado'] == PENDIENTE else status.HTTP_200_OK
+        return Response(datos, status=codigo)
+
+    def memoria_de_trabajo(self, trabajo):
+        # El trabajo empieza con el oid de la memoria: se verifica que el usuario pueda verla
+        self.kwargs['pk'] = trabajo.split('-')[0]
+        return self.get_object()
+
+    @action(detail=True, methods=['post'])
+    def pdf(self, request, pk=None):
+        """
+        Encola la generación del PDF de la memoria y devuelve el id del trabajo (202).
+        Si ya hay un PDF de la versión actual responde 200 con su URL de descarga.
+        """
+        return self.respuesta_trabajo_pdf(solicitar_pdf(self.get_object()))
+
+    @action(detail=False, methods=['get'], url_path=r'pdf/(?P<trabajo>\d+-\d+)')
+    def pdf_trabajo(self, request, trabajo=None):
+        """Estado de un trabajo de PDF: pendiente, listo o error."""
+        self.memoria_de_trabajo(trabajo)
+        estado = estado_trabajo(trabajo)
+        if estado is None:
+            return Response({'detail': 'Trabajo no encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        return self.respuesta_trabajo_pdf(estado)
+
+    @action(detail=False, methods=['get'], url_path=r'pdf/(?P<trabajo>\d+-\d+)/descargar')
+    def pdf_descargar(self, request, trabajo=None):
+        """Descarga el PDF de un trabajo terminado."""
+        memoria = self.memoria_de_trabajo(trabajo)
+        contenido = archivo_trabajo(trabajo)
+        if contenido is None:
+            estado = estado_trabajo(trabajo)
+            if estado and estado['estado'] == PENDIENTE:
+                return Response({'detail': 'El PDF todavía se está generando.'}, status=status.HTTP_409_CONFLICT)
+            return Response({'detail': 'PDF no encontrado; solicitarlo de nuevo.'}, status=status.HTTP_404_NOT_FOUND)
+        response = HttpResponse(contenido, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nombre_archivo(memoria)}"'
+        return response
+
 
-class IntegranteMemoriaViewSet(viewsets.ModelViewSet):
+class IntegranteMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = IntegranteMemoria.objects.all()
     serializer_class = IntegranteMemoriaSerializer
     
     def get_queryset(self):
-        queryset = IntegranteMemoria.objects.all()
+        queryset = super().get_queryset()
         memoria_id = self.request.query_params.get('MemoriaAnual', None)
         if memoria_id is not None:
             queryset = queryset.filter(MemoriaAnual_id=memoria_id)
         return queryset
 
 
-class ActividadMemoriaViewSet(viewsets.ModelViewSet):
+class ActividadMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = ActividadMemoria.objects.all()
     serializer_class = ActividadMemoriaSerializer
     
     def get_queryset(self):
-        queryset = ActividadMemoria.objects.all()
+        queryset = super().get_queryset()
         memoria_id = self.request.query_params.get('MemoriaAnual', None)
         if memoria_id is not None:
             queryset = queryset.filter(MemoriaAnual_id=memoria_id)
         return queryset
 
 
-class PublicacionMemoriaViewSet(viewsets.ModelViewSet):
+class PublicacionMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = PublicacionMemoria.objects.all()
     serializer_class = PublicacionMemoriaSerializer
     
     def get_queryset(self):
-        queryset = PublicacionMemoria.objects.all()
+        queryset = super().get_queryset()
         memoria_id = self.request.query_params.get('MemoriaAnual', None)
         if memoria_id is not None:
             queryset = queryset.filter(MemoriaAnual_id=memoria_id)
         return queryset
 
 
-class PatenteMemoriaViewSet(viewsets.ModelViewSet):
+class PatenteMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = PatenteMemoria.objects.all()
     serializer_class = PatenteMemoriaSerializer
     
     def get_queryset(self):
-        queryset = PatenteMemoria.objects.all()
+        queryset = super().get_queryset()
         memoria_id = self.request.query_params.get('MemoriaAnual', None)
         if memoria_id is not None:
             queryset = queryset.filter(MemoriaAnual_id=memoria_id)
         return queryset
 
 
-class ProyectoMemoriaViewSet(viewsets.ModelViewSet):
+class ProyectoMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = ProyectoMemoria.objects.all()
     serializer_class = ProyectoMemoriaSerializer
     
     def get_queryset(self):
-        queryset = ProyectoMemoria.objects.all()
+        queryset = super().get_queryset()
         memoria_id = self.request.query_params.get('MemoriaAnual', None)
         if memoria_id is not None:
             queryset = queryset.filter(MemoriaAnual_id=memoria_id)
@@ -0,0 +1,282 @@
+"""
+Instrumentación por request: cantidad de consultas SQL, tiempo en la base, tiempo de
+serialización y bytes de respuesta.
+
+`MetricasMiddleware` mide cada request, agrega los valores a histogramas por ruta y
+los informa en el header `Server-Timing`. `MetricasMixin` (para los ViewSets) separa
+el tiempo de serialización/render del tiempo de base. Los histogramas se exponen en
+formato de texto de Prometheus en `/api/internal/metricas/` (con el token de
+METRICAS['TOKEN'], o desde INTERNAL_IPS si METRICAS['CONFIAR_EN_RED']), y los requests más lentos
+que `METRICAS['SLOW_REQUEST_MS']` se registran con el SQL que ejecutaron. El mismo
+endpoint publica las métricas del pool de hashing de contraseñas (app/contrasenas.py).
+
+La medición del request en curso vive en un ContextVar y cada conexión lleva un
+execute_wrapper (instalado al conectarse, ver signals.py) que suma a esa medición.
+Así se cuentan también las consultas que corren en otros hilos del mismo request:
+vistas sync bajo ASGI y las consultas en paralelo de app/vistas_async.py.
+"""
+import hmac
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger('app.metricas')
+
+
+# Valores por defecto de settings.METRICAS
+METRICAS_DEFAULTS = {
+    'HABILITADO': True,
+    # Requests más lentos que esto (ms) se registran con su SQL; None desactiva el log
+    'SLOW_REQUEST_MS': 1000,
+    # Cantidad máxima de sentencias guardadas por request para el log de lentos
+    'SLOW_LOG_MAX_SQL': 50,
+    # Token (Authorization: Bearer) requerido para leer /api/internal/metricas/; vacío: cerrado
+    'TOKEN': '',
+    # Si es True, INTERNAL_IPS lee sin token. Detrás de un proxy en el mismo host todos los
+    # requests llegan con REMOTE_ADDR=127.0.0.1: activarlo solo si la red es de confianza
+    'CONFIAR_EN_RED': False,
+}
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BUCKETS_BYTES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def metricas_setting(nombre):
+    return getattr(settings, 'METRICAS', {}).get(nombre, METRICAS_DEFAULTS[nombre])
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus (buckets `le`, suma y cantidad)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0
+        self.cantidad = 0
+
+    def observar(self, valor):
+        self.suma += valor
+        self.cantidad += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+
+    def lineas(self, nombre, etiquetas):
+        for limite, conteo in zip(self.buckets, self.conteos):
+            yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {conteo}'
+        yield f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {self.cantidad}'
+        yield f'{nombre}_sum{{{etiquetas}}} {self.suma}'
+        yield f'{nombre}_count{{{etiquetas}}} {self.cantidad}'
+
+
+class RegistroMetricas:
+    """Histogramas por (ruta, método) del proceso actual."""
+
+    series = (
+        ('app_request_duration_seconds', 'Duración total del request', BUCKETS_SEGUNDOS, 'total'),
+        ('app_request_db_seconds', 'Tiempo en la base de datos', BUCKETS_SEGUNDOS, 'db'),
+        ('app_request_serialization_seconds', 'Tiempo de serialización y render', BUCKETS_SEGUNDOS, 'serializacion'),
+        ('app_request_queries', 'Consultas SQL por request', BUCKETS_CONSULTAS, 'consultas'),
+        ('app_response_bytes', 'Tamaño de la respuesta', BUCKETS_BYTES, 'bytes'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas = {}
+
+    def observar(self, ruta, metodo, medicion):
+        with self._lock:
+            histogramas = self._rutas.get((ruta, metodo))
+            if histogramas is None:
+                histogramas = {campo: Histograma(buckets) for _, _, buckets, campo in self.series}
+                self._rutas[(ruta, metodo)] = histogramas
+            for campo, histograma in histogramas.items():
+                histograma.observar(getattr(medicion, campo))
+
+    def prometheus(self):
+        lineas = []
+        with self._lock:
+            for nombre, ayuda, _, campo in self.series:
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for (ruta, metodo), histogramas in sorted(self._rutas.items()):
+                    etiquetas = f'route="{ruta}",method="{metodo}"'
+                    lineas.extend(histogramas[campo].lineas(nombre, etiquetas))
+        return '\n'.join(lineas) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._rutas.clear()
+
+
+registro_metricas = RegistroMetricas()
+
+
+class Medicion:
+    """Valores medidos durante un request; queda en `request.metricas`."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.total = 0
+        self.db = 0
+        self.consultas = 0
+        self.serializacion = 0
+        self.bytes = 0
+        self.sql = []
+        # Las consultas en paralelo de un mismo request suman desde varios hilos
+        self._lock = threading.Lock()
+
+    def registrar(self, duracion, sql):
+        with self._lock:
+            self.db += duracion
+            self.consultas += 1
+            if len(self.sql) < metricas_setting('SLOW_LOG_MAX_SQL'):
+                self.sql.append((duracion, sql))
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.consultas} queries", '
+            f'ser;dur={self.serializacion * 1000:.1f}, '
+            f'total;dur={self.total * 1000:.1f}'
+        )
+
+
+medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+def medir_sql(execute, sql, params, many, context):
+    """execute_wrapper de todas las conexiones: suma a la medición del request en curso."""
+    medicion = medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.registrar(time.perf_counter() - inicio, sql)
+
+
+def instalar_medicion(sender, connection, **kwargs):
+    # connection_created se repite en cada reconexión del mismo DatabaseWrapper
+    if medir_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_sql)
+
+
+def nombre_ruta(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_ruta'
+    return match.view_name or match.route
+
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        if not metricas_setting('HABILITADO'):
+            return self.get_response(request)
+
+        medicion = Medicion()
+        request.metricas = medicion
+        token = medicion_actual.set(medicion)
+        try:
+            response = self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+        return self.terminar(request, medicion, response)
+
+    async def acall(self, request):
+        if not metricas_setting('HABILITADO'):
+            return await self.get_response(request)
+
+        medicion = Medicion()
+        request.metricas = medicion
+        token = medicion_actual.set(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+        return self.terminar(request, medicion, response)
+
+    def terminar(self, request, medicion, response):
+        medicion.total = time.perf_counter() - medicion.inicio
+        if not response.streaming:
+            medicion.bytes = len(response.content)
+        response['Server-Timing'] = medicion.server_timing()
+
+        ruta = nombre_ruta(request)
+        registro_metricas.observar(ruta, request.method, medicion)
+        self.registrar_lento(request, ruta, medicion)
+        return response
+
+    def registrar_lento(self, request, ruta, medicion):
+        limite = metricas_setting('SLOW_REQUEST_MS')
+        if limite is None or medicion.total * 1000 < limite:
+            return
+        sentencias = '\n'.join(f'  [{d * 1000:.1f} ms] {sql}' for d, sql in medicion.sql)
+        logger.warning(
+            'Request lento %s %s (%s): %.1f ms, %d consultas, %.1f ms en base\n%s',
+            request.method, request.get_full_path(), ruta, medicion.total * 1000,
+            medicion.consultas, medicion.db * 1000, sentencias,
+        )
+
+
+class MetricasMixin:
+    """
+    Para ModelViewSets: mide el tiempo del handler que no es de base (armado de
+    `serializer.data`) más el render de la respuesta, y lo suma a `serializacion`.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        medicion = getattr(request, 'metricas', None)
+        if medicion is None or not hasattr(response, 'render'):
+            return response
+        handler = time.perf_counter() - self.metricas_inicio - (medicion.db - self.metricas_db_inicio)
+        inicio_render = time.perf_counter()
+        response.render()
+        medicion.serializacion += max(handler, 0) + time.perf_counter() - inicio_render
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        medicion = getattr(request, 'metricas', None)
+        self.metricas_inicio = time.perf_counter()
+        self.metricas_db_inicio = medicion.db if medicion is not None else 0
+        super().initial(request, *args, **kwargs)
+
+
+def acceso_metricas(request):
+    """
+    True si el request puede leer las métricas: con el token de METRICAS['TOKEN'] o, solo
+    con METRICAS['CONFIAR_EN_RED'], desde INTERNAL_IPS. Incluyen nombres de rutas y el
+    SQL de los requests lentos, así que sin token ni red de confianza no las lee nadie.
+    """
+    token = metricas_setting('TOKEN')
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return metricas_setting('CONFIAR_EN_RED') and request.META.get('REMOTE_ADDR') in getattr(settings, 'INTERNAL_IPS', [])
+
+
+def exportar_metricas(request):
+    """Histogramas en formato de texto de Prometheus (ver `acceso_metricas`)."""
+    if not acceso_metricas(request):
+        return HttpResponseForbidden()
+    # contrasenas.py usa Histograma de este módulo
+    from .contrasenas import metricas_hashing, pool_hashing
+
+    contenido = registro_metricas.prometheus() + metricas_hashing.prometheus(pool_hashing.pendientes)
+    return HttpResponse(contenido, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_personas(apps, schema_editor):
+    MemoriaAnual = apps.get_model('app', 'MemoriaAnual')
+    Persona = apps.get_model('app', 'Persona')
+    existentes = set(Persona.objects.values_list('oidpersona', flat=True))
+
+    def persona_id(valor):
+        try:
+            oid = int(valor)
+        except (TypeError, ValueError):
+            return None
+        return oid if oid in existentes else None
+
+    memorias = list(MemoriaAnual.objects.only('oidMemoriaAnual', 'director', 'vicedirector'))
+    for memoria in memorias:
+        memoria.directorPersona_id = persona_id(memoria.director)
+        memoria.vicedirectorPersona_id = persona_id(memoria.vicedirector)
+    MemoriaAnual.objects.bulk_update(memorias, ['directorPersona', 'vicedirectorPersona'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_integrantememoria_horassemanales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memoriaanual',
+            name='directorPersona',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='memorias_dirigidas', to='app.persona'),
+        ),
+        migrations.AddField(
+            model_name='memoriaanual',
+            name='vicedirectorPersona',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='memorias_vicedirigidas', to='app.persona'),
+        ),
+        migrations.RunPython(poblar_personas, migrations.RunPython.noop),
+    ]
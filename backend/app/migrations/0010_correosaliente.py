@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_memoriaanual_directorpersona_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('oidCorreoSaliente', models.AutoField(primary_key=True, serialize=False, unique=True)),
+                ('destinatario', models.EmailField(max_length=254)),
+                ('remitente', models.CharField(max_length=254)),
+                ('asunto', models.CharField(max_length=255)),
+                ('mensaje', models.TextField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('intentos', models.IntegerField(default=0)),
+                ('ultimoError', models.TextField(blank=True)),
+                ('proximoIntento', models.DateTimeField()),
+                ('fechaCreacion', models.DateTimeField(auto_now_add=True)),
+                ('fechaEnvio', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'proximoIntento'], name='correo_pendientes_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:10
+
+from itertools import islice
+
+from django.db import migrations
+
+# Copia congelada del esquema de app/busqueda.py al momento de esta migración: la
+# migración no debe cambiar si después cambia el código de la app.
+TABLA_BUSQUEDA = 'app_busqueda'
+
+CREAR_TABLA = {
+    'sqlite': [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_BUSQUEDA} USING fts5('
+        "tipo UNINDEXED, oid UNINDEXED, grupo UNINDEXED, titulo, contenido, "
+        "tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        f'CREATE TABLE IF NOT EXISTS {TABLA_BUSQUEDA} ('
+        'rowid bigint PRIMARY KEY, tipo varchar(32) NOT NULL, oid integer NOT NULL, grupo integer, '
+        "titulo text NOT NULL DEFAULT '', contenido text NOT NULL DEFAULT '', "
+        "documento tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('spanish', titulo), 'A') || "
+        "setweight(to_tsvector('spanish', contenido), 'B')) STORED)",
+        f'CREATE INDEX IF NOT EXISTS {TABLA_BUSQUEDA}_documento_idx ON {TABLA_BUSQUEDA} USING GIN (documento)',
+    ],
+}
+
+# La tabla está recién creada y vacía: alcanza con INSERT en los dos motores
+INSERTAR = (
+    f'INSERT INTO {TABLA_BUSQUEDA} (rowid, tipo, oid, grupo, titulo, contenido) VALUES (%s, %s, %s, %s, %s, %s)'
+)
+
+# tipo -> (modelo, código para el rowid, campo de título, campos de contenido)
+FUENTES_BUSQUEDA = {
+    'trabajos-publicados': ('TrabajoPublicado', 1, 'titulo', ['nombreRevista', 'editorial']),
+    'patentes': ('Patente', 2, 'descripcion', ['inventor']),
+    'proyectos': ('ProyectoInvestigacion', 3, 'nombre', ['descripcion']),
+    'documentacion': ('DocumentacionBiblioteca', 4, 'titulo', ['autor']),
+    'trabajos-presentados': ('TrabajoPresentado', 5, 'tituloTrabajo', []),
+}
+
+LOTE = 1000
+
+
+def documentos(apps, tipo):
+    modelo, codigo, campo_titulo, campos_contenido = FUENTES_BUSQUEDA[tipo]
+    Modelo = apps.get_model('app', modelo)
+    campos = ['pk', 'GrupoInvestigacion_id', campo_titulo] + campos_contenido
+    for valores in Modelo.objects.order_by('pk').values(*campos).iterator(chunk_size=LOTE):
+        contenido = ' '.join(str(valores[c]) for c in campos_contenido if valores[c])
+        yield (
+            valores['pk'] * 8 + codigo, tipo, valores['pk'], valores['GrupoInvestigacion_id'],
+            valores[campo_titulo] or '', contenido,
+        )
+
+
+def crear_indice(apps, schema_editor):
+    sentencias = CREAR_TABLA.get(schema_editor.connection.vendor)
+    if sentencias is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sentencia in sentencias:
+            cursor.execute(sentencia)
+        # Indexa lo existente con los modelos históricos, de a LOTE filas; después lo
+        # mantienen las señales (o `reindexar_busqueda` lo reconstruye)
+        for tipo in FUENTES_BUSQUEDA:
+            filas = documentos(apps, tipo)
+            while True:
+                bloque = list(islice(filas, LOTE))
+                if not bloque:
+                    break
+                cursor.executemany(INSERTAR, bloque)
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor not in CREAR_TABLA:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLA_BUSQUEDA}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_correosaliente'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_busqueda'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='erogacion',
+            name='egresos',
+            field=models.DecimalField(decimal_places=2, max_digits=15),
+        ),
+        migrations.AlterField(
+            model_name='erogacion',
+            name='ingresos',
+            field=models.DecimalField(decimal_places=2, max_digits=15),
+        ),
+    ]
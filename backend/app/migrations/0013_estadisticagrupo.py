@@ -0,0 +1,72 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:20
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# Copia congelada de app/estadisticas.py al momento de esta migración: la carga
+# inicial no debe cambiar si después cambian las métricas o los modelos.
+# metrica -> (modelo, camino al grupo, campos de la clave, campo a sumar)
+METRICAS_GRUPO = {
+    'trabajos_estado': ('TrabajoPublicado', 'GrupoInvestigacion_id', ['estado'], None),
+    'trabajos_tipo': ('TrabajoPublicado', 'GrupoInvestigacion_id', ['tipoTrabajoPublicado_id'], None),
+    'trabajos_presentados': ('TrabajoPresentado', 'GrupoInvestigacion_id', [], None),
+    'patentes': ('Patente', 'GrupoInvestigacion_id', [], None),
+    'registros': ('Registro', 'Patente__GrupoInvestigacion_id', [], None),
+    'proyectos_periodo': ('ProyectoInvestigacion', 'GrupoInvestigacion_id', ['fechaInicio', 'fechaFinalizacion'], None),
+    'equipamiento': ('EquipamientoInfraestructura', 'GrupoInvestigacion_id', [], 'montoInvertido'),
+    'transferencia': ('ActividadTransferencia', 'GrupoInvestigacion_id', [], 'monto'),
+    'personal_tipo': ('Persona', 'GrupoInvestigacion_id', ['tipoDePersonal_id'], None),
+}
+
+
+def clave_de(valores, campos):
+    return '|'.join('' if valores[c] is None else str(valores[c]) for c in campos)
+
+
+def monto(valor):
+    return Decimal(str(valor)).quantize(Decimal('0.01')) if valor is not None else Decimal(0)
+
+
+def poblar_estadisticas(apps, schema_editor):
+    # Carga inicial con GROUP BY sobre los modelos históricos; después la mantienen las señales
+    Estadistica = apps.get_model('app', 'EstadisticaGrupo')
+    filas = []
+    for metrica, (nombre_modelo, camino, claves, suma) in METRICAS_GRUPO.items():
+        queryset = apps.get_model('app', nombre_modelo).objects.exclude(**{f'{camino}__isnull': True})
+        agregados = {'cantidad': Count('pk')}
+        if suma:
+            agregados['total'] = Sum(suma)
+        for valores in queryset.values(camino, *claves).annotate(**agregados).order_by():
+            filas.append(Estadistica(
+                GrupoInvestigacion_id=valores[camino], metrica=metrica, clave=clave_de(valores, claves),
+                cantidad=valores['cantidad'], suma=monto(valores.get('total')),
+            ))
+    Estadistica.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_erogacion_decimal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaGrupo',
+            fields=[
+                ('oidEstadisticaGrupo', models.AutoField(primary_key=True, serialize=False, unique=True)),
+                ('metrica', models.CharField(max_length=40)),
+                ('clave', models.CharField(blank=True, default='', max_length=100)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('suma', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('GrupoInvestigacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='app.grupoinvestigacion')),
+            ],
+            options={
+                'unique_together': {('GrupoInvestigacion', 'metrica', 'clave')},
+            },
+        ),
+        migrations.RunPython(poblar_estadisticas, migrations.RunPython.noop),
+    ]
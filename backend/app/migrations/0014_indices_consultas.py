@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_estadisticagrupo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='informerendicioncuentas',
+            index=models.Index(fields=['periodoReportado', 'GrupoInvestigacion'], name='informe_periodo_grupo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='erogacion',
+            index=models.Index(fields=['tipoErogacion', 'InformeRendicionCuentas'], name='erogacion_tipo_informe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memoriaanual',
+            index=models.Index(fields=['ano', 'GrupoInvestigacion'], name='memoria_ano_grupo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='persona',
+            index=models.Index(fields=['GrupoInvestigacion', 'tipoDePersonal'], name='persona_grupo_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectoinvestigacion',
+            index=models.Index(fields=['fechaInicio', 'fechaFinalizacion'], name='proyecto_inicio_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectoinvestigacion',
+            index=models.Index(fields=['fechaFinalizacion'], name='proyecto_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectoinvestigacion',
+            index=models.Index(fields=['GrupoInvestigacion', 'fechaInicio'], name='proyecto_grupo_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajopublicado',
+            index=models.Index(fields=['estado', 'GrupoInvestigacion'], name='trabajo_estado_grupo_idx'),
+        ),
+    ]
@@ -66,17 +66,27 @@ class InformeRendicionCuentas(models.Model):
         GrupoInvestigacion, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['periodoReportado', 'GrupoInvestigacion'], name='informe_periodo_grupo_idx'),
+        ]
+
 
 class Erogacion(models.Model):
     oidErogacion = models.AutoField(primary_key=True, unique=True)
-    egresos = models.FloatField()
-    ingresos = models.FloatField()
+    egresos = models.DecimalField(max_digits=15, decimal_places=2)
+    ingresos = models.DecimalField(max_digits=15, decimal_places=2)
     numero = models.IntegerField()
     tipoErogacion = models.TextField()
     InformeRendicionCuentas = models.ForeignKey(
         InformeRendicionCuentas, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tipoErogacion', 'InformeRendicionCuentas'], name='erogacion_tipo_informe_idx'),
+        ]
+
 
 class ProyectoInvestigacion(models.Model):
     oidProyectoInvestigacion = models.AutoField(primary_key=True, unique=True)
@@ -93,6 +103,14 @@ class ProyectoInvestigacion(models.Model):
         GrupoInvestigacion, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            # Proyectos vigentes en un período: rango sobre inicio y fin
+            models.Index(fields=['fechaInicio', 'fechaFinalizacion'], name='proyecto_inicio_fin_idx'),
+            models.Index(fields=['fechaFinalizacion'], name='proyecto_fin_idx'),
+            models.Index(fields=['GrupoInvestigacion', 'fechaInicio'], name='proyecto_grupo_inicio_idx'),
+        ]
+
     def __str__(self):
         return self.nombre
 
@@ -135,6 +153,11 @@ class Persona(models.Model):
         GrupoInvestigacion, on_delete=models.CASCADE, null=True, blank=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['GrupoInvestigacion', 'tipoDePersonal'], name='persona_grupo_tipo_idx'),
+        ]
+
     @property
     def is_authenticated(self):
         return True
@@ -217,6 +240,12 @@ class TrabajoPublicado(models.Model):
         GrupoInvestigacion, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            # ?estado= solo y por grupo; el filtro solo por grupo usa el índice de la FK
+            models.Index(fields=['estado', 'GrupoInvestigacion'], name='trabajo_estado_grupo_idx'),
+        ]
+
 
 class ActividadTransferencia(models.Model):
     oidActividadTransferencia = models.AutoField(primary_key=True, unique=True)
@@ -285,6 +314,10 @@ class MemoriaAnual(models.Model):
     # Integrantes del Grupo (Tab 2)
     director = models.CharField(max_length=200, blank=True)
     vicedirector = models.CharField(max_length=200, blank=True)
+    # FK reales a Persona, sincronizadas desde director/vicedirector al guardar.
+    # Cuando todos los clientes escriban estas FK se podrán eliminar los campos de texto.
+    directorPersona = models.ForeignKey(Persona, on_delete=models.SET_NULL, related_name='memorias_dirigidas', null=True, blank=True)
+    vicedirectorPersona = models.ForeignKey(Persona, on_delete=models.SET_NULL, related_name='memorias_vicedirigidas', null=True, blank=True)
     
     # Actividades Desarrolladas (Tab 3)
     objetivosGenerales = models.TextField(blank=True)
@@ -301,11 +334,71 @@ class MemoriaAnual(models.Model):
     
     # Relación con el Grupo
     GrupoInvestigacion = models.ForeignKey(GrupoInvestigacion, on_delete=models.CASCADE, related_name='memorias', null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # ?ano= solo y por grupo; el filtro solo por grupo usa el índice de la FK
+            models.Index(fields=['ano', 'GrupoInvestigacion'], name='memoria_ano_grupo_idx'),
+        ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia.personas_cargadas = instancia.estado_personas()
+        return instancia
+
+    def estado_personas(self):
+        # Con campos diferidos (.only/.defer) no se lee nada: se sincroniza al guardar
+        if self.get_deferred_fields() & {'director', 'vicedirector', 'directorPersona', 'vicedirectorPersona'}:
+            return None
+        return (self.director, self.vicedirector, self.directorPersona_id, self.vicedirectorPersona_id)
+
+    def save(self, *args, **kwargs):
+        cargadas = getattr(self, 'personas_cargadas', None)
+        # Sin cambios en director/vicedirector desde que se leyó no hace falta buscar las personas
+        if cargadas is None or cargadas != self.estado_personas():
+            self.sincronizar_personas()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            campos = set(update_fields)
+            if 'director' in campos:
+                campos.add('directorPersona')
+            if 'vicedirector' in campos:
+                campos.add('vicedirectorPersona')
+            kwargs['update_fields'] = campos
+        super().save(*args, **kwargs)
+        self.personas_cargadas = self.estado_personas()
+
+    def sincronizar_personas(self):
+        """
+        Apunta directorPersona/vicedirectorPersona a la Persona cuyo id está en el texto,
+        o las deja en NULL si el texto no es un id válido.
+        """
+        ids = {
+            'directorPersona_id': persona_id_desde_texto(self.director),
+            'vicedirectorPersona_id': persona_id_desde_texto(self.vicedirector),
+        }
+        buscados = {oid for oid in ids.values() if oid is not None}
+        existentes = set(
+            Persona.objects.filter(oidpersona__in=buscados).values_list('oidpersona', flat=True)
+        ) if buscados else set()
+        for campo, oid in ids.items():
+            setattr(self, campo, oid if oid in existentes else None)
+
     def __str__(self):
         return f"Memoria Anual {self.ano} - {self.GrupoInvestigacion.nombre if self.GrupoInvestigacion else 'Sin grupo'}"
 
 
+def persona_id_desde_texto(valor):
+    """
+    Los campos director/vicedirector guardan el oidpersona como texto; retorna el id o None.
+    """
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
 class IntegranteMemoria(models.Model):
     oidIntegranteMemoria = models.AutoField(primary_key=True, unique=True)
     MemoriaAnual = models.ForeignKey(MemoriaAnual, on_delete=models.CASCADE)
@@ -368,3 +461,58 @@ class ProyectoMemoria(models.Model):
     
     def __str__(self):
         return f"{self.ProyectoInvestigacion.nombre} - {self.MemoriaAnual}"
+
+
+class CorreoSaliente(models.Model):
+    """Correo encolado para envío en segundo plano (ver app/outbox.py)."""
+    PENDIENTE = 'pendiente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    FALLIDO = 'fallido'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (ENVIANDO, 'Enviando'),
+        (ENVIADO, 'Enviado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    oidCorreoSaliente = models.AutoField(primary_key=True, unique=True)
+    destinatario = models.EmailField()
+    remitente = models.CharField(max_length=254)
+    asunto = models.CharField(max_length=255)
+    mensaje = models.TextField()
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.IntegerField(default=0)
+    ultimoError = models.TextField(blank=True)
+    proximoIntento = models.DateTimeField()
+    fechaCreacion = models.DateTimeField(auto_now_add=True)
+    fechaEnvio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'proximoIntento'], name='correo_pendientes_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} -> {self.destinatario} ({self.estado})"
+
+
+class EstadisticaGrupo(models.Model):
+    """
+    Contador materializado por grupo (ver app/estadisticas.py): cantidad y suma de
+    una métrica, opcionalmente desglosada por `clave` (estado, tipo, período...).
+    """
+    oidEstadisticaGrupo = models.AutoField(primary_key=True, unique=True)
+    GrupoInvestigacion = models.ForeignKey(
+        GrupoInvestigacion, on_delete=models.CASCADE, related_name='estadisticas'
+    )
+    metrica = models.CharField(max_length=40)
+    clave = models.CharField(max_length=100, blank=True, default='')
+    cantidad = models.IntegerField(default=0)
+    suma = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('GrupoInvestigacion', 'metrica', 'clave')
+
+    def __str__(self):
+        return f"{self.GrupoInvestigacion_id} {self.metrica}[{self.clave}] = {self.cantidad}"
@@ -0,0 +1,137 @@
+"""
+Bandeja de salida de correos.
+
+Las vistas solo encolan (`encolar_correo`, un INSERT) y responden enseguida; el envío
+real lo hace `despachar_pendientes`, que corre desde el comando `despachar_correos`
+con su propio pool de hilos. Cada hilo abre una sola conexión SMTP y la reutiliza
+para todo su lote. Los fallos se reintentan con backoff exponencial hasta
+`MAX_INTENTOS`, y el estado de cada envío queda registrado en `CorreoSaliente`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+
+# Valores por defecto de settings.OUTBOX
+OUTBOX_DEFAULTS = {
+    'HILOS': 4,
+    'LOTE': 100,
+    'MAX_INTENTOS': 5,
+    # Segundos de espera antes del primer reintento; se duplica en cada intento
+    'BACKOFF_BASE': 30,
+    # Minutos tras los cuales un correo en estado 'enviando' se considera huérfano
+    'HUERFANO_MINUTOS': 15,
+}
+
+
+def outbox_setting(nombre):
+    return getattr(settings, 'OUTBOX', {}).get(nombre, OUTBOX_DEFAULTS[nombre])
+
+
+def encolar_correo(destinatario, asunto, mensaje, remitente=None):
+    return CorreoSaliente.objects.create(
+        destinatario=destinatario,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        asunto=asunto,
+        mensaje=mensaje,
+        proximoIntento=timezone.now(),
+    )
+
+
+def recuperar_huerfanos():
+    """
+    Devuelve a 'pendiente' los correos que quedaron en 'enviando' porque el proceso
+    que los tomó terminó antes de registrar el resultado.
+    """
+    limite = timezone.now() - timedelta(minutes=outbox_setting('HUERFANO_MINUTOS'))
+    return CorreoSaliente.objects.filter(
+        estado=CorreoSaliente.ENVIANDO, proximoIntento__lte=limite
+    ).update(estado=CorreoSaliente.PENDIENTE)
+
+
+def reclamar_pendientes(limite):
+    """
+    Marca como 'enviando' hasta `limite` correos vencidos. El UPDATE condicionado por
+    estado garantiza que dos despachadores no tomen el mismo correo.
+    """
+    ahora = timezone.now()
+    candidatos = list(
+        CorreoSaliente.objects.filter(estado=CorreoSaliente.PENDIENTE, proximoIntento__lte=ahora)
+        .order_by('proximoIntento')
+        .values_list('pk', flat=True)[:limite]
+    )
+    reclamados = [
+        pk for pk in candidatos
+        if CorreoSaliente.objects.filter(pk=pk, estado=CorreoSaliente.PENDIENTE)
+        .update(estado=CorreoSaliente.ENVIANDO, proximoIntento=ahora)
+    ]
+    return list(CorreoSaliente.objects.filter(pk__in=reclamados).order_by('pk'))
+
+
+def registrar_fallo(correo, error):
+    correo.intentos += 1
+    correo.ultimoError = f"{type(error).__name__}: {error}"
+    if correo.intentos >= outbox_setting('MAX_INTENTOS'):
+        correo.estado = CorreoSaliente.FALLIDO
+    else:
+        correo.estado = CorreoSaliente.PENDIENTE
+        espera = outbox_setting('BACKOFF_BASE') * 2 ** (correo.intentos - 1)
+        correo.proximoIntento = timezone.now() + timedelta(seconds=espera)
+    correo.save(update_fields=['intentos', 'ultimoError', 'estado', 'proximoIntento'])
+
+
+def registrar_envio(correo):
+    correo.intentos += 1
+    correo.estado = CorreoSaliente.ENVIADO
+    correo.fechaEnvio = timezone.now()
+    correo.ultimoError = ''
+    correo.save(update_fields=['intentos', 'estado', 'fechaEnvio', 'ultimoError'])
+
+
+def enviar_lote(correos):
+    """
+    Envía una lista de correos por una única conexión SMTP. Si la conexión se corta,
+    se reabre para el resto del lote. Retorna la cantidad enviada.
+    """
+    enviados = 0
+    conexion = get_connection(fail_silently=False)
+    try:
+        for correo in correos:
+            try:
+                conexion.open()
+                EmailMessage(
+                    correo.asunto, correo.mensaje, correo.remitente, [correo.destinatario],
+                    connection=conexion,
+                ).send()
+            except Exception as e:
+                registrar_fallo(correo, e)
+                conexion.close()
+                continue
+            registrar_envio(correo)
+            enviados += 1
+    finally:
+        conexion.close()
+        # Cada hilo usa su propia conexión a la base; se libera al terminar
+        db_connection.close()
+    return enviados
+
+
+def despachar_pendientes(hilos=None, lote=None):
+    """
+    Toma un lote de correos vencidos y los reparte entre `hilos` hilos.
+    Retorna (tomados, enviados).
+    """
+    hilos = hilos or outbox_setting('HILOS')
+    correos = reclamar_pendientes(lote or outbox_setting('LOTE'))
+    if not correos:
+        return 0, 0
+    partes = [correos[i::hilos] for i in range(hilos) if correos[i::hilos]]
+    with ThreadPoolExecutor(max_workers=len(partes), thread_name_prefix='outbox') as pool:
+        enviados = sum(pool.map(enviar_lote, partes))
+    return len(correos), enviados
@@ -0,0 +1,172 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginación por defecto del proyecto: cursor (keyset) sobre la clave primaria `oid*`.
+
+    Cada página es un `WHERE pk > cursor ORDER BY pk LIMIT n`, así que su costo no
+    depende de la profundidad y nunca se ejecuta COUNT(*): no hace falta `?count=false`,
+    que solo tiene sentido en StandardResultsSetPagination. El cuerpo de la respuesta
+    sigue siendo una lista; los cursores viajan en los headers `Link` (rel="next"/"prev"),
+    `X-Next-Cursor` y `X-Previous-Cursor`.
+
+    Paginar es opcional, así ningún cliente que lee la lista entera recibe menos filas:
+    sin `?page_size=` solo se pagina en los viewsets con `paginar = True`, de a
+    PAGE_SIZE filas, cuyos listados el frontend recorre con `obtenerTodasLasPaginas`
+    (frontend/src/utils/paginacion.js). El resto responde la lista completa, sin cursores.
+
+    `paginate_queryset` es el de CursorPagination partido en dos (armar la consulta y
+    ubicar los cursores con las filas leídas) para que `apaginate_queryset` lea las
+    filas con el ORM async desde app/vistas_async.py.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        # Sin ?page_size (o con uno inválido) rige el del viewset: PAGE_SIZE o sin paginar
+        self.page_size = api_settings.PAGE_SIZE if getattr(getattr(self, 'vista', None), 'paginar', False) else None
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return (queryset.model._meta.pk.name,)
+
+    def consulta_pagina(self, queryset, request, view=None):
+        """Consulta de la página más una fila para saber si sigue otra; None sin paginación."""
+        self.request = request
+        self.vista = view
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, posicion = self.cursor if self.cursor is not None else (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if posicion is not None:
+            orden = self.ordering[0]
+            # (cursor invertido) XOR (orden descendente)
+            lookup = 'lt' if reverse != orden.startswith('-') else 'gt'
+            queryset = queryset.filter(**{f'{orden.lstrip("-")}__{lookup}': posicion})
+        return queryset[offset:offset + self.page_size + 1]
+
+    def ubicar_pagina(self, filas):
+        """Con las filas leídas, arma la página y las posiciones de los cursores."""
+        offset, reverse, posicion = self.cursor if self.cursor is not None else (0, False, None)
+        self.page = list(filas[:self.page_size])
+        siguiente = self._get_position_from_instance(filas[-1], self.ordering) if len(filas) > len(self.page) else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = posicion is not None or offset > 0
+            self.has_previous = siguiente is not None
+            self.next_position, self.previous_position = posicion, siguiente
+        else:
+            self.has_next = siguiente is not None
+            self.has_previous = posicion is not None or offset > 0
+            self.next_position, self.previous_position = siguiente, posicion
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        consulta = self.consulta_pagina(queryset, request, view)
+        if consulta is None:
+            return None
+        return self.ubicar_pagina(list(consulta))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        consulta = self.consulta_pagina(queryset, request, view)
+        if consulta is None:
+            return None
+        return self.ubicar_pagina([fila async for fila in consulta])
+
+    def get_paginated_response(self, data):
+        return Response(data, headers=self.get_pagination_headers())
+
+    def get_pagination_headers(self):
+        headers = {}
+        links = []
+        next_url = self.get_next_link()
+        previous_url = self.get_previous_link()
+        if next_url:
+            links.append(f'<{next_url}>; rel="next"')
+            headers['X-Next-Cursor'] = next_url
+        if previous_url:
+            links.append(f'<{previous_url}>; rel="prev"')
+            headers['X-Previous-Cursor'] = previous_url
+        if links:
+            headers['Link'] = ', '.join(links)
+        return headers
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Paginación por número de página para las vistas que la usan desde el frontend.
+    Con `?count=false` se omite el COUNT(*): se lee una fila extra para saber si hay
+    página siguiente y la respuesta trae `count: null`.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.sin_total = request.query_params.get(self.count_query_param, '').lower() in ('0', 'false', 'no')
+        if not self.sin_total:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        try:
+            self.numero = int(request.query_params.get(self.page_query_param, 1))
+            if self.numero < 1:
+                raise ValueError()
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message)
+
+        inicio = (self.numero - 1) * page_size
+        filas = list(queryset[inicio:inicio + page_size + 1])
+        self.hay_siguiente = len(filas) > page_size
+        return filas[:page_size]
+
+    def get_paginated_response(self, data):
+        if not self.sin_total:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': None,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.sin_total:
+            return super().get_next_link()
+        if not self.hay_siguiente:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.numero + 1)
+
+    def get_previous_link(self):
+        if not self.sin_total:
+            return super().get_previous_link()
+        if self.numero <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.numero == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.numero - 1)
@@ -0,0 +1,193 @@
+"""
+Generador de PDF mínimo para informes de texto y tablas.
+
+Usa las fuentes estándar Helvetica y Helvetica-Bold (no se incrustan) con
+WinAnsiEncoding, que cubre los acentos y la ñ. El ancho de cada texto se mide con
+las métricas de Helvetica para cortar líneas y celdas; los caracteres fuera de
+ASCII usan un ancho promedio. Cada página se comprime con FlateDecode.
+
+    documento = DocumentoPDF('Memoria 2024')
+    documento.titulo('Memoria anual 2024')
+    documento.parrafo('Texto...')
+    documento.tabla(['Nombre', 'Rol'], [['Ana', 'Directora']])
+    contenido = documento.generar()
+"""
+import zlib
+
+ANCHO_PAGINA, ALTO_PAGINA = 595, 842  # A4 en puntos
+MARGEN = 50
+ANCHO_UTIL = ANCHO_PAGINA - 2 * MARGEN
+MAX_LINEAS_CELDA = 12
+
+# Anchos de Helvetica (1/1000 del tamaño) para los caracteres 32..126
+ANCHOS_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+# Helvetica-Bold es en promedio algo más ancha
+FACTOR_NEGRITA = 1.08
+
+
+def ancho_texto(texto, tamano, negrita=False):
+    total = sum(ANCHOS_HELVETICA[ord(c) - 32] if 32 <= ord(c) <= 126 else 556 for c in texto)
+    return total * tamano / 1000 * (FACTOR_NEGRITA if negrita else 1)
+
+
+def cortar_lineas(texto, ancho, tamano, negrita=False):
+    """Corta el texto en líneas que entran en `ancho`, respetando los saltos de línea."""
+    lineas = []
+    for parrafo in str(texto).replace('\r\n', '\n').split('\n'):
+        actual = ''
+        for palabra in parrafo.split(' '):
+            candidata = f'{actual} {palabra}' if actual else palabra
+            if ancho_texto(candidata, tamano, negrita) <= ancho:
+                actual = candidata
+                continue
+            if actual:
+                lineas.append(actual)
+            # Palabras más largas que la línea se parten por caracteres
+            while ancho_texto(palabra, tamano, negrita) > ancho and len(palabra) > 1:
+                corte = len(palabra) - 1
+                while corte > 1 and ancho_texto(palabra[:corte], tamano, negrita) > ancho:
+                    corte -= 1
+                lineas.append(palabra[:corte])
+                palabra = palabra[corte:]
+            actual = palabra
+        lineas.append(actual)
+    return lineas
+
+
+def cadena_pdf(texto):
+    datos = texto.encode('cp1252', errors='replace')
+    return b'(' + datos.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class DocumentoPDF:
+    """Documento de páginas A4 que se van llenando de arriba hacia abajo."""
+
+    def __init__(self, titulo_documento=''):
+        self.titulo_documento = titulo_documento
+        self.paginas = []
+        self.nueva_pagina()
+
+    def nueva_pagina(self):
+        self.operaciones = []
+        self.paginas.append(self.operaciones)
+        self.y = ALTO_PAGINA - MARGEN
+
+    def reservar(self, alto):
+        if self.y - alto < MARGEN:
+            self.nueva_pagina()
+
+    def texto(self, x, y, texto, tamano=10, negrita=False):
+        fuente = b'/F2' if negrita else b'/F1'
+        self.operaciones.append(
+            b'BT ' + fuente + b' %d Tf %.2f %.2f Td ' % (tamano, x, y) + cadena_pdf(texto) + b' Tj ET'
+        )
+
+    def linea(self, x1, y1, x2, y2):
+        self.operaciones.append(b'%.2f %.2f m %.2f %.2f l S' % (x1, y1, x2, y2))
+
+    def escribir(self, texto, tamano=10, negrita=False, sangria=0, espacio_despues=4):
+        interlineado = tamano * 1.3
+        for linea in cortar_lineas(texto, ANCHO_UTIL - sangria, tamano, negrita):
+            self.reservar(interlineado)
+            self.y -= interlineado
+            self.texto(MARGEN + sangria, self.y, linea, tamano, negrita)
+        self.y -= espacio_despues
+
+    def titulo(self, texto):
+        self.escribir(texto, tamano=16, negrita=True, espacio_despues=8)
+
+    def subtitulo(self, texto):
+        self.reservar(40)
+        self.y -= 6
+        self.escribir(texto, tamano=12, negrita=True, espacio_despues=4)
+
+    def parrafo(self, texto):
+        self.escribir(texto or '-', tamano=10)
+
+    def campo(self, etiqueta, valor):
+        self.escribir(f'{etiqueta}: {valor if valor not in (None, "") else "-"}', tamano=10, espacio_despues=1)
+
+    def tabla(self, columnas, filas, anchos=None, tamano=8):
+        """Tabla con encabezado repetido en cada página; `anchos` son proporciones."""
+        anchos = anchos or [1] * len(columnas)
+        total = sum(anchos)
+        anchos = [ANCHO_UTIL * a / total for a in anchos]
+        interlineado = tamano * 1.25
+        relleno = 2
+
+        def fila(valores, negrita=False):
+            celdas = []
+            for valor, ancho in zip(valores, anchos):
+                texto = '' if valor is None else str(valor)
+                lineas = cortar_lineas(texto, ancho - 2 * relleno, tamano, negrita)
+                if len(lineas) > MAX_LINEAS_CELDA:
+                    lineas = lineas[:MAX_LINEAS_CELDA - 1] + [lineas[MAX_LINEAS_CELDA - 1] + ' ...']
+                celdas.append(lineas)
+            alto = max(len(lineas) for lineas in celdas) * interlineado + 2 * relleno
+            return celdas, alto, negrita
+
+        def dibujar(celdas, alto, negrita):
+            x = MARGEN
+            for lineas, ancho in zip(celdas, anchos):
+                y = self.y - relleno
+                for linea in lineas:
+                    y -= interlineado
+                    self.texto(x + relleno, y + 2, linea, tamano, negrita)
+                x += ancho
+            self.y -= alto
+            self.linea(MARGEN, self.y, MARGEN + ANCHO_UTIL, self.y)
+
+        encabezado = fila(columnas, negrita=True)
+        self.reservar(encabezado[1] + interlineado * 2)
+        dibujar(*encabezado)
+        for valores in filas:
+            actual = fila(valores)
+            if self.y - actual[1] < MARGEN:
+                self.nueva_pagina()
+                dibujar(*encabezado)
+            dibujar(*actual)
+        self.y -= 8
+
+    def generar(self):
+        """Retorna el PDF completo como bytes."""
+        total = len(self.paginas)
+        objetos = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,  # páginas: se completa cuando se conocen los ids
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+            b'<< /Title ' + cadena_pdf(self.titulo_documento) + b' /Producer (Sistema de Grupos de Investigacion) >>',
+        ]
+        ids_paginas = []
+        for numero, operaciones in enumerate(self.paginas, start=1):
+            pie = (
+                b'BT /F1 8 Tf %.2f %.2f Td ' % (MARGEN, MARGEN / 2)
+                + cadena_pdf(f'{self.titulo_documento} - Página {numero} de {total}') + b' Tj ET'
+            )
+            contenido = zlib.compress(b'0.5 w\n' + b'\n'.join(operaciones + [pie]))
+            objetos.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(contenido) + contenido + b'\nendstream')
+            id_contenido = len(objetos)
+            objetos.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] ' % (ANCHO_PAGINA, ALTO_PAGINA)
+                + b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>' % id_contenido
+            )
+            ids_paginas.append(len(objetos))
+        objetos[1] = b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % i for i in ids_paginas) + b'] /Count %d >>' % total
+
+        salida = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        posiciones = []
+        for numero, objeto in enumerate(objetos, start=1):
+            posiciones.append(len(salida))
+            salida += b'%d 0 obj\n' % numero + objeto + b'\nendobj\n'
+        inicio_xref = len(salida)
+        salida += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1)
+        salida += b''.join(b'%010d 00000 n \n' % posicion for posicion in posiciones)
+        salida += b'trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objetos) + 1, inicio_xref)
+        return bytes(salida)
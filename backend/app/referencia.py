@@ -0,0 +1,152 @@
+"""
+Caché de datos de referencia (tipos de personal, grupos, autores, tipos de trabajo y
+de registro).
+
+Las respuestas ya armadas se guardan en memoria del proceso junto con las versiones
+(app/versiones.py) de los modelos de los que dependen: cuando alguna sube, la entrada
+se reconstruye. No hay contadores propios; las mismas señales y llamadas explícitas a
+`incrementar_versiones` que invalidan los ETag de los ViewSets invalidan esta caché.
+
+Las vistas sueltas (`responder_referencia`) arman el ETag con esas versiones y
+responden 304 ante `If-None-Match`. En los ViewSets `ReferenciaCacheMixin` va con
+`VersionesMixin`, que se encarga del ETag y del 304.
+
+Una respuesta armada en la réplica (app/replicas.py) dentro de REPLICAS['STICKY_SEGUNDOS']
+del último cambio puede no incluirlo: se responde sin ETag y no se guarda, para que
+no quede fijada con la versión nueva.
+"""
+import threading
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TipoDePersonal, GrupoInvestigacion, Autor, TipoTrabajoPublicado, TipoDeRegistro
+from .replicas import lectura_en_replica
+from .versiones import calcular_etag, etag_coincide, leer_versiones, recien_cambiado
+
+
+# Modelos de los que depende cada clave de referencia
+MODELOS_POR_CLAVE = {
+    'opciones-perfil': [TipoDePersonal, GrupoInvestigacion],
+    'tipos-personal': [TipoDePersonal],
+    'autores': [Autor],
+    'tipo-trabajos-publicados': [TipoTrabajoPublicado],
+    'tipo-registros': [TipoDeRegistro],
+}
+
+MAX_VARIANTES = 256
+
+
+def cache_control():
+    max_age = getattr(settings, 'REFERENCIA_CACHE_MAX_AGE', 0)
+    return f'private, max-age={max_age}, must-revalidate'
+
+
+def cabeceras(headers, etag):
+    if etag is None:
+        # Armada en una réplica que puede venir atrasada: el cliente no la reutiliza
+        return {**headers, 'Cache-Control': 'private, no-cache'}
+    return {**headers, 'ETag': etag, 'Cache-Control': cache_control()}
+
+
+class CacheReferencia:
+
+    def __init__(self):
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def versiones(self, clave):
+        return leer_versiones(MODELOS_POR_CLAVE[clave])
+
+    def guardable(self, versiones):
+        """False si se arma en la réplica y algún modelo cambió hace menos de STICKY_SEGUNDOS."""
+        return not (lectura_en_replica() and recien_cambiado(versiones))
+
+    def obtener(self, clave, variante, construir):
+        """
+        Retorna (etag, data, headers) para la clave/variante, reconstruyendo con
+        `construir()` solo si cambió la versión de alguno de sus modelos. Si lo armado
+        no se puede guardar (ver `guardable`) el etag es None.
+        """
+        versiones = self.versiones(clave)
+        entrada = self.vigente(clave, variante, versiones)
+        if entrada is not None:
+            return entrada
+        return self.resultado(clave, variante, versiones, *construir())
+
+    async def aobtener(self, clave, variante, construir):
+        """Como `obtener`, con `construir` async (ver app/vistas_async.py)."""
+        versiones = await sync_to_async(self.versiones)(clave)
+        entrada = self.vigente(clave, variante, versiones)
+        if entrada is not None:
+            return entrada
+        return self.resultado(clave, variante, versiones, *(await construir()))
+
+    def resultado(self, clave, variante, versiones, data, headers):
+        if not self.guardable(versiones):
+            return None, data, headers
+        return self.guardar(clave, variante, versiones, data, headers)
+
+    def vigente(self, clave, variante, versiones):
+        version = self.numero(versiones)
+        with self._lock:
+            entrada = self._entradas.get((clave, variante))
+            if entrada is not None and entrada[0] == version:
+                self._entradas.move_to_end((clave, variante))
+                return entrada[1:]
+        return None
+
+    def numero(self, versiones):
+        return tuple(version for version, _ in versiones.values())
+
+    def guardar(self, clave, variante, versiones, data, headers):
+        etag = calcular_etag(versiones, f'referencia:{clave}:{variante}', '')
+        with self._lock:
+            self._entradas[(clave, variante)] = (self.numero(versiones), etag, data, headers)
+            self._entradas.move_to_end((clave, variante))
+            while len(self._entradas) > MAX_VARIANTES:
+                self._entradas.popitem(last=False)
+        return etag, data, headers
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+referencia_cache = CacheReferencia()
+
+
+def responder_referencia(request, clave, construir, variante=''):
+    """
+    Responde datos de referencia desde la caché, con 304 si el ETag del cliente coincide.
+    `construir` retorna (data, headers) y solo se llama cuando cambió la versión.
+    """
+    etag, data, headers = referencia_cache.obtener(clave, variante, construir)
+    headers = cabeceras(headers, etag)
+    if etag_coincide(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(data, status=status.HTTP_200_OK, headers=headers)
+
+
+class ReferenciaCacheMixin:
+    """
+    Sirve el listado de un ModelViewSet de referencia desde `referencia_cache`.
+    La variante incluye la URL completa para que cada filtro/página tenga su entrada.
+    Va con VersionesMixin: el ETag y el 304 los resuelve ese mixin antes de llegar acá.
+    """
+    referencia_clave = None
+
+    def list(self, request, *args, **kwargs):
+        def construir():
+            response = super(ReferenciaCacheMixin, self).list(request, *args, **kwargs)
+            headers = {k: v for k, v in response.items() if k.lower() != 'content-type'}
+            return response.data, headers
+
+        etag, data, headers = referencia_cache.obtener(
+            self.referencia_clave, request.build_absolute_uri(), construir
+        )
+        headers = {**headers, 'Cache-Control': cache_control() if etag else 'private, no-cache'}
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
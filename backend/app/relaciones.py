@@ -0,0 +1,76 @@
+"""
+select_related/prefetch_related derivados de los serializers.
+
+Cada serializer ya declara qué relaciones lee: los serializers anidados
+(`source='Autor'`), los campos con `source='Rel.campo'` y los RelatedField que
+muestran el objeto relacionado. `relaciones_de_serializer` recorre esos campos y
+arma el plan; las relaciones que se leen desde un SerializerMethodField se declaran
+en `Meta.select_related` / `Meta.prefetch_related`. `RelacionesMixin` aplica el plan
+en el get_queryset de los ViewSets, así cada página cuesta las mismas consultas
+sin importar cuántas filas tenga.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+
+def lee_objeto_relacionado(campo):
+    """True si el campo usa el objeto relacionado completo (no solo su pk)."""
+    if isinstance(campo, (serializers.BaseSerializer, ManyRelatedField)):
+        return True
+    return isinstance(campo, RelatedField) and not isinstance(campo, PrimaryKeyRelatedField)
+
+
+def recorrer_campos(serializer, modelo, prefijo, en_prefetch, select, prefetch):
+    for campo in serializer.fields.values():
+        if campo.write_only or campo.source == '*':
+            continue
+        partes = campo.source_attrs if lee_objeto_relacionado(campo) else campo.source_attrs[:-1]
+        actual, ruta, muchos = modelo, [], en_prefetch
+        for parte in partes:
+            try:
+                campo_modelo = actual._meta.get_field(parte)
+            except FieldDoesNotExist:
+                break
+            if not campo_modelo.is_relation:
+                break
+            ruta.append(parte)
+            muchos = muchos or campo_modelo.many_to_many or campo_modelo.one_to_many
+            actual = campo_modelo.related_model
+        if not ruta:
+            continue
+        camino = prefijo + '__'.join(ruta)
+        (prefetch if muchos else select).add(camino)
+
+        anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+        if isinstance(anidado, serializers.BaseSerializer) and len(ruta) == len(partes):
+            recorrer_campos(anidado, actual, camino + '__', muchos, select, prefetch)
+
+
+@lru_cache(maxsize=None)
+def relaciones_de_serializer(serializer_class):
+    """(select_related, prefetch_related) que necesita `serializer_class`, como tuplas ordenadas."""
+    meta = getattr(serializer_class, 'Meta', None)
+    modelo = getattr(meta, 'model', None)
+    select = set(getattr(meta, 'select_related', ()))
+    prefetch = set(getattr(meta, 'prefetch_related', ()))
+    if modelo is not None:
+        recorrer_campos(serializer_class(), modelo, '', False, select, prefetch)
+    # 'a' sobra si ya está 'a__b'
+    select = {r for r in select if not any(o.startswith(r + '__') for o in select)}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+class RelacionesMixin:
+    """Para ModelViewSets: aplica a get_queryset() el plan de relaciones del serializer."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = relaciones_de_serializer(self.get_serializer_class())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
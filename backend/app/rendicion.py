@@ -0,0 +1,129 @@
+"""
+Totales de rendición de cuentas calculados en la base.
+
+Una consulta agrupa las erogaciones por (informe, tipo) con la suma de ingresos y
+egresos en centavos enteros, así la aritmética es exacta en cualquier motor (SQLite
+guarda los decimales como REAL). Con el grupo y el período de cada informe (otra
+consulta, sobre pocas filas) se arman los subtotales por tipo, informe, período y
+grupo con Decimal.
+
+Los resultados se guardan en la caché de Django con la versión de su alcance: una
+versión por grupo y una global. Las señales de Erogacion e InformeRendicionCuentas
+incrementan la versión del grupo afectado y la global, así una respuesta cacheada
+vale hasta que cambie una erogación dentro de su alcance.
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import BigIntegerField, Count, F, Sum
+from django.db.models.functions import Cast, Round
+
+from .models import Erogacion, InformeRendicionCuentas
+
+CENTAVO = Decimal('0.01')
+CACHE_TTL_RENDICION = 60 * 60
+
+
+def clave_version(grupo=None):
+    return f'rendicion:version:{grupo if grupo is not None else "global"}'
+
+
+def version(grupo=None):
+    return cache.get(clave_version(grupo), 0)
+
+
+def invalidar_rendicion(grupos):
+    """Invalida los resúmenes de los grupos dados y los que no filtran por grupo."""
+    for clave in [clave_version()] + [clave_version(g) for g in set(grupos) if g is not None]:
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, None)
+
+
+def en_centavos(campo):
+    return Cast(Round(F(campo) * 100), BigIntegerField())
+
+
+def montos(ingresos, egresos, cantidad):
+    ingresos = (Decimal(ingresos) / 100).quantize(CENTAVO)
+    egresos = (Decimal(egresos) / 100).quantize(CENTAVO)
+    return {
+        'ingresos': str(ingresos),
+        'egresos': str(egresos),
+        'balance': str(ingresos - egresos),
+        'cantidad': cantidad,
+    }
+
+
+def subtotales(filas, claves):
+    """Agrupa filas (ya en centavos) por las claves dadas, conservando el orden."""
+    acumulado = {}
+    for fila in filas:
+        clave = tuple(fila[c] for c in claves)
+        ingresos, egresos, cantidad = acumulado.get(clave, (0, 0, 0))
+        acumulado[clave] = (ingresos + fila['ingresos'], egresos + fila['egresos'], cantidad + fila['cantidad'])
+    return [
+        {**dict(zip(claves, clave)), **montos(*valores)}
+        for clave, valores in sorted(acumulado.items(), key=lambda item: [str(v) for v in item[0]])
+    ]
+
+
+def calcular_resumen(grupo=None, periodo=None, informe=None):
+    informes = InformeRendicionCuentas.objects.all()
+    if grupo is not None:
+        informes = informes.filter(GrupoInvestigacion_id=grupo)
+    if periodo is not None:
+        informes = informes.filter(periodoReportado=periodo)
+    if informe is not None:
+        informes = informes.filter(pk=informe)
+    # Los informes son pocos: se leen aparte y el GROUP BY recorre solo la tabla de erogaciones
+    datos_informes = {
+        oid: (grupo_id, periodo_reportado)
+        for oid, grupo_id, periodo_reportado in informes.values_list('pk', 'GrupoInvestigacion_id', 'periodoReportado')
+    }
+    erogaciones = Erogacion.objects.all()
+    if grupo is not None or periodo is not None or informe is not None:
+        erogaciones = erogaciones.filter(InformeRendicionCuentas_id__in=list(datos_informes))
+
+    filas = [
+        {
+            # Un informe creado entre las dos consultas queda sin grupo/período hasta la próxima versión
+            'GrupoInvestigacion': datos_informes.get(fila['InformeRendicionCuentas_id'], (None, None))[0],
+            'periodoReportado': datos_informes.get(fila['InformeRendicionCuentas_id'], (None, None))[1],
+            'informe': fila['InformeRendicionCuentas_id'],
+            'tipoErogacion': fila['tipoErogacion'],
+            'ingresos': fila['ingresos'] or 0,
+            'egresos': fila['egresos'] or 0,
+            'cantidad': fila['cantidad'],
+        }
+        for fila in erogaciones.values('InformeRendicionCuentas_id', 'tipoErogacion').annotate(
+            ingresos=Sum(en_centavos('ingresos')),
+            egresos=Sum(en_centavos('egresos')),
+            cantidad=Count('pk'),
+        ).order_by()
+    ]
+    return {
+        'totales': subtotales(filas, [])[0] if filas else montos(0, 0, 0),
+        'porTipo': subtotales(filas, ['tipoErogacion']),
+        'porInforme': subtotales(filas, ['informe', 'periodoReportado', 'GrupoInvestigacion']),
+        'porPeriodo': subtotales(filas, ['periodoReportado']),
+        'porGrupo': subtotales(filas, ['GrupoInvestigacion']),
+    }
+
+
+def resumen_rendicion(grupo=None, periodo=None, informe=None):
+    """Resumen cacheado; se recalcula cuando cambia la versión de su alcance."""
+    if grupo is None and informe is not None:
+        grupo = InformeRendicionCuentas.objects.filter(pk=informe).values_list('GrupoInvestigacion_id', flat=True).first()
+        if grupo is None:
+            return calcular_resumen(informe=informe)
+    filtros = json.dumps([grupo, periodo, informe])
+    clave = 'rendicion:resumen:%s:%s' % (hashlib.md5(filtros.encode()).hexdigest(), version(grupo))
+    resumen = cache.get(clave)
+    if resumen is None:
+        resumen = calcular_resumen(grupo, periodo, informe)
+        cache.set(clave, resumen, CACHE_TTL_RENDICION)
+    return resumen
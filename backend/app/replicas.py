@@ -0,0 +1,165 @@
+"""
+Lecturas en la réplica, escrituras en la primaria.
+
+`ReplicasMiddleware` abre un estado por request (un ContextVar: sirve igual con hilos
+que con ASGI, y sync_to_async lo copia a los hilos que corren las consultas) y
+`RouterReplicas` lo consulta. Los requests GET, HEAD y OPTIONS leen de
+REPLICAS['ALIAS']; todo lo demás va a 'default':
+
+- las escrituras, y cualquier lectura del mismo request posterior a una escritura;
+- las lecturas dentro de un transaction.atomic() abierto en la primaria;
+- los requests con otros métodos;
+- lo que corre fuera de un request (comandos, shell, procesos del pool de PDF).
+
+Después de escribir, la Persona autenticada sigue leyendo de la primaria durante
+REPLICAS['STICKY_SEGUNDOS'], para que vea lo que acaba de guardar aunque la réplica
+venga atrasada. La marca vive en la caché REPLICAS['CACHE_ALIAS'], que con varios
+workers tiene que ser compartida. La Persona se informa desde
+PersonaJWTAuthentication antes de buscarla en la base.
+
+Sin REPLICAS['ALIAS'] el router no opina y todo queda en 'default'.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+METODOS_SEGUROS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+REPLICAS_DEFAULTS = {
+    'ALIAS': '',
+    'STICKY_SEGUNDOS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+
+def replicas_setting(nombre):
+    return getattr(settings, 'REPLICAS', {}).get(nombre, REPLICAS_DEFAULTS[nombre])
+
+
+class EstadoRequest:
+    """Lo que el router necesita saber del request en curso."""
+
+    def __init__(self, lectura):
+        # True mientras el request pueda leer de la réplica
+        self.lectura = lectura
+        self.escribio = False
+        self.persona = None
+
+
+estado_request = ContextVar('estado_replicas', default=None)
+
+
+def clave_sticky(oid):
+    return f'replicas:sticky:{oid}'
+
+
+def cache_replicas():
+    return caches[replicas_setting('CACHE_ALIAS')]
+
+
+def marcar_persona(oid):
+    """La autenticación informa la Persona del request; si escribió hace poco, lee de la primaria."""
+    estado = estado_request.get()
+    if estado is None or not replicas_setting('ALIAS'):
+        return
+    estado.persona = oid
+    if estado.escribio:
+        cache_replicas().set(clave_sticky(oid), True, replicas_setting('STICKY_SEGUNDOS'))
+    elif estado.lectura and cache_replicas().get(clave_sticky(oid)):
+        estado.lectura = False
+
+
+def lectura_en_replica():
+    """True si las lecturas del request en curso van a la réplica."""
+    estado = estado_request.get()
+    return bool(replicas_setting('ALIAS')) and estado is not None and estado.lectura
+
+
+def registrar_escritura(estado):
+    if estado.escribio:
+        return
+    # Primero la marca: si la caché es de base, su set vuelve a pasar por el router
+    estado.escribio = True
+    estado.lectura = False
+    if estado.persona is not None:
+        cache_replicas().set(clave_sticky(estado.persona), True, replicas_setting('STICKY_SEGUNDOS'))
+
+
+class RouterReplicas:
+
+    def db_for_read(self, model, **hints):
+        alias = replicas_setting('ALIAS')
+        if not alias:
+            return None
+        estado = estado_request.get()
+        if estado is None or not estado.lectura or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if not replicas_setting('ALIAS'):
+            return None
+        estado = estado_request.get()
+        if estado is not None:
+            registrar_escritura(estado)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Son la misma base: un objeto leído de la réplica se puede asignar a uno de la primaria
+        alias = replicas_setting('ALIAS')
+        if alias and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+
+def con_estado(estado, partes):
+    """Itera una respuesta streaming dentro del estado del request que la generó."""
+    partes = iter(partes)
+    while True:
+        token = estado_request.set(estado)
+        try:
+            parte = next(partes)
+        except StopIteration:
+            return
+        finally:
+            estado_request.reset(token)
+        yield parte
+
+
+class ReplicasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        estado = EstadoRequest(lectura=request.method in METODOS_SEGUROS)
+        token = estado_request.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            estado_request.reset(token)
+        return self.terminar(estado, response)
+
+    async def acall(self, request):
+        estado = EstadoRequest(lectura=request.method in METODOS_SEGUROS)
+        token = estado_request.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            estado_request.reset(token)
+        return self.terminar(estado, response)
+
+    def terminar(self, estado, response):
+        if response.streaming and not response.is_async:
+            # Las exportaciones consultan mientras se envía el cuerpo, después de este return
+            response.streaming_content = con_estado(estado, response.streaming_content)
+        return response
@@ -7,8 +7,9 @@ from .models import (
     ActividadTransferencia, ParteExterna, EquipamientoInfraestructura,
     TrabajoPresentado, ActividadXPersona, Patente, TipoDeRegistro, Registro,
     MemoriaAnual, IntegranteMemoria, ActividadMemoria, PublicacionMemoria, 
-    PatenteMemoria, ProyectoMemoria
+    PatenteMemoria, ProyectoMemoria, persona_id_desde_texto
 )
+from .validacion import UnicidadMixin
 
 
 class LoginSerializer(serializers.Serializer):
@@ -41,28 +42,12 @@ class GrupoInvestigacionSerializer(serializers.ModelSerializer):
         ]
 
 
-class PatenteSerializer(serializers.ModelSerializer):
+class PatenteSerializer(UnicidadMixin, serializers.ModelSerializer):
+    # El mensaje de número duplicado sale de error_messages del modelo (ver validacion.py)
     class Meta:
         model = Patente
         fields = '__all__'
         read_only_fields = ['id']
-        extra_kwargs = {
-            'numero': {
-                'error_messages': {
-                    'unique': 'Ya existe una patente con este número.'
-                }
-            }
-        }
-    
-    def validate(self, data):
-        # Validación personalizada para mensajes en español
-        if self.instance:  # Update
-            if 'numero' in data and Patente.objects.filter(numero=data['numero']).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError({'numero': 'Ya existe una patente con este número.'})
-        else:  # Create
-            if 'numero' in data and Patente.objects.filter(numero=data['numero']).exists():
-                raise serializers.ValidationError({'numero': 'Ya existe una patente con este número.'})
-        return data
 
 
 class TipoDeRegistroSerializer(serializers.ModelSerializer):
@@ -114,6 +99,11 @@ class ErogacionSerializer(serializers.ModelSerializer):
             'tipoErogacion',
             'InformeRendicionCuentas'
         ]
+        # DecimalField exacto en la base, pero en el JSON siguen siendo números como con FloatField
+        extra_kwargs = {
+            'egresos': {'coerce_to_string': False},
+            'ingresos': {'coerce_to_string': False},
+        }
 
 
 class ProyectoInvestigacionSerializer(serializers.ModelSerializer):
@@ -245,7 +235,7 @@ class DocumentacionBibliotecaSerializer(serializers.ModelSerializer):
         ]
 
 
-class TrabajoPublicadoSerializer(serializers.ModelSerializer):
+class TrabajoPublicadoSerializer(UnicidadMixin, serializers.ModelSerializer):
     # Campos anidados para lectura
     Autor_detalle = AutorSerializer(source='Autor', read_only=True)
     tipoTrabajoPublicado_detalle = TipoTrabajoPublicadoSerializer(source='tipoTrabajoPublicado', read_only=True)
@@ -256,32 +246,6 @@ class TrabajoPublicadoSerializer(serializers.ModelSerializer):
         fields = '__all__'
         # Solo el oid es read-only, estado puede ser actualizado
         read_only_fields = ['oidTrabajoPublicado']
-        extra_kwargs = {
-            'titulo': {
-                'error_messages': {
-                    'unique': 'Ya existe un trabajo publicado con este título.'
-                }
-            },
-            'ISSN': {
-                'error_messages': {
-                    'unique': 'Ya existe un trabajo publicado con este ISSN.'
-                }
-            }
-        }
-    
-    def validate(self, data):
-        # Validación personalizada para mensajes en español
-        if self.instance:  # Update
-            if 'titulo' in data and TrabajoPublicado.objects.filter(titulo=data['titulo']).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError({'titulo': 'Ya existe un trabajo publicado con este título.'})
-            if 'ISSN' in data and TrabajoPublicado.objects.filter(ISSN=data['ISSN']).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError({'ISSN': 'Ya existe un trabajo publicado con este ISSN.'})
-        else:  # Create
-            if 'titulo' in data and TrabajoPublicado.objects.filter(titulo=data['titulo']).exists():
-                raise serializers.ValidationError({'titulo': 'Ya existe un trabajo publicado con este título.'})
-            if 'ISSN' in data and TrabajoPublicado.objects.filter(ISSN=data['ISSN']).exists():
-                raise serializers.ValidationError({'ISSN': 'Ya existe un trabajo publicado con este ISSN.'})
-        return data
 
 
 class ActividadTransferenciaSerializer(serializers.ModelSerializer):
@@ -323,28 +287,11 @@ class EquipamientoInfraestructuraSerializer(serializers.ModelSerializer):
         ]
 
 
-class TrabajoPresentadoSerializer(serializers.ModelSerializer):
+class TrabajoPresentadoSerializer(UnicidadMixin, serializers.ModelSerializer):
     class Meta:
         model = TrabajoPresentado
         fields = '__all__'
         read_only_fields = ['id']
-        extra_kwargs = {
-            'tituloTrabajo': {
-                'error_messages': {
-                    'unique': 'Ya existe un trabajo presentado con este título.'
-                }
-            }
-        }
-    
-    def validate(self, data):
-        # Validación personalizada para mensajes en español
-        if self.instance:  # Update
-            if 'tituloTrabajo' in data and TrabajoPresentado.objects.filter(tituloTrabajo=data['tituloTrabajo']).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError({'tituloTrabajo': 'Ya existe un trabajo presentado con este título.'})
-        else:  # Create
-            if 'tituloTrabajo' in data and TrabajoPresentado.objects.filter(tituloTrabajo=data['tituloTrabajo']).exists():
-                raise serializers.ValidationError({'tituloTrabajo': 'Ya existe un trabajo presentado con este título.'})
-        return data
 
 
 class ActividadXPersonaSerializer(serializers.ModelSerializer):
@@ -470,23 +417,45 @@ class MemoriaAnualSerializer(serializers.ModelSerializer):
             'GrupoInvestigacion'
         ]
         read_only_fields = ['oidMemoriaAnual', 'fechaCreacion', 'fechaModificacion']
+        # Leídas por get_director_nombre/get_vicedirector_nombre (ver relaciones.py)
+        select_related = ['directorPersona', 'vicedirectorPersona']
     
+    @staticmethod
+    def resolver_personas(memorias):
+        """
+        Resuelve con una sola consulta las personas de director/vicedirector que no
+        vienen ya cargadas por la FK. El resultado se pasa como context['personas'].
+        """
+        ids = set()
+        for memoria in memorias:
+            if memoria.director and memoria.directorPersona_id is None:
+                ids.add(persona_id_desde_texto(memoria.director))
+            if memoria.vicedirector and memoria.vicedirectorPersona_id is None:
+                ids.add(persona_id_desde_texto(memoria.vicedirector))
+        ids.discard(None)
+        if not ids:
+            return {}
+        return {p.oidpersona: p for p in Persona.objects.filter(oidpersona__in=ids).only('oidpersona', 'nombre', 'apellido')}
+
+    def nombre_persona(self, obj, campo):
+        texto = getattr(obj, campo)
+        if not texto:
+            return None
+        if getattr(obj, f'{campo}Persona_id') is not None:
+            # FK sincronizada: con select_related la persona ya viene en el JOIN
+            persona = getattr(obj, f'{campo}Persona')
+        else:
+            # Filas sin FK: se usan las personas resueltas en lote por la vista
+            personas = self.context.get('personas')
+            if personas is None:
+                personas = self.resolver_personas([obj])
+            persona = personas.get(persona_id_desde_texto(texto))
+        if persona is None:
+            return texto
+        return f"{persona.nombre} {persona.apellido}"
+
     def get_director_nombre(self, obj):
-        if obj.director:
-            try:
-                from .models import Persona
-                persona = Persona.objects.get(oidpersona=int(obj.director))
-                return f"{persona.nombre} {persona.apellido}"
-            except (Persona.DoesNotExist, ValueError):
-                return obj.director
-        return None
-    
+        return self.nombre_persona(obj, 'director')
+
     def get_vicedirector_nombre(self, obj):
-        if obj.vicedirector:
-            try:
-                from .models import Persona
-                persona = Persona.objects.get(oidpersona=int(obj.vicedirector))
-                return f"{persona.nombre} {persona.apellido}"
-            except (Persona.DoesNotExist, ValueError):
-                return obj.vicedirector
-        return None
+        return self.nombre_persona(obj, 'vicedirector')
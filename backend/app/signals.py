@@ -0,0 +1,147 @@
+import functools
+
+from django.apps import apps
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import persona_cache
+from .basedatos import aplicar_pragmas
+from .busqueda import TIPO_POR_MODELO, desindexar, indexar_objetos
+from .estadisticas import (
+    MODELOS_ESTADISTICA, aplicar_deltas, contribuciones, diferencia, recalcular_estadisticas, valores_actuales
+)
+from .metricas import instalar_medicion
+from .models import (
+    Persona, Erogacion, InformeRendicionCuentas, GrupoInvestigacion, Patente,
+    MemoriaAnual, IntegranteMemoria, ActividadMemoria, PublicacionMemoria, PatenteMemoria, ProyectoMemoria
+)
+from .rendicion import invalidar_rendicion
+from .versiones import incrementar_versiones
+
+
+connection_created.connect(aplicar_pragmas, dispatch_uid='aplicar_pragmas_sqlite')
+connection_created.connect(instalar_medicion, dispatch_uid='instalar_medicion_sql')
+
+
+@receiver([post_save, post_delete], sender=Persona)
+def invalidar_persona_autenticada(sender, instance, **kwargs):
+    # Un cambio o baja de la persona debe verse en la próxima petición autenticada; se
+    # invalida de nuevo al confirmar por si otro request la cacheó antes del commit
+    persona_cache.invalidate(instance.oidpersona)
+    transaction.on_commit(functools.partial(persona_cache.invalidate, instance.oidpersona))
+
+
+def indexar_busqueda(sender, instance, **kwargs):
+    indexar_objetos(sender, [instance])
+
+
+def desindexar_busqueda(sender, instance, **kwargs):
+    desindexar(sender, [instance.pk])
+
+
+for modelo in TIPO_POR_MODELO:
+    post_save.connect(indexar_busqueda, sender=modelo, dispatch_uid=f'busqueda_save_{modelo.__name__}')
+    post_delete.connect(desindexar_busqueda, sender=modelo, dispatch_uid=f'busqueda_delete_{modelo.__name__}')
+
+
+@receiver(pre_save, sender=Erogacion)
+@receiver(pre_save, sender=InformeRendicionCuentas)
+def recordar_grupo_rendicion(sender, instance, **kwargs):
+    # Si la erogación cambia de informe (o el informe de grupo) también cambia el resumen anterior
+    instance.grupo_rendicion_anterior = None
+    if instance.pk is None:
+        return
+    campo = 'InformeRendicionCuentas__GrupoInvestigacion_id' if sender is Erogacion else 'GrupoInvestigacion_id'
+    instance.grupo_rendicion_anterior = sender.objects.filter(pk=instance.pk).values_list(campo, flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Erogacion)
+def invalidar_rendicion_erogacion(sender, instance, origin=None, **kwargs):
+    if origin is not None and getattr(origin, 'model', type(origin)) is not Erogacion:
+        # Borrado en cascada desde el informe o el grupo: invalida la señal del informe
+        return
+    grupo = InformeRendicionCuentas.objects.filter(
+        pk=instance.InformeRendicionCuentas_id
+    ).values_list('GrupoInvestigacion_id', flat=True).first()
+    invalidar_rendicion([grupo, getattr(instance, 'grupo_rendicion_anterior', None)])
+
+
+@receiver([post_save, post_delete], sender=InformeRendicionCuentas)
+def invalidar_rendicion_informe(sender, instance, **kwargs):
+    invalidar_rendicion([instance.GrupoInvestigacion_id, getattr(instance, 'grupo_rendicion_anterior', None)])
+
+
+def leer_estadistica_anterior(sender, instance, origin=None, **kwargs):
+    # Al borrar un grupo sus estadísticas se borran en cascada: no hay nada que descontar
+    if origin is not None and getattr(origin, 'model', type(origin)) is GrupoInvestigacion:
+        instance.estadistica_anterior = None
+    else:
+        instance.estadistica_anterior = valores_actuales(sender, instance.pk) if instance.pk is not None else None
+
+
+def actualizar_estadistica(sender, instance, **kwargs):
+    despues = valores_actuales(sender, instance.pk)
+    anterior = getattr(instance, 'estadistica_anterior', None)
+    aplicar_deltas(diferencia(sender.__name__, anterior, despues))
+    if sender is Patente and anterior and anterior['GrupoInvestigacion_id'] != despues['GrupoInvestigacion_id']:
+        # Los registros de la patente cuentan para el grupo de la patente
+        recalcular_estadisticas(grupos=[anterior['GrupoInvestigacion_id'], despues['GrupoInvestigacion_id']])
+
+
+@receiver(pre_delete, sender=GrupoInvestigacion)
+def marcar_grupo_borrado(sender, instance, origin=None, **kwargs):
+    # Los pre_delete de todo el borrado llegan antes que cualquier post_delete: los grupos
+    # que caen en cascada (p. ej. al borrar su programa) quedan anotados en el origen
+    if origin is not None:
+        if not hasattr(origin, 'grupos_en_borrado'):
+            origin.grupos_en_borrado = set()
+        origin.grupos_en_borrado.add(instance.pk)
+
+
+def descontar_estadistica(sender, instance, origin=None, **kwargs):
+    deltas = contribuciones(sender.__name__, getattr(instance, 'estadistica_anterior', None), signo=-1)
+    # Las estadísticas de un grupo que se borra en el mismo delete ya se borraron en
+    # cascada; descontarlas volvería a crear filas que apuntan al grupo borrado
+    borrados = getattr(origin, 'grupos_en_borrado', ())
+    aplicar_deltas({clave: delta for clave, delta in deltas.items() if clave[0] not in borrados})
+
+
+for nombre in MODELOS_ESTADISTICA:
+    modelo = apps.get_model('app', nombre)
+    pre_save.connect(leer_estadistica_anterior, sender=modelo, dispatch_uid=f'estadistica_pre_save_{nombre}')
+    post_save.connect(actualizar_estadistica, sender=modelo, dispatch_uid=f'estadistica_save_{nombre}')
+    pre_delete.connect(leer_estadistica_anterior, sender=modelo, dispatch_uid=f'estadistica_pre_delete_{nombre}')
+    post_delete.connect(descontar_estadistica, sender=modelo, dispatch_uid=f'estadistica_delete_{nombre}')
+
+
+def tocar_memoria(sender, instance, origin=None, **kwargs):
+    """
+    Un cambio en una tabla intermedia actualiza fechaModificacion de su memoria: los
+    PDF cacheados (app/memoria_pdf.py) usan esa fecha como versión.
+    """
+    if origin is not None and getattr(origin, 'model', type(origin)) is MemoriaAnual:
+        return
+    MemoriaAnual.objects.filter(pk=instance.MemoriaAnual_id).update(fechaModificacion=timezone.now())
+    incrementar_versiones(MemoriaAnual)
+
+
+for modelo in (IntegranteMemoria, ActividadMemoria, PublicacionMemoria, PatenteMemoria, ProyectoMemoria):
+    post_save.connect(tocar_memoria, sender=modelo, dispatch_uid=f'tocar_memoria_save_{modelo.__name__}')
+    post_delete.connect(tocar_memoria, sender=modelo, dispatch_uid=f'tocar_memoria_delete_{modelo.__name__}')
+
+
+def versionar_guardado(sender, **kwargs):
+    incrementar_versiones(sender)
+
+
+def versionar_borrado(sender, **kwargs):
+    # SET_NULL y SET_DEFAULT cambian las filas que apuntan a la borrada sin señales
+    incrementar_versiones(sender, *(relacion.related_model for relacion in sender._meta.related_objects))
+
+
+for modelo in apps.get_app_config('app').get_models():
+    post_save.connect(versionar_guardado, sender=modelo, dispatch_uid=f'versiones_save_{modelo.__name__}')
+    post_delete.connect(versionar_borrado, sender=modelo, dispatch_uid=f'versiones_delete_{modelo.__name__}')
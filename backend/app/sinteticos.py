@@ -0,0 +1,252 @@
+"""
+Generación de un corpus sintético para pruebas de rendimiento.
+
+Todo se inserta con bulk_create en lotes; los campos únicos llevan el prefijo
+`SYN<semilla>-` para no chocar con datos reales ni con otra corrida de distinta semilla.
+"""
+import datetime
+import random
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+
+from .busqueda import indexar_objetos
+from .estadisticas import recalcular_estadisticas
+from .rendicion import invalidar_rendicion
+from .versiones import incrementar_versiones
+from .models import (
+    ProgramaActividades, GrupoInvestigacion, TipoDePersonal, Persona, LineaDeInvestigacion,
+    Actividad, ProyectoInvestigacion, Autor, TipoTrabajoPublicado, TrabajoPublicado,
+    Patente, TipoDeRegistro, Registro, InformeRendicionCuentas, Erogacion,
+    TrabajoPresentado, EquipamientoInfraestructura, ActividadTransferencia,
+    MemoriaAnual, IntegranteMemoria, ActividadMemoria, PublicacionMemoria,
+    PatenteMemoria, ProyectoMemoria
+)
+
+LOTE = 1000
+
+PARAMETROS_DEFAULT = {
+    'grupos': 5,
+    'personas': 40,          # por grupo
+    'proyectos': 20,         # por grupo
+    'publicaciones': 200,    # por grupo
+    'patentes': 30,          # por grupo (cada una con su registro)
+    'erogaciones': 500,      # por grupo, repartidas en 4 informes
+    'memorias': 3,           # por grupo
+    'filas_memoria': 1000,   # filas intermedias por memoria
+}
+
+TIPOS_PERSONAL = ['Director', 'Vicedirector', 'Investigador', 'Becario', 'Personal de Apoyo', 'Técnico']
+TIPOS_EROGACION = ['Viáticos', 'Equipamiento', 'Insumos', 'Servicios', 'Becas', 'Subsidio']
+ESTADOS_PUBLICACION = ['Realizado', 'Publicado']
+
+
+def obtener_o_crear(modelo, nombres):
+    existentes = {o.nombre: o for o in modelo.objects.filter(nombre__in=nombres)}
+    faltantes = [modelo(nombre=n) for n in nombres if n not in existentes]
+    if faltantes:
+        modelo.objects.bulk_create(faltantes)
+        incrementar_versiones(modelo)
+        existentes = {o.nombre: o for o in modelo.objects.filter(nombre__in=nombres)}
+    return [existentes[n] for n in nombres]
+
+
+def centavos(rng, maximo):
+    return Decimal(rng.randint(0, maximo)) / 100
+
+
+def muestra(rng, elementos, cantidad):
+    return rng.sample(elementos, min(cantidad, len(elementos)))
+
+
+@transaction.atomic
+def generar_corpus(semilla=1, salida=None, **parametros):
+    """
+    Genera el corpus y retorna un dict con la cantidad de filas creadas por modelo.
+    `salida`, si se pasa, recibe mensajes de progreso.
+    """
+    p = {**PARAMETROS_DEFAULT, **{k: v for k, v in parametros.items() if v is not None}}
+    rng = random.Random(semilla)
+    tag = f'SYN{semilla}-'
+    hoy = datetime.date.today()
+    creados = {}
+
+    if GrupoInvestigacion.objects.filter(sigla__startswith=tag).exists():
+        raise ValueError(f'Ya existe un corpus generado con la semilla {semilla}; usar otra semilla.')
+
+    def log(mensaje):
+        if salida:
+            salida(mensaje)
+
+    def crear(modelo, objetos):
+        modelo.objects.bulk_create(objetos, batch_size=LOTE)
+        indexar_objetos(modelo, objetos)
+        incrementar_versiones(modelo)
+        creados[modelo.__name__] = creados.get(modelo.__name__, 0) + len(objetos)
+        return objetos
+
+    def fecha(dias_atras):
+        return hoy - datetime.timedelta(days=rng.randint(0, dias_atras))
+
+    tipos_personal = obtener_o_crear(TipoDePersonal, TIPOS_PERSONAL)
+    tipos_trabajo = obtener_o_crear(TipoTrabajoPublicado, ['Artículo', 'Libro', 'Capítulo', 'Congreso'])
+    tipos_registro = obtener_o_crear(TipoDeRegistro, ['Software', 'Marca', 'Modelo de utilidad'])
+
+    programa = crear(ProgramaActividades, [
+        ProgramaActividades(anio=hoy.year, objetivosEstrategicos=f'{tag}programa')
+    ])[0]
+    lineas = crear(LineaDeInvestigacion, [
+        LineaDeInvestigacion(nombre=f'{tag}L{i}', descripcion='-', ProgramaActividades=programa)
+        for i in range(10)
+    ])
+    autores = crear(Autor, [Autor(nombre=f'Autor{i}', apellido=tag) for i in range(100)])
+
+    grupos = crear(GrupoInvestigacion, [
+        GrupoInvestigacion(
+            nombre=f'{tag}Grupo {g}', facultadReginalAsignada='Facultad Regional', correo=f'{tag}grupo{g}@utn.edu.ar',
+            organigrama='-', sigla=f'{tag}G{g}', fuenteFinanciamiento='UTN', ProgramaActividades=programa
+        )
+        for g in range(p['grupos'])
+    ])
+    log(f'{len(grupos)} grupos')
+
+    personas = crear(Persona, [
+        Persona(
+            nombre=f'Nombre{g}_{i}', apellido=f'Apellido{i}', correo=f'{tag}g{g}p{i}@utn.edu.ar', contrasena='!',
+            horasSemanales=rng.randint(1, 40), tipoDePersonal=rng.choice(tipos_personal), GrupoInvestigacion=grupo
+        )
+        for g, grupo in enumerate(grupos) for i in range(p['personas'])
+    ])
+    log(f'{len(personas)} personas')
+
+    actividades = crear(Actividad, [
+        Actividad(
+            descripcion=f'{tag}actividad {i}', fechaInicio=fecha(720), fechaFin=fecha(30), nro=i,
+            presupuestoAsignado=round(rng.uniform(1000, 100000), 2), resultadosEsperados='-',
+            LineaDeInvestigacion=rng.choice(lineas)
+        )
+        for i in range(p['proyectos'] * p['grupos'])
+    ])
+
+    proyectos = crear(ProyectoInvestigacion, [
+        ProyectoInvestigacion(
+            codigoProyecto=f'{tag}{g}-{i}', descripcion='-', objectType='-', fechaInicio=fecha(1500),
+            fechaFinalizacion=hoy + datetime.timedelta(days=rng.randint(-400, 800)), nombre=f'Proyecto {g}-{i}',
+            tipoProyecto=rng.choice(['PID', 'PICT', 'Transferencia']), logrosObtenidos='-',
+            fuenteFinanciamiento='UTN', GrupoInvestigacion=grupo
+        )
+        for g, grupo in enumerate(grupos) for i in range(p['proyectos'])
+    ])
+    log(f'{len(proyectos)} proyectos')
+
+    publicaciones = crear(TrabajoPublicado, [
+        TrabajoPublicado(
+            titulo=f'{tag}Trabajo {g}-{i}', ISSN=f'{tag}{g}-{i}', editorial='Editorial', nombreRevista='Revista',
+            pais='Argentina', estado=rng.choice(ESTADOS_PUBLICACION), tipoTrabajoPublicado=rng.choice(tipos_trabajo),
+            Autor=rng.choice(autores), GrupoInvestigacion=grupo
+        )
+        for g, grupo in enumerate(grupos) for i in range(p['publicaciones'])
+    ])
+    log(f'{len(publicaciones)} trabajos publicados')
+
+    crear(TrabajoPresentado, [
+        TrabajoPresentado(
+            ciudad='Buenos Aires', fechaInicio=datetime.datetime.combine(fecha(720), datetime.time(), datetime.timezone.utc),
+            nombreReunion='Congreso', tituloTrabajo=f'{tag}Presentado {g}-{i}', GrupoInvestigacion=grupo
+        )
+        for g, grupo in enumerate(grupos) for i in range(p['publicaciones'] // 4)
+    ])
+
+    patentes = crear(Patente, [
+        Patente(
+            descripcion=f'Patente {g}-{i}', tipo=rng.choice(['Invención', 'Modelo']), numero=f'{tag}{g}-{i}',
+            fecha=fecha(1500), inventor=f'Inventor {i}', GrupoInvestigacion=grupo
+        )
+        for g, grupo in enumerate(grupos) for i in range(p['patentes'])
+    ])
+    crear(Registro, [
+        Registro(descripcion='-', TipoDeRegistro=rng.choice(tipos_registro), Patente=patente)
+        for patente in patentes
+    ])
+    log(f'{len(patentes)} patentes y registros')
+
+    crear(EquipamientoInfraestructura, [
+        EquipamientoInfraestructura(
+            denominacion=f'Equipo {i}', descripcion='-', fechaIncoporacion=fecha(1500),
+            montoInvertido=round(rng.uniform(1000, 500000), 2), GrupoInvestigacion=grupo
+        )
+        for grupo in grupos for i in range(10)
+    ])
+    crear(ActividadTransferencia, [
+        ActividadTransferencia(
+            descripcion='-', denominacion=f'Transferencia {i}', monto=round(rng.uniform(1000, 200000), 2),
+            nroActividadTransferencia=i, tipoActivdad='Servicio', GrupoInvestigacion=grupo
+        )
+        for grupo in grupos for i in range(10)
+    ])
+
+    informes = crear(InformeRendicionCuentas, [
+        InformeRendicionCuentas(periodoReportado=f'{hoy.year - t}', GrupoInvestigacion=grupo)
+        for grupo in grupos for t in range(4)
+    ])
+    informes_por_grupo = {}
+    for informe in informes:
+        informes_por_grupo.setdefault(informe.GrupoInvestigacion_id, []).append(informe)
+    # Las erogaciones pueden ser millones: se generan y guardan de a un lote
+    erogaciones = (
+        Erogacion(
+            egresos=centavos(rng, 5_000_000), ingresos=centavos(rng, 5_000_000), numero=i,
+            tipoErogacion=rng.choice(TIPOS_EROGACION),
+            InformeRendicionCuentas=rng.choice(informes_por_grupo[grupo.pk])
+        )
+        for grupo in grupos for i in range(p['erogaciones'])
+    )
+    while bloque := list(islice(erogaciones, LOTE)):
+        crear(Erogacion, bloque)
+    invalidar_rendicion([grupo.pk for grupo in grupos])
+    log(f'{creados.get("Erogacion", 0)} erogaciones')
+
+    generar_memorias(rng, p, grupos, personas, actividades, publicaciones, patentes, proyectos, crear)
+    log(f'{creados.get("MemoriaAnual", 0)} memorias')
+    # bulk_create no dispara señales: las estadísticas de los grupos nuevos se arman con GROUP BY
+    recalcular_estadisticas(grupos=[grupo.pk for grupo in grupos])
+    return creados
+
+
+def generar_memorias(rng, p, grupos, personas, actividades, publicaciones, patentes, proyectos, crear):
+    por_grupo = {}
+    for nombre, objetos in (('personas', personas), ('publicaciones', publicaciones),
+                            ('patentes', patentes), ('proyectos', proyectos)):
+        for objeto in objetos:
+            por_grupo.setdefault((nombre, objeto.GrupoInvestigacion_id), []).append(objeto)
+
+    memorias = crear(MemoriaAnual, [
+        MemoriaAnual(ano=2020 + m, titulo=f'Memoria {2020 + m}', GrupoInvestigacion=grupo)
+        for grupo in grupos for m in range(p['memorias'])
+    ])
+    # Se reparten las filas entre las cinco tablas, limitadas por los datos disponibles
+    cuota = max(p['filas_memoria'] // 5, 1)
+    filas = {IntegranteMemoria: [], ActividadMemoria: [], PublicacionMemoria: [], PatenteMemoria: [], ProyectoMemoria: []}
+    for memoria in memorias:
+        g = memoria.GrupoInvestigacion_id
+        filas[IntegranteMemoria] += [
+            IntegranteMemoria(MemoriaAnual=memoria, Persona=o, rol='Investigador', horasSemanales=o.horasSemanales)
+            for o in muestra(rng, por_grupo.get(('personas', g), []), cuota)
+        ]
+        filas[ActividadMemoria] += [
+            ActividadMemoria(MemoriaAnual=memoria, Actividad=o) for o in muestra(rng, actividades, cuota)
+        ]
+        filas[PublicacionMemoria] += [
+            PublicacionMemoria(MemoriaAnual=memoria, TrabajoPublicado=o)
+            for o in muestra(rng, por_grupo.get(('publicaciones', g), []), cuota)
+        ]
+        filas[PatenteMemoria] += [
+            PatenteMemoria(MemoriaAnual=memoria, Patente=o) for o in muestra(rng, por_grupo.get(('patentes', g), []), cuota)
+        ]
+        filas[ProyectoMemoria] += [
+            ProyectoMemoria(MemoriaAnual=memoria, ProyectoInvestigacion=o)
+            for o in muestra(rng, por_grupo.get(('proyectos', g), []), cuota)
+        ]
+    for modelo, objetos in filas.items():
+        crear(modelo, objetos)
@@ -1,3 +1,1274 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .authentication import PersonaCache, persona_cache
+from .contrasenas import HashingNoDisponible, hash_ficticio, metricas_hashing, pool_hashing
+from .busqueda import FUENTES_BUSQUEDA, rowid
+from .estadisticas import TIPOS_PANEL, recalcular_estadisticas
+from .exportacion import SECCIONES_EXPORTACION, columnas, exportar_memoria
+from . import memoria_views
+from .memoria_pdf import LISTO, archivo_trabajo, estado_trabajo, guardar_resultado
+from .models import (
+    Autor, CorreoSaliente, DocumentacionBiblioteca, Erogacion, EstadisticaGrupo, GrupoInvestigacion,
+    InformeRendicionCuentas, IntegranteMemoria, MemoriaAnual, Persona, Patente, ProgramaActividades,
+    ProyectoInvestigacion, Registro, TipoDePersonal, TipoDeRegistro, TipoTrabajoPublicado, TrabajoPresentado,
+    TrabajoPublicado, persona_id_desde_texto,
+)
+from .outbox import despachar_pendientes, encolar_correo, recuperar_huerfanos
+from .referencia import referencia_cache
+from .replicas import EstadoRequest, estado_request
+from .relaciones import RelacionesMixin
+from .rendicion import resumen_rendicion
+from .sinteticos import generar_corpus
+from .validacion import errores_de_integridad
+from .versiones import incrementar_versiones, leer_versiones
+from .views import get_token_for_user
+from core.urls import router
+
+CORPUS_CHICO = {
+    'grupos': 2, 'personas': 6, 'proyectos': 3, 'publicaciones': 6, 'patentes': 3,
+    'erogaciones': 4, 'memorias': 1, 'filas_memoria': 10,
+}
+
+
+class CorpusTestCase(TestCase):
+    """Base con un corpus sintético chico, creado una vez por clase."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_corpus(**CORPUS_CHICO)
+
+    def setUp(self):
+        self.client = APIClient()
+
+
+class CrearMemoriaTests(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.grupo = GrupoInvestigacion.objects.first()
+        self.personas = list(Persona.objects.values_list('pk', flat=True)[:2])
+
+    def crear(self, **datos):
+        return self.client.post(
+            '/api/memorias-anuales/', {'ano': 2030, 'GrupoInvestigacion': self.grupo.pk, **datos}, format='json'
+        )
+
+    def test_crea_integrantes_con_sus_campos(self):
+        respuesta = self.crear(integrantes=[
+            {'personaId': self.personas[0], 'rol': 'Director', 'dedicacion': 'Exclusiva', 'horasSemanales': '40'},
+            {'personaId': self.personas[1]},
+        ])
+        self.assertEqual(respuesta.status_code, 201)
+        filas = IntegranteMemoria.objects.filter(MemoriaAnual_id=respuesta.data['oidMemoriaAnual'])
+        self.assertEqual(
+            sorted(filas.values_list('Persona_id', 'rol', 'dedicacion', 'horasSemanales')),
+            sorted([(self.personas[0], 'Director', 'Exclusiva', 40), (self.personas[1], '', '', 0)]),
+        )
+
+    def test_relacion_que_no_es_lista_responde_400(self):
+        memorias = MemoriaAnual.objects.count()
+        for valor in ('123', 5, {'personaId': 1}):
+            respuesta = self.crear(integrantes=valor)
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertIn('formato', respuesta.data['integrantes'])
+        self.assertEqual(MemoriaAnual.objects.count(), memorias)
+
+    def test_campos_invalidos_de_la_tabla_intermedia_responden_400(self):
+        memorias = MemoriaAnual.objects.count()
+        respuesta = self.crear(integrantes=[
+            {'personaId': self.personas[0], 'horasSemanales': 'muchas'},
+            {'personaId': self.personas[1], 'horasSemanales': -1, 'rol': 'x' * 101},
+        ])
+        self.assertEqual(respuesta.status_code, 400)
+        campos = {error['id']: error for error in respuesta.data['integrantes']['campos']}
+        self.assertIn('horasSemanales', campos[self.personas[0]])
+        self.assertEqual(set(campos[self.personas[1]]) - {'id'}, {'horasSemanales', 'rol'})
+        self.assertEqual(MemoriaAnual.objects.count(), memorias)
+
+    def test_benchmark_no_deja_filas(self):
+        antes = MemoriaAnual.objects.count(), Persona.objects.count(), GrupoInvestigacion.objects.count()
+        salida = StringIO()
+        call_command('benchmark_memoria_create', filas=20, stdout=salida, stderr=StringIO())
+        self.assertIn('Aceleración', salida.getvalue())
+        self.assertEqual(
+            (MemoriaAnual.objects.count(), Persona.objects.count(), GrupoInvestigacion.objects.count()), antes
+        )
+
+
+class ClonarMemoriaTests(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.grupo = GrupoInvestigacion.objects.first()
+        self.personas = list(Persona.objects.values_list('pk', flat=True)[:2])
+        respuesta = self.client.post('/api/memorias-anuales/', {
+            'ano': 2028, 'GrupoInvestigacion': self.grupo.pk,
+            'integrantes': [
+                {'personaId': self.personas[0], 'rol': 'Director', 'dedicacion': 'Exclusiva', 'horasSemanales': 40},
+                {'personaId': self.personas[1], 'rol': 'Becario', 'dedicacion': 'Parcial', 'horasSemanales': 10},
+            ],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        MemoriaAnual.objects.filter(pk=respuesta.data['oidMemoriaAnual']).update(
+            fechaInicio=date(2028, 2, 29), fechaFin=date(2029, 3, 1)
+        )
+        self.memoria = MemoriaAnual.objects.get(pk=respuesta.data['oidMemoriaAnual'])
+
+    def clonar(self, **datos):
+        return self.client.post(f'/api/memorias-anuales/{self.memoria.pk}/clonar/', datos, format='json')
+
+    def integrantes(self, memoria):
+        return sorted(IntegranteMemoria.objects.filter(MemoriaAnual_id=memoria).values_list(
+            'Persona_id', 'rol', 'dedicacion', 'horasSemanales'
+        ))
+
+    def test_copia_integrantes_con_sus_campos(self):
+        respuesta = self.clonar()
+        self.assertEqual(respuesta.status_code, 201)
+        nueva = MemoriaAnual.objects.get(pk=respuesta.data['oidMemoriaAnual'])
+        self.assertEqual((nueva.ano, nueva.GrupoInvestigacion_id), (2029, self.grupo.pk))
+        self.assertEqual((str(nueva.fechaInicio), str(nueva.fechaFin)), ('2029-02-28', '2030-03-01'))
+        self.assertEqual(respuesta.data['copiadas']['integrantes'], 2)
+        self.assertEqual(self.integrantes(nueva.pk), self.integrantes(self.memoria.pk))
+
+    def test_rechaza_ano_repetido_o_fuera_de_rango(self):
+        self.assertEqual(self.clonar(ano=2030).status_code, 201)
+        memorias = MemoriaAnual.objects.count()
+        for ano in (2030, 2028, 2 ** 70, '2' * 30, 10000, 1899, -2029, '²⁰²⁹', 'dos mil', True):
+            with self.subTest(ano=ano):
+                respuesta = self.clonar(ano=ano)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('ano', respuesta.data)
+        # 9999 entra, pero fechaFin (un año después de ano) no
+        self.assertEqual(self.clonar(ano=9999).status_code, 400)
+        self.assertEqual(MemoriaAnual.objects.count(), memorias)
+
+    def test_falla_a_mitad_no_deja_nada(self):
+        memorias, integrantes = MemoriaAnual.objects.count(), IntegranteMemoria.objects.count()
+        copiar = memoria_views.copiar_relacion
+        llamadas = []
+
+        def copiar_y_fallar(modelo, origen, destino):
+            llamadas.append(modelo)
+            if len(llamadas) > 1:
+                raise DatabaseError('falla simulada')
+            return copiar(modelo, origen, destino)
+
+        with mock.patch('app.memoria_views.copiar_relacion', copiar_y_fallar):
+            with self.assertRaises(DatabaseError):
+                self.clonar(secciones=['integrantes', 'actividades'])
+        self.assertEqual((MemoriaAnual.objects.count(), IntegranteMemoria.objects.count()), (memorias, integrantes))
+        self.assertFalse(MemoriaAnual.objects.filter(ano=2029, GrupoInvestigacion=self.grupo).exists())
+
+
+class PersonaCacheTests(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        persona_cache.clear()
+        self.persona = Persona.objects.first()
+
+    def autenticar(self, persona):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+        return self.client.get(f'/api/auth/perfil/{persona.pk}/')
+
+    def test_get_retorna_una_copia(self):
+        cache = PersonaCache()
+        cache.set(self.persona.pk, self.persona)
+        primera = cache.get(self.persona.pk)
+        primera.nombre = 'Modificada'
+        self.assertIsNot(primera, cache.get(self.persona.pk))
+        self.assertEqual(cache.get(self.persona.pk).nombre, self.persona.nombre)
+
+    @override_settings(PERSONA_AUTH={'CACHE_ALIAS': 'default'})
+    def test_invalidar_en_un_worker_alcanza_a_los_demas(self):
+        worker_a, worker_b = PersonaCache(), PersonaCache()
+        worker_a.set(self.persona.pk, self.persona)
+        self.assertEqual(worker_a.get(self.persona.pk).pk, self.persona.pk)
+        worker_b.invalidate(self.persona.pk)
+        self.assertIsNone(worker_a.get(self.persona.pk))
+
+    @override_settings(PERSONA_AUTH={'CACHE_ALIAS': 'default'})
+    def test_persona_borrada_deja_de_autenticar(self):
+        persona = Persona.objects.create(
+            nombre='Baja', apellido='Prueba', correo='baja@utn.edu.ar', contrasena='-', horasSemanales=0
+        )
+        self.assertEqual(self.autenticar(persona).status_code, 200)
+        token = get_token_for_user(persona)['access']
+        with self.captureOnCommitCallbacks(execute=True):
+            persona.delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # get_user no resuelve a nadie: IsAuthenticated rechaza el request
+        self.assertIn(self.client.get(f'/api/auth/perfil/{self.persona.pk}/').status_code, (401, 403))
+
+
+class PaginacionTests(CorpusTestCase):
+    def test_seguir_x_next_cursor_trae_todas_las_filas(self):
+        # Lo mismo que hace obtenerTodasLasPaginas en el frontend
+        ids, url, paginas = [], '/api/personas/?page_size=4', 0
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertIsInstance(respuesta.json(), list)
+            ids.extend(fila['oidpersona'] for fila in respuesta.json())
+            url = respuesta.headers.get('X-Next-Cursor')
+            paginas += 1
+        self.assertGreater(paginas, 1)
+        self.assertEqual(ids, sorted(Persona.objects.values_list('pk', flat=True)))
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': 1})
+    def test_pagina_dos_por_x_next_cursor_en_viewset_que_pagina(self):
+        primera = self.client.get('/api/grupos/')
+        self.assertEqual(len(primera.json()), 1)
+        segunda = self.client.get(primera.headers['X-Next-Cursor'])
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(
+            [grupo['oidGrupoInvestigacion'] for grupo in primera.json() + segunda.json()],
+            sorted(GrupoInvestigacion.objects.values_list('pk', flat=True)),
+        )
+        self.assertNotIn('X-Next-Cursor', segunda.headers)
+        self.assertIn('X-Previous-Cursor', segunda.headers)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': 1})
+    def test_sin_page_size_los_demas_listados_vienen_completos(self):
+        respuesta = self.client.get('/api/personas/')
+        self.assertEqual(len(respuesta.json()), Persona.objects.count())
+        self.assertNotIn('X-Next-Cursor', respuesta.headers)
+
+
+@mock.patch('app.importacion.LOTE_IMPORTACION', 20)
+@mock.patch('app.views.MAX_ERRORES_RESPUESTA', 3)
+class ImportarTrabajosTests(CorpusTestCase):
+    COLUMNAS = 'titulo,ISSN,editorial,nombreRevista,pais,tipoTrabajoPublicado,autorNombre,autorApellido'
+
+    def setUp(self):
+        super().setUp()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+        self.grupo = GrupoInvestigacion.objects.first()
+
+    def csv(self, filas, rechazadas=()):
+        lineas = [self.COLUMNAS]
+        for i in range(1, filas + 1):
+            titulo = '' if i in rechazadas else f'Importado {i}'
+            lineas.append(f'{titulo},9{i:03d}-{i:04d},Editorial,Revista,Argentina,Artículo,Ana,Autora {i}')
+        return ('\n'.join(lineas) + '\n').encode()
+
+    def importar(self, contenido):
+        return self.client.post('/api/trabajos-publicados/importar/', {
+            'archivo': SimpleUploadedFile('trabajos.csv', contenido), 'GrupoInvestigacion': self.grupo.pk,
+        }, format='multipart')
+
+    def test_errores_acotados_en_la_respuesta(self):
+        respuesta = self.importar(self.csv(50, rechazadas=range(5, 50, 5)))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual((respuesta.data['creados'], respuesta.data['rechazados']), (41, 9))
+        self.assertEqual([e['fila'] for e in respuesta.data['errores']], [5, 10, 15])
+        self.assertEqual(respuesta.data['erroresOmitidos'], 6)
+
+    def test_archivo_ilegible_informa_lo_ya_importado(self):
+        # El byte inválido queda más allá del primer bloque que decodifica TextIOWrapper
+        contenido = self.csv(400, rechazadas=(7,)) + b'\xff\xfe,roto\n'
+        respuesta = self.importar(contenido)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('No se pudo leer el archivo', respuesta.data['archivo'])
+        ultima = respuesta.data['ultimaFila']
+        self.assertTrue(0 < ultima < 400 and ultima % 20 == 0)
+        self.assertEqual(respuesta.data['filas'], ultima)
+        self.assertEqual(respuesta.data['creados'], ultima - 1)
+        self.assertEqual(respuesta.data['errores'][0]['fila'], 7)
+        self.assertEqual(
+            TrabajoPublicado.objects.filter(titulo__startswith='Importado ').count(), respuesta.data['creados']
+        )
+
+
+class ConsultasConstantesTests(TestCase):
+    """Los listados con RelacionesMixin hacen las mismas consultas sin importar el tamaño de página."""
+
+    PAGINAS = (2, 4)
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_corpus(**{**CORPUS_CHICO, 'memorias': 2})
+
+    def setUp(self):
+        caches['default'].clear()
+        referencia_cache.clear()
+        persona_cache.clear()
+        self.client = APIClient()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+
+    def filas(self, respuesta):
+        # StandardResultsSetPagination envuelve la página; la paginación por cursor no
+        cuerpo = respuesta.json()
+        return cuerpo['results'] if isinstance(cuerpo, dict) else cuerpo
+
+    def test_listados_sin_n_mas_uno(self):
+        prefijos = [prefijo for prefijo, viewset, _ in router.registry if issubclass(viewset, RelacionesMixin)]
+        self.assertTrue({
+            'personas', 'trabajos-publicados', 'memorias-anuales', 'integrantes-memoria', 'actividades-memoria',
+            'publicaciones-memoria', 'patentes-memoria', 'proyectos-memoria',
+        } <= set(prefijos))
+        for prefijo in prefijos:
+            with self.subTest(prefijo):
+                url = f'/api/{prefijo}/'
+                self.client.get(url)  # calentamiento (cachés de autenticación y de versiones)
+                chica, grande = self.PAGINAS
+                with CaptureQueriesContext(connection) as consultas:
+                    filas = len(self.filas(self.client.get(url, {'page_size': chica})))
+                with self.assertNumQueries(len(consultas)):
+                    respuesta = self.client.get(url, {'page_size': grande})
+                self.assertEqual(respuesta.status_code, 200)
+                # Si la página grande no trae más filas la comparación no prueba nada
+                self.assertEqual((filas, len(self.filas(respuesta))), self.PAGINAS)
+
+
+class MemoriaConsultasTests(CorpusTestCase):
+    """Consultas del detalle completo, de los nombres del listado y del guardado de memorias."""
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        persona_cache.clear()
+        self.personas = list(Persona.objects.order_by('pk')[:4])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(self.personas[0])["access"]}')
+        self.grupo = GrupoInvestigacion.objects.first()
+
+    def crear_memorias(self, cantidad):
+        # Las memorias del corpus no tienen director: se reemplazan para que todas las páginas tengan nombres
+        MemoriaAnual.objects.all().delete()
+        for i in range(cantidad):
+            director, vicedirector = self.personas[i % 2], self.personas[2 + i % 2]
+            memoria = MemoriaAnual.objects.create(
+                ano=2040 + i, GrupoInvestigacion=self.grupo,
+                director=str(director.pk), vicedirector=f'Externo {i}' if i % 3 == 2 else str(vicedirector.pk),
+            )
+            if i % 2 == 0:
+                # Filas viejas con el id en el texto pero sin la FK: se resuelven en lote
+                MemoriaAnual.objects.filter(pk=memoria.pk).update(directorPersona=None, vicedirectorPersona=None)
+
+    def test_completa_consultas_fijas(self):
+        memoria = MemoriaAnual.objects.first()
+        # Director con el id en el texto y sin la FK: su nombre sale de una consulta aparte
+        MemoriaAnual.objects.filter(pk=memoria.pk).update(director=str(self.personas[1].pk), directorPersona=None)
+        url = f'/api/memorias-anuales/{memoria.pk}/completa/'
+        self.client.get(url)  # calentamiento (cachés de autenticación y de versiones)
+        # Memoria con las personas de las FK en el JOIN, las personas sin FK y una consulta por sección
+        with self.assertNumQueries(7):
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['director_nombre'], f'{self.personas[1].nombre} {self.personas[1].apellido}')
+        self.assertEqual(
+            len(respuesta.data['integrantes']), IntegranteMemoria.objects.filter(MemoriaAnual=memoria).count()
+        )
+
+    def test_listado_resuelve_nombres_sin_n_mas_uno(self):
+        self.crear_memorias(6)
+        url = '/api/memorias-anuales/'
+        self.client.get(url, {'page_size': 2})  # calentamiento
+        with CaptureQueriesContext(connection) as consultas:
+            chica = self.client.get(url, {'page_size': 2})
+        with self.assertNumQueries(len(consultas)):
+            grande = self.client.get(url, {'page_size': 6})
+        self.assertEqual((len(chica.data), len(grande.data)), (2, 6))
+
+        nombres = {p.pk: f'{p.nombre} {p.apellido}' for p in self.personas}
+        for fila in grande.data:
+            memoria = MemoriaAnual.objects.get(pk=fila['oidMemoriaAnual'])
+            for campo in ('director', 'vicedirector'):
+                oid = persona_id_desde_texto(getattr(memoria, campo))
+                self.assertEqual(fila[f'{campo}_nombre'], nombres.get(oid, getattr(memoria, campo)))
+
+    def test_guardar_sin_cambiar_personas_no_las_busca(self):
+        memoria = MemoriaAnual.objects.create(
+            ano=2050, GrupoInvestigacion=self.grupo, director=str(self.personas[0].pk)
+        )
+        memoria = MemoriaAnual.objects.get(pk=memoria.pk)
+        memoria.titulo = 'Otro título'
+        with CaptureQueriesContext(connection) as consultas:
+            memoria.save()
+        self.assertFalse([c for c in consultas if '"app_persona"' in c['sql']])
+
+        memoria.director = str(self.personas[1].pk)
+        memoria.save()
+        self.assertEqual(MemoriaAnual.objects.get(pk=memoria.pk).directorPersona_id, self.personas[1].pk)
+
+        # Una FK tocada a mano vuelve a sincronizarse desde el texto
+        memoria.directorPersona = None
+        memoria.save()
+        self.assertEqual(MemoriaAnual.objects.get(pk=memoria.pk).directorPersona_id, self.personas[1].pk)
+
+
+class EstadisticasMixin:
+    """Compara lo que mantienen las señales con reconstruir la tabla con GROUP BY."""
+
+    def estadisticas(self):
+        # Las señales dejan en cero las claves que se vacían; el GROUP BY no las crea
+        return sorted(EstadisticaGrupo.objects.exclude(cantidad=0, suma=0).values_list(
+            'GrupoInvestigacion_id', 'metrica', 'clave', 'cantidad', 'suma'
+        ))
+
+    def assertEstadisticasCorrectas(self):
+        # Las filas borradas con el grupo no deben volver a crearse: la FK lo detecta
+        connection.check_constraints()
+        mantenidas = self.estadisticas()
+        recalcular_estadisticas()
+        self.assertEqual(mantenidas, self.estadisticas())
+
+
+class EstadisticasTests(EstadisticasMixin, TestCase):
+    """Lo que mantienen las señales tiene que coincidir con reconstruir la tabla con GROUP BY."""
+
+
+    @classmethod
+    def setUpTestData(cls):
+        # Dos corpus: uno se borra y el otro tiene que quedar con sus estadísticas intactas
+        generar_corpus(semilla=1, **CORPUS_CHICO)
+        generar_corpus(semilla=2, **CORPUS_CHICO)
+
+    def setUp(self):
+        self.grupo_a, self.grupo_b = GrupoInvestigacion.objects.filter(sigla__startswith='SYN1-')[:2]
+
+    def test_alta_cambio_y_baja_de_patente_y_registro(self):
+        patente = Patente.objects.create(
+            descripcion='Prueba', tipo='Invención', numero='PR-1', GrupoInvestigacion=self.grupo_a,
+        )
+        registro = Registro.objects.create(
+            descripcion='-', TipoDeRegistro=TipoDeRegistro.objects.first(), Patente=patente,
+        )
+        self.assertEstadisticasCorrectas()
+        # Cambiar la patente de grupo mueve también sus registros
+        patente.GrupoInvestigacion = self.grupo_b
+        patente.save()
+        self.assertEstadisticasCorrectas()
+        registro.delete()
+        self.assertEstadisticasCorrectas()
+        Registro.objects.create(descripcion='-', TipoDeRegistro=TipoDeRegistro.objects.first(), Patente=patente)
+        # Borra el registro en cascada
+        patente.delete()
+        self.assertEstadisticasCorrectas()
+
+    def test_cambios_de_proyecto(self):
+        proyecto = ProyectoInvestigacion.objects.filter(GrupoInvestigacion=self.grupo_a).first()
+        proyecto.fechaInicio = date(2001, 1, 1)
+        proyecto.fechaFinalizacion = date(2002, 1, 1)
+        proyecto.save()
+        self.assertEstadisticasCorrectas()
+        proyecto.GrupoInvestigacion = self.grupo_b
+        proyecto.save()
+        self.assertEstadisticasCorrectas()
+        proyecto.delete()
+        self.assertEstadisticasCorrectas()
+
+    def test_borrar_grupos_con_queryset(self):
+        # El origen del borrado es un QuerySet: grupos_en_borrado se anota en él
+        patentes = Patente.objects.filter(GrupoInvestigacion__sigla__startswith='SYN2-')
+        self.assertTrue(Registro.objects.filter(Patente__in=patentes).exists())
+        GrupoInvestigacion.objects.filter(sigla__startswith='SYN2-').delete()
+        self.assertFalse(patentes.exists())
+        self.assertEstadisticasCorrectas()
+
+    def test_borrar_programa_con_grupos(self):
+        programa = ProgramaActividades.objects.get(objetivosEstrategicos='SYN2-programa')
+        grupos = list(GrupoInvestigacion.objects.filter(ProgramaActividades=programa).values_list('pk', flat=True))
+        self.assertTrue(EstadisticaGrupo.objects.filter(GrupoInvestigacion_id__in=grupos).exists())
+        self.assertEqual(APIClient().delete(f'/api/programa-actividades/{programa.pk}/').status_code, 204)
+        self.assertFalse(EstadisticaGrupo.objects.filter(GrupoInvestigacion_id__in=grupos).exists())
+        self.assertTrue(EstadisticaGrupo.objects.exists())
+        self.assertEstadisticasCorrectas()
+
+    def test_borrar_grupo_con_filas_relacionadas(self):
+        grupo = GrupoInvestigacion.objects.filter(sigla__startswith='SYN2-').first()
+        self.assertTrue(TrabajoPublicado.objects.filter(GrupoInvestigacion=grupo).exists())
+        self.assertEqual(APIClient().delete(f'/api/grupos/{grupo.pk}/').status_code, 204)
+        self.assertFalse(EstadisticaGrupo.objects.filter(GrupoInvestigacion_id=grupo.pk).exists())
+        self.assertEstadisticasCorrectas()
+
+
+class LotesTests(EstadisticasMixin, CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+        self.uno, self.dos, self.tres = TrabajoPublicado.objects.order_by('pk')[:3]
+
+    def bulk_update(self, cuerpo):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch('/api/trabajos-publicados/bulk-update/', cuerpo, format='json')
+
+    def filas(self):
+        return list(TrabajoPublicado.objects.order_by('pk').values_list('pk', 'titulo', 'ISSN', 'estado'))
+
+    def archivados(self):
+        return EstadisticaGrupo.objects.filter(metrica='trabajos_estado', clave='Archivado', cantidad__gt=0)
+
+    def buscar(self, q):
+        respuesta = self.client.get('/api/buscar/', {'q': q, 'tipo': 'trabajos-publicados'})
+        return {resultado['oid'] for resultado in respuesta.json()['results']}
+
+    def test_anonimo_responde_401(self):
+        anonimo = APIClient()
+        antes = self.filas()
+        respuesta = anonimo.patch(
+            '/api/trabajos-publicados/bulk-update/', {'ids': [self.uno.pk], 'campos': {'estado': 'x'}}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 401)
+        respuesta = anonimo.post('/api/trabajos-publicados/bulk-destroy/', [self.uno.pk], format='json')
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(self.filas(), antes)
+
+    def test_un_elemento_invalido_no_aplica_nada(self):
+        antes = self.filas()
+        respuesta = self.bulk_update([
+            {'id': self.uno.pk, 'estado': 'Publicado'},
+            {'id': self.dos.pk, 'estado': 'x' * 100},
+            {'id': 0, 'estado': 'Publicado'},
+        ])
+        self.assertEqual(respuesta.status_code, 400)
+        resultados = {r['id']: r for r in respuesta.data['resultados']}
+        self.assertEqual(resultados[self.uno.pk]['resultado'], 'no_aplicado')
+        self.assertIn('estado', resultados[self.dos.pk]['errores'])
+        self.assertEqual(resultados[0]['errores'], {'detail': 'No encontrado.'})
+        self.assertEqual(self.filas(), antes)
+
+    def test_unicidad_dentro_del_lote_y_contra_la_base(self):
+        antes = self.filas()
+        respuesta = self.bulk_update([
+            {'id': self.uno.pk, 'ISSN': '0000-0001'},
+            {'id': self.dos.pk, 'ISSN': '0000-0001'},
+            {'id': self.tres.pk, 'titulo': TrabajoPublicado.objects.exclude(pk=self.tres.pk).first().titulo},
+        ])
+        self.assertEqual(respuesta.status_code, 400)
+        errores = {r['id']: r['errores'] for r in respuesta.data['resultados']}
+        self.assertEqual(errores[self.uno.pk]['ISSN'], ['Ya existe un trabajo publicado con este ISSN.'])
+        self.assertEqual(errores[self.dos.pk]['ISSN'], ['Ya existe un trabajo publicado con este ISSN.'])
+        self.assertEqual(errores[self.tres.pk]['titulo'], ['Ya existe un trabajo publicado con este título.'])
+        self.assertEqual(self.filas(), antes)
+        # El valor que deja una fila del lote queda libre para otra fuera de él
+        self.assertEqual(self.bulk_update([{'id': self.uno.pk, 'ISSN': '0000-0002'}]).status_code, 200)
+        self.assertEqual(self.bulk_update([{'id': self.dos.pk, 'ISSN': self.uno.ISSN}]).status_code, 200)
+
+    def test_indice_estadisticas_y_version_despues_de_modificar(self):
+        version = leer_versiones([TrabajoPublicado])[TrabajoPublicado][0]
+        # Valores distintos por fila: bulk_update
+        respuesta = self.bulk_update([
+            {'id': self.uno.pk, 'titulo': 'Zanahoria cuántica', 'estado': 'Archivado'},
+            {'id': self.dos.pk, 'titulo': 'Zanahoria óptica', 'estado': 'Archivado'},
+        ])
+        self.assertEqual((respuesta.status_code, respuesta.data['actualizados']), (200, 2))
+        self.assertEqual(self.buscar('zanahoria'), {self.uno.pk, self.dos.pk})
+        self.assertEstadisticasCorrectas()
+        self.assertTrue(self.archivados().exists())
+        self.assertGreater(leer_versiones([TrabajoPublicado])[TrabajoPublicado][0], version)
+        # Los mismos valores para todas: QuerySet.update
+        respuesta = self.bulk_update({
+            'ids': [self.uno.pk, self.dos.pk, self.tres.pk], 'campos': {'estado': 'Revisado'},
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEstadisticasCorrectas()
+        self.assertFalse(self.archivados().exists())
+
+    def test_baja_en_lote(self):
+        self.bulk_update([{'id': self.uno.pk, 'titulo': 'Zanahoria cuántica'}])
+        self.assertEqual(self.buscar('zanahoria'), {self.uno.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(
+                '/api/trabajos-publicados/bulk-destroy/', {'ids': [self.uno.pk, self.dos.pk]}, format='json'
+            )
+        self.assertEqual((respuesta.status_code, respuesta.data['eliminados']), (200, 2))
+        self.assertFalse(TrabajoPublicado.objects.filter(pk__in=[self.uno.pk, self.dos.pk]).exists())
+        self.assertEqual(self.buscar('zanahoria'), set())
+        self.assertEstadisticasCorrectas()
+
+
+class UnicidadTests(CorpusTestCase):
+    """Un valor único repetido responde 400 con el error del campo, lo detecte la validación o la base."""
+
+    def setUp(self):
+        super().setUp()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+        self.trabajo, self.otro = TrabajoPublicado.objects.order_by('pk')[:2]
+        self.patente = Patente.objects.first()
+
+    def datos_trabajo(self, **campos):
+        return {
+            'titulo': 'Trabajo nuevo', 'ISSN': '9999-0001', 'editorial': '-', 'nombreRevista': '-', 'pais': '-',
+            'tipoTrabajoPublicado': self.trabajo.tipoTrabajoPublicado_id, 'Autor': self.trabajo.Autor_id,
+            'GrupoInvestigacion': self.trabajo.GrupoInvestigacion_id, **campos,
+        }
+
+    def datos_patente(self, **campos):
+        return {
+            'descripcion': '-', 'tipo': 'Invención', 'numero': 'NUEVA-1',
+            'GrupoInvestigacion': self.patente.GrupoInvestigacion_id, **campos,
+        }
+
+    def comprobar(self, respuesta, campo, mensaje):
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual([str(error) for error in respuesta.data[campo]], [mensaje])
+
+    def casos(self):
+        return [
+            (lambda: self.client.post('/api/trabajos-publicados/', self.datos_trabajo(ISSN=self.trabajo.ISSN)),
+             'ISSN', 'Ya existe un trabajo publicado con este ISSN.'),
+            (lambda: self.client.post('/api/trabajos-publicados/', self.datos_trabajo(titulo=self.trabajo.titulo)),
+             'titulo', 'Ya existe un trabajo publicado con este título.'),
+            (lambda: self.client.patch(f'/api/trabajos-publicados/{self.otro.pk}/', {'ISSN': self.trabajo.ISSN}),
+             'ISSN', 'Ya existe un trabajo publicado con este ISSN.'),
+            (lambda: self.client.post('/api/patentes/', self.datos_patente(numero=self.patente.numero)),
+             'numero', 'Ya existe una patente con este número.'),
+        ]
+
+    def test_validacion_del_serializer(self):
+        trabajos, patentes = TrabajoPublicado.objects.count(), Patente.objects.count()
+        for pedir, campo, mensaje in self.casos():
+            with self.subTest(campo=campo):
+                self.comprobar(pedir(), campo, mensaje)
+        self.assertEqual((TrabajoPublicado.objects.count(), Patente.objects.count()), (trabajos, patentes))
+        # El valor propio no choca consigo mismo
+        respuesta = self.client.patch(f'/api/trabajos-publicados/{self.trabajo.pk}/', {'ISSN': self.trabajo.ISSN})
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_integrity_error_de_la_base(self):
+        # Sin la consulta previa, como si otro request ocupara el valor entre la validación y el INSERT
+        with mock.patch('app.validacion.UnicidadMixin.validate', lambda serializer, data: data):
+            for pedir, campo, mensaje in self.casos():
+                with self.subTest(campo=campo):
+                    self.comprobar(pedir(), campo, mensaje)
+
+    def test_errores_de_integridad_por_constraint(self):
+        try:
+            with transaction.atomic():
+                TrabajoPublicado.objects.create(**{
+                    **{campo: getattr(self.trabajo, campo) for campo in ('editorial', 'nombreRevista', 'pais')},
+                    'titulo': 'Otro título', 'ISSN': self.trabajo.ISSN,
+                    'tipoTrabajoPublicado_id': self.trabajo.tipoTrabajoPublicado_id, 'Autor_id': self.trabajo.Autor_id,
+                    'GrupoInvestigacion_id': self.trabajo.GrupoInvestigacion_id,
+                })
+        except IntegrityError as error:
+            self.assertEqual(errores_de_integridad(error, TrabajoPublicado), {
+                'ISSN': ['Ya existe un trabajo publicado con este ISSN.'],
+            })
+        else:
+            self.fail('Se esperaba un IntegrityError')
+        # Un IntegrityError que no es de unicidad no se atribuye a ningún campo
+        self.assertIsNone(errores_de_integridad(IntegrityError('NOT NULL constraint failed: x.y'), TrabajoPublicado))
+
+
+class BusquedaTests(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+        self.grupo = GrupoInvestigacion.objects.first()
+
+    def buscar(self, q):
+        respuesta = self.client.get('/api/buscar/', {'q': q})
+        self.assertEqual(respuesta.status_code, 200)
+        return {(resultado['tipo'], resultado['oid']) for resultado in respuesta.json()['results']}
+
+    def test_alta_cambio_y_baja_por_la_api(self):
+        respuesta = self.client.post('/api/patentes/', {
+            'descripcion': 'Murciélago fosforescente', 'tipo': 'Invención', 'numero': 'BUS-1',
+            'GrupoInvestigacion': self.grupo.pk,
+        })
+        self.assertEqual(respuesta.status_code, 201)
+        oid = respuesta.data['oidPatente']
+        # Sin tildes también coincide
+        self.assertEqual(self.buscar('murcielago'), {('patentes', oid)})
+        self.assertEqual(
+            self.client.patch(f'/api/patentes/{oid}/', {'descripcion': 'Colibrí fosforescente'}).status_code, 200
+        )
+        self.assertEqual(self.buscar('murcielago'), set())
+        self.assertEqual(self.buscar('colibri'), {('patentes', oid)})
+        self.assertEqual(self.client.delete(f'/api/patentes/{oid}/').status_code, 204)
+        self.assertEqual(self.buscar('fosforescente'), set())
+
+    def test_el_mismo_oid_en_cada_tipo_no_choca(self):
+        oid = 900
+        trabajo = TrabajoPublicado.objects.first()
+        comunes = {'pk': oid, 'GrupoInvestigacion': self.grupo}
+        TrabajoPublicado.objects.create(
+            titulo='Quimera publicada', ISSN='BUS-900', editorial='-', nombreRevista='-', pais='-',
+            tipoTrabajoPublicado_id=trabajo.tipoTrabajoPublicado_id, Autor_id=trabajo.Autor_id, **comunes,
+        )
+        Patente.objects.create(descripcion='Quimera patentada', tipo='-', numero='BUS-900', **comunes)
+        ProyectoInvestigacion.objects.create(
+            nombre='Quimera', codigoProyecto='BUS-900', descripcion='-', objectType='-', tipoProyecto='-',
+            logrosObtenidos='-', fuenteFinanciamiento='-', fechaInicio=date(2024, 1, 1),
+            fechaFinalizacion=date(2024, 12, 31), **comunes,
+        )
+        DocumentacionBiblioteca.objects.create(titulo='Quimera', anio=2024, editorial='-', autor='-', **comunes)
+        TrabajoPresentado.objects.create(
+            tituloTrabajo='Quimera presentada', ciudad='-', nombreReunion='-', fechaInicio=timezone.now(), **comunes,
+        )
+        self.assertEqual(self.buscar('quimera'), {(tipo, oid) for tipo in FUENTES_BUSQUEDA})
+        Patente.objects.filter(pk=oid).delete()
+        self.assertEqual(self.buscar('quimera'), {(tipo, oid) for tipo in FUENTES_BUSQUEDA if tipo != 'patentes'})
+        self.assertEqual(
+            len({rowid(tipo, oid) for tipo in FUENTES_BUSQUEDA for oid in range(1, 2000)}),
+            len(FUENTES_BUSQUEDA) * 1999,
+        )
+
+
+class RendicionTests(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+        self.grupo_a, self.grupo_b = GrupoInvestigacion.objects.order_by('pk')[:2]
+        self.informe_a, self.informe_b = (
+            InformeRendicionCuentas.objects.create(periodoReportado='2031', GrupoInvestigacion=grupo)
+            for grupo in (self.grupo_a, self.grupo_b)
+        )
+
+    def erogar(self, informe, ingresos, egresos, cantidad=1):
+        return [
+            Erogacion.objects.create(
+                ingresos=Decimal(ingresos), egresos=Decimal(egresos), numero=n, tipoErogacion='Viáticos',
+                InformeRendicionCuentas=informe,
+            )
+            for n in range(cantidad)
+        ]
+
+    def totales(self, grupo):
+        return resumen_rendicion(grupo=grupo.pk, periodo='2031')['totales']
+
+    def test_totales_exactos_en_centavos(self):
+        # Con floats, diez veces 0.10 suma 0.9999999999999999
+        self.erogar(self.informe_a, '0.10', '0.20', cantidad=10)
+        self.erogar(self.informe_a, '1234567.89', '0.01')
+        self.assertEqual(self.totales(self.grupo_a), {
+            'ingresos': '1234568.89', 'egresos': '2.01', 'balance': '1234566.88', 'cantidad': 11,
+        })
+        respuesta = self.client.get(f'/api/grupos/{self.grupo_a.pk}/resumen-financiero/', {'periodo': '2031'})
+        self.assertEqual(respuesta.data['totales']['ingresos'], '1234568.89')
+
+    def test_la_api_responde_numeros(self):
+        erogacion, = self.erogar(self.informe_a, '10.25', '3.10')
+        datos = self.client.get(f'/api/erogaciones/{erogacion.pk}/').json()
+        self.assertEqual((datos['ingresos'], datos['egresos']), (10.25, 3.1))
+
+    def test_mover_una_erogacion_invalida_los_dos_grupos(self):
+        erogacion, = self.erogar(self.informe_a, '5.50', '0.00')
+        self.erogar(self.informe_b, '1.00', '0.00')
+        self.assertEqual(self.totales(self.grupo_a)['ingresos'], '5.50')
+        self.assertEqual(self.totales(self.grupo_b)['ingresos'], '1.00')
+        global_antes = resumen_rendicion()['totales']['cantidad']
+        respuesta = self.client.patch(
+            f'/api/erogaciones/{erogacion.pk}/', {'InformeRendicionCuentas': self.informe_b.pk}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.totales(self.grupo_a)['ingresos'], '0.00')
+        self.assertEqual(self.totales(self.grupo_b)['ingresos'], '6.50')
+        self.assertEqual(resumen_rendicion()['totales']['cantidad'], global_antes)
+        # El informe entero cambia de grupo: también invalida los dos
+        self.informe_b.GrupoInvestigacion = self.grupo_a
+        self.informe_b.save()
+        self.assertEqual(self.totales(self.grupo_a)['ingresos'], '6.50')
+        self.assertEqual(self.totales(self.grupo_b)['ingresos'], '0.00')
+
+
+class CachePDFTests(TestCase):
+    def test_trabajo_visible_desde_otro_proceso(self):
+        with tempfile.TemporaryDirectory() as carpeta, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pdf': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': carpeta},
+        }, PDF={'CACHE_ALIAS': 'pdf'}):
+            futuro = Future()
+            futuro.set_result(b'%PDF-1.4 prueba')
+            guardar_resultado('1-1', 1, futuro)
+            # Una instancia nueva de la caché es lo que ve otro worker
+            del caches['pdf']
+            self.assertEqual(estado_trabajo('1-1')['estado'], LISTO)
+            self.assertEqual(archivo_trabajo('1-1'), b'%PDF-1.4 prueba')
+
+    @override_settings(PDF={'CACHE_ALIAS': 'default'})
+    def test_renderizar_memorias_rechaza_cache_del_proceso(self):
+        with self.assertRaisesMessage(CommandError, 'memoria del proceso'):
+            call_command('renderizar_memorias', ano=2024, stdout=StringIO(), stderr=StringIO())
+
+
+class ExportacionTests(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['exportacion'].clear()
+        self.memoria = MemoriaAnual.objects.first()
+        self.integrantes = list(IntegranteMemoria.objects.filter(MemoriaAnual=self.memoria).order_by('pk'))
+        self.assertTrue(self.integrantes)
+
+    def exportar(self, formato):
+        respuesta = self.client.get(f'/api/memorias-anuales/{self.memoria.pk}/exportar/', {'formato': formato})
+        self.assertEqual(respuesta.status_code, 200)
+        return b''.join(respuesta.streaming_content)
+
+    def cantidades(self):
+        return {
+            seccion: modelo.objects.filter(MemoriaAnual=self.memoria).count()
+            for seccion, (modelo, _) in SECCIONES_EXPORTACION.items()
+        }
+
+    def test_csv(self):
+        texto = self.exportar('csv').decode('utf-8')
+        self.assertTrue(texto.startswith('\ufeff'))
+        filas = list(csv.reader(StringIO(texto.removeprefix('\ufeff'))))
+        self.assertEqual(filas[0], ['seccion', 'campo', 'valor'])
+        self.assertIn(['memoria', 'titulo', self.memoria.titulo], filas)
+        encabezados = [fila for fila in filas if fila and fila[0] == 'seccion'][1:]
+        self.assertEqual([fila[1:] for fila in encabezados], [columnas(s) for s in SECCIONES_EXPORTACION])
+        por_seccion = {
+            seccion: [fila for fila in filas if fila and fila[0] == seccion] for seccion in SECCIONES_EXPORTACION
+        }
+        self.assertEqual({seccion: len(filas) for seccion, filas in por_seccion.items()}, self.cantidades())
+        integrante = self.integrantes[0]
+        self.assertEqual(por_seccion['integrantes'][0][1:4], [
+            str(integrante.Persona_id), integrante.Persona.nombre, integrante.Persona.apellido,
+        ])
+
+    def test_jsonl(self):
+        lineas = [json.loads(linea) for linea in self.exportar('jsonl').decode('utf-8').splitlines()]
+        self.assertEqual(lineas[0]['seccion'], 'memoria')
+        self.assertEqual((lineas[0]['oidMemoriaAnual'], lineas[0]['titulo']), (self.memoria.pk, self.memoria.titulo))
+        cantidades = {seccion: 0 for seccion in SECCIONES_EXPORTACION}
+        for linea in lineas[1:]:
+            cantidades[linea['seccion']] += 1
+            self.assertEqual(set(linea) - {'seccion'}, set(columnas(linea['seccion'])))
+        self.assertEqual(cantidades, self.cantidades())
+        integrante = self.integrantes[0]
+        primero = next(linea for linea in lineas if linea['seccion'] == 'integrantes')
+        self.assertEqual(
+            (primero['Persona'], primero['persona_apellido']), (integrante.Persona_id, integrante.Persona.apellido)
+        )
+
+    def test_xlsx(self):
+        with zipfile.ZipFile(BytesIO(self.exportar('xlsx'))) as libro:
+            self.assertIsNone(libro.testzip())
+            self.assertIn('<sheet name="Integrantes" sheetId="2" r:id="rId2"/>', libro.read('xl/workbook.xml').decode())
+            self.assertIn('[Content_Types].xml', libro.namelist())
+            hojas = [
+                libro.read(f'xl/worksheets/sheet{n}.xml').decode()
+                for n in range(2, len(SECCIONES_EXPORTACION) + 2)
+            ]
+        for hoja, (seccion, cantidad) in zip(hojas, self.cantidades().items()):
+            with self.subTest(seccion=seccion):
+                # Encabezado más una fila por registro
+                self.assertEqual(hoja.count('<row>'), cantidad + 1)
+        self.assertIn(f'<t xml:space="preserve">{self.integrantes[0].Persona.apellido}</t>', hojas[0])
+
+    def test_cambio_en_una_relacion_invalida_la_exportacion(self):
+        self.exportar('csv')
+        # La segunda sale de la caché, de una sola vez
+        self.assertEqual(len(list(exportar_memoria(self.memoria, 'csv'))), 1)
+        persona = self.integrantes[0].Persona
+        with self.captureOnCommitCallbacks(execute=True):
+            persona.apellido = 'Renombrada'
+            persona.save()
+        self.assertIn(b'Renombrada', self.exportar('csv'))
+        with self.captureOnCommitCallbacks(execute=True):
+            IntegranteMemoria.objects.filter(pk=self.integrantes[0].pk).update(rol='Rol nuevo')
+            # QuerySet.update no dispara señales: el camino con versiones explícitas
+            incrementar_versiones(IntegranteMemoria)
+        self.assertIn(b'Rol nuevo', self.exportar('csv'))
+
+
+class ContrasenasTests(TestCase):
+    """Pool de hashing de un hilo con un hash bloqueado: 429 con la cola llena, 503 al vencer la espera."""
+
+    def setUp(self):
+        pool_hashing.cerrar()
+        metricas_hashing.clear()
+        self.addCleanup(pool_hashing.cerrar)
+        self.persona = Persona.objects.create(
+            nombre='Hash', apellido='Prueba', correo='hash@utn.edu.ar', contrasena=make_password('secreta'),
+            horasSemanales=0,
+        )
+        self.liberar = threading.Event()
+        self.addCleanup(self.liberar.set)
+
+    def ocupar_el_hilo(self):
+        """Deja el único hilo del pool ocupado hasta `self.liberar`."""
+        empezado = threading.Event()
+
+        def bloqueada():
+            empezado.set()
+            self.liberar.wait(10)
+
+        def pedir():
+            try:
+                pool_hashing.ejecutar('verificar', bloqueada)
+            except HashingNoDisponible:
+                # Con una espera corta también vence este pedido; el hash sigue ocupando el hilo
+                pass
+
+        hilo = threading.Thread(target=pedir)
+        hilo.start()
+        self.addCleanup(hilo.join)
+        self.assertTrue(empezado.wait(5))
+
+    def login(self, correo='hash@utn.edu.ar', contrasena='incorrecta'):
+        return APIClient().post('/api/auth/login/', {'correo': correo, 'contrasena': contrasena})
+
+    @override_settings(CONTRASENAS={'HILOS': 1, 'COLA_MAXIMA': 0, 'ESPERA_SEGUNDOS': 5, 'REINTENTAR_SEGUNDOS': 3})
+    def test_cola_llena_responde_429(self):
+        self.ocupar_el_hilo()
+        respuesta = self.login()
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertEqual(respuesta.headers['Retry-After'], '3')
+        self.assertEqual(metricas_hashing.rechazos, {'cola_llena': 1})
+        # No quedó nada encolado: solo el hash bloqueado
+        self.assertEqual(pool_hashing.pendientes, 1)
+        self.liberar.set()
+
+    @override_settings(CONTRASENAS={'HILOS': 1, 'COLA_MAXIMA': 1, 'ESPERA_SEGUNDOS': 0.2, 'REINTENTAR_SEGUNDOS': 3})
+    def test_espera_vencida_responde_503(self):
+        self.ocupar_el_hilo()
+        respuesta = self.login()
+        self.assertEqual(respuesta.status_code, 503)
+        self.assertEqual(respuesta.headers['Retry-After'], '3')
+        # El login y el pedido que bloquea el hilo
+        self.assertEqual(metricas_hashing.rechazos, {'espera': 2})
+        # El pedido vencido se canceló sin llegar a ocupar el hilo
+        self.assertEqual(pool_hashing.pendientes, 1)
+        self.liberar.set()
+        # Liberado el hilo, el pool vuelve a responder (con tiempo para un hash real)
+        with self.settings(CONTRASENAS={**settings.CONTRASENAS, 'ESPERA_SEGUNDOS': 30}):
+            self.assertEqual(self.login(contrasena='secreta').status_code, 200)
+
+    def test_correo_inexistente_hace_el_mismo_trabajo(self):
+        self.assertEqual(hash_ficticio.obtener().split('$')[:2], self.persona.contrasena.split('$')[:2])
+        tiempos = {}
+        for correo in ('hash@utn.edu.ar', 'nadie@utn.edu.ar'):
+            duraciones = []
+            for _ in range(3):
+                inicio = time.perf_counter()
+                self.assertEqual(self.login(correo=correo).status_code, 401)
+                duraciones.append(time.perf_counter() - inicio)
+            tiempos[correo] = min(duraciones)
+        # Mismo hasher y mismas iteraciones: sin el hash ficticio el inexistente tardaría casi nada
+        self.assertGreater(tiempos['nadie@utn.edu.ar'], tiempos['hash@utn.edu.ar'] / 2)
+
+
+class BackendQueFalla(BaseEmailBackend):
+    """Backend de correo que rechaza todos los envíos (para probar los reintentos)."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException('servidor no disponible')
+
+
+@override_settings(OUTBOX={'HILOS': 2, 'LOTE': 10, 'MAX_INTENTOS': 3, 'BACKOFF_BASE': 30, 'HUERFANO_MINUTOS': 15})
+class OutboxTests(TransactionTestCase):
+    """El despacho corre en hilos con su propia conexión: los datos tienen que estar confirmados."""
+
+    def test_recuperar_password_encola_sin_enviar_ni_mostrar_el_token(self):
+        Persona.objects.create(
+            nombre='Ana', apellido='Prueba', correo='ana@utn.edu.ar', contrasena='-', horasSemanales=0
+        )
+        salida = StringIO()
+        with redirect_stdout(salida):
+            respuesta = APIClient().post('/api/auth/recuperar-password/', {'correo': 'ana@utn.edu.ar'}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        correo = CorreoSaliente.objects.get()
+        self.assertEqual((correo.destinatario, correo.estado), ('ana@utn.edu.ar', CorreoSaliente.PENDIENTE))
+        self.assertIn('reset-password?token=', correo.mensaje)
+        self.assertNotIn('token=', salida.getvalue())
+
+    def test_despacho_envia_los_pendientes(self):
+        for i in range(3):
+            encolar_correo(f'destino{i}@utn.edu.ar', f'Asunto {i}', 'Mensaje')
+        self.assertEqual(despachar_pendientes(), (3, 3))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f'destino{i}@utn.edu.ar' for i in range(3)])
+        self.assertFalse(CorreoSaliente.objects.exclude(estado=CorreoSaliente.ENVIADO).exists())
+        self.assertEqual(despachar_pendientes(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND='app.tests.BackendQueFalla')
+    def test_reintentos_con_backoff_hasta_fallido(self):
+        correo = encolar_correo('destino@utn.edu.ar', 'Asunto', 'Mensaje')
+        for intento, espera in ((1, 30), (2, 60)):
+            antes = timezone.now()
+            self.assertEqual(despachar_pendientes(), (1, 0))
+            correo.refresh_from_db()
+            self.assertEqual((correo.estado, correo.intentos), (CorreoSaliente.PENDIENTE, intento))
+            self.assertIn('servidor no disponible', correo.ultimoError)
+            self.assertGreaterEqual(correo.proximoIntento, antes + timedelta(seconds=espera))
+            # Todavía no venció: no se toma de nuevo
+            self.assertEqual(despachar_pendientes(), (0, 0))
+            CorreoSaliente.objects.filter(pk=correo.pk).update(proximoIntento=timezone.now())
+
+        self.assertEqual(despachar_pendientes(), (1, 0))
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), (CorreoSaliente.FALLIDO, 3))
+        self.assertEqual(despachar_pendientes(), (0, 0))
+
+    def test_recupera_huerfanos_viejos(self):
+        viejo = encolar_correo('viejo@utn.edu.ar', 'Asunto', 'Mensaje')
+        reciente = encolar_correo('reciente@utn.edu.ar', 'Asunto', 'Mensaje')
+        CorreoSaliente.objects.filter(pk=viejo.pk).update(
+            estado=CorreoSaliente.ENVIANDO, proximoIntento=timezone.now() - timedelta(minutes=16)
+        )
+        CorreoSaliente.objects.filter(pk=reciente.pk).update(
+            estado=CorreoSaliente.ENVIANDO, proximoIntento=timezone.now()
+        )
+        self.assertEqual(recuperar_huerfanos(), 1)
+        self.assertEqual(CorreoSaliente.objects.get(pk=viejo.pk).estado, CorreoSaliente.PENDIENTE)
+        self.assertEqual(CorreoSaliente.objects.get(pk=reciente.pk).estado, CorreoSaliente.ENVIANDO)
+        self.assertEqual(despachar_pendientes(), (1, 1))
+        self.assertEqual([m.to for m in mail.outbox], [['viejo@utn.edu.ar']])
+
+    def test_continuo_recupera_huerfanos_en_cada_ronda(self):
+        rondas = []
+
+        def esperar(segundos):
+            rondas.append(segundos)
+            if len(rondas) == 1:
+                # Otro despachador murió con este correo tomado, con el comando ya corriendo
+                huerfano = encolar_correo('huerfano@utn.edu.ar', 'Asunto', 'Mensaje')
+                CorreoSaliente.objects.filter(pk=huerfano.pk).update(
+                    estado=CorreoSaliente.ENVIANDO, proximoIntento=timezone.now() - timedelta(minutes=16)
+                )
+            elif len(rondas) > 1:
+                raise KeyboardInterrupt()
+
+        salida = StringIO()
+        with mock.patch('app.management.commands.despachar_correos.time.sleep', esperar):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('despachar_correos', continuo=True, intervalo=0, stdout=salida)
+        self.assertIn('1 correos huérfanos vueltos a pendiente', salida.getvalue())
+        self.assertEqual([m.to for m in mail.outbox], [['huerfano@utn.edu.ar']])
+
+
+class VistasAsyncTests(CorpusTestCase):
+    """Las rutas de /api/async/ responden lo mismo que sus equivalentes sync."""
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        referencia_cache.clear()
+        persona_cache.clear()
+        persona = Persona.objects.first()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(persona)["access"]}')
+
+    def comparar(self, sync, asincronica):
+        """Retorna la respuesta async y cuántas consultas hizo por la conexión del request."""
+        esperada = self.client.get(sync)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(asincronica)
+        self.assertEqual(respuesta.status_code, esperada.status_code)
+        self.assertEqual(respuesta.json(), esperada.json())
+        return respuesta, len(consultas)
+
+    def test_memoria_completa(self):
+        memoria = MemoriaAnual.objects.first()
+        respuesta, consultas = self.comparar(
+            f'/api/memorias-anuales/{memoria.pk}/completa/', f'/api/async/memorias-anuales/{memoria.pk}/completa/'
+        )
+        self.assertTrue(respuesta.json()['integrantes'])
+        # En SQLite no hay fan-out: la memoria y sus cinco secciones, por la conexión del request
+        self.assertEqual(consultas, 6)
+        self.comparar('/api/memorias-anuales/0/completa/', '/api/async/memorias-anuales/0/completa/')
+
+    def test_estadisticas_grupo(self):
+        grupo = GrupoInvestigacion.objects.first()
+        _, consultas = self.comparar(
+            f'/api/grupos/{grupo.pk}/estadisticas/', f'/api/async/grupos/{grupo.pk}/estadisticas/'
+        )
+        self.assertEqual(consultas, 2 + len(TIPOS_PANEL))
+        self.comparar(
+            f'/api/grupos/{grupo.pk}/estadisticas/?desde=2020-01-01&hasta=2030-12-31',
+            f'/api/async/grupos/{grupo.pk}/estadisticas/?desde=2020-01-01&hasta=2030-12-31',
+        )
+
+    def test_referencia_y_listado(self):
+        self.comparar('/api/auth/opciones-perfil/', '/api/async/opciones-perfil/')
+        self.comparar('/api/auth/tipos-personal/', '/api/async/tipos-personal/')
+        respuesta, _ = self.comparar('/api/personas/?page_size=4', '/api/async/personas/?page_size=4')
+        self.assertIn('X-Next-Cursor', respuesta.headers)
+
+
+class ReferenciaCacheTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        referencia_cache.clear()
+
+    def version_autores(self):
+        return leer_versiones([Autor])[Autor][0]
+
+    def nombres_de_autores(self):
+        return sorted(autor['nombre'] for autor in APIClient().get('/api/autores/').json())
+
+    def test_la_version_sube_recien_al_confirmar(self):
+        antes = self.version_autores()
+        with self.captureOnCommitCallbacks(execute=True):
+            Autor.objects.create(nombre='Nueva', apellido='Autora')
+            self.assertEqual(self.version_autores(), antes)
+            # Un request que reconstruye antes del commit guarda la entrada con la versión vieja
+            self.nombres_de_autores()
+        self.assertEqual(self.version_autores(), antes + 1)
+        self.assertIn('Nueva', self.nombres_de_autores())
+
+    def test_rollback_no_invalida(self):
+        antes = self.version_autores()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Autor.objects.create(nombre='Descartada', apellido='Autora')
+                    raise RuntimeError()
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.version_autores(), antes)
+
+    def test_viewset_304_y_etag_nuevo_despues_de_escribir(self):
+        client = APIClient()
+        primera = client.get('/api/autores/')
+        etag = primera.headers['ETag']
+        self.assertEqual(client.get('/api/autores/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # La segunda respuesta sale de la caché de referencia con el mismo ETag
+        self.assertEqual(client.get('/api/autores/').headers['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post('/api/autores/', {'nombre': 'Otra', 'apellido': 'Autora'}).status_code, 201)
+        respuesta = client.get('/api/autores/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta.headers['ETag'], etag)
+        self.assertIn('Otra', {autor['nombre'] for autor in respuesta.json()})
+
+    def test_vista_suelta_304_y_etag_nuevo_despues_de_escribir(self):
+        client = APIClient()
+        etag = client.get('/api/auth/tipos-personal/').headers['ETag']
+        self.assertEqual(client.get('/api/auth/tipos-personal/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            TipoDePersonal.objects.create(nombre='Visitante')
+        respuesta = client.get('/api/auth/tipos-personal/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Visitante', {tipo['nombre'] for tipo in respuesta.json()})
+
+
+@override_settings(REPLICAS={'ALIAS': 'replica', 'STICKY_SEGUNDOS': 5, 'CACHE_ALIAS': 'default'})
+class ReplicasTests(TransactionTestCase):
+    """
+    'replica' es otra base de pruebas: lo que solo existe en una de las dos dice de
+    dónde leyó cada consulta. Sin la transacción de TestCase: dentro de un atomic() el
+    router lee de la primaria.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        caches['default'].clear()
+        referencia_cache.clear()
+        persona_cache.clear()
+        programa = ProgramaActividades.objects.create(anio=2024, objetivosEstrategicos='-')
+        grupo = GrupoInvestigacion.objects.create(
+            nombre='Réplica', facultadReginalAsignada='-', correo='replica@utn.edu.ar', organigrama='-',
+            sigla='REP', fuenteFinanciamiento='-', ProgramaActividades=programa,
+        )
+        self.persona = Persona.objects.create(
+            nombre='Ana', apellido='Réplica', correo='ana@utn.edu.ar', contrasena='-', horasSemanales=0,
+        )
+        otra = Persona.objects.create(
+            nombre='Solo', apellido='Réplica', correo='solo@utn.edu.ar', contrasena='-', horasSemanales=0,
+        )
+        self.memoria = MemoriaAnual.objects.create(ano=2024, GrupoInvestigacion=grupo)
+        # La réplica tiene lo mismo (con los mismos pk) y además una fila que la primaria no
+        for objeto in (programa, grupo, self.persona, otra, self.memoria):
+            type(objeto).objects.using('replica').bulk_create([objeto])
+        IntegranteMemoria.objects.using('replica').bulk_create([
+            IntegranteMemoria(MemoriaAnual=self.memoria, Persona=otra, rol='solo-en-replica')
+        ])
+        self.anonimo = APIClient()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(self.persona)["access"]}')
+
+    def nombres(self, client):
+        respuesta = client.get('/api/autores/')
+        self.assertEqual(respuesta.status_code, 200)
+        return {autor['nombre'] for autor in respuesta.json()}
+
+    def test_get_lee_de_la_replica(self):
+        Autor.objects.using('replica').bulk_create([Autor(nombre='EnReplica', apellido='-')])
+        Autor.objects.create(nombre='EnPrimaria', apellido='-')
+        self.assertEqual(self.nombres(self.anonimo), {'EnReplica'})
+
+    def test_escritura_y_lectura_posterior_en_la_primaria(self):
+        token = estado_request.set(EstadoRequest(lectura=True))
+        try:
+            self.assertEqual(Autor.objects.all().db, 'replica')
+            autor = Autor.objects.create(nombre='Nueva', apellido='-')
+            self.assertEqual(Autor.objects.all().db, 'default')
+            self.assertTrue(Autor.objects.filter(pk=autor.pk).exists())
+        finally:
+            estado_request.reset(token)
+        self.assertFalse(Autor.objects.using('replica').filter(pk=autor.pk).exists())
+
+    def test_post_escribe_en_la_primaria(self):
+        respuesta = self.client.post('/api/tipo-trabajos-publicados/', {'nombre': 'Reseña'}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertTrue(TipoTrabajoPublicado.objects.using('default').filter(nombre='Reseña').exists())
+        self.assertFalse(TipoTrabajoPublicado.objects.using('replica').filter(nombre='Reseña').exists())
+
+    def test_sticky_despues_de_escribir(self):
+        respuesta = self.client.post('/api/autores/', {'nombre': 'Recien', 'apellido': '-'}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        # Otro cliente lee de la réplica, que todavía no tiene el autor: la respuesta no se
+        # guarda en la caché de referencia ni lleva ETag
+        respuesta = self.anonimo.get('/api/autores/')
+        self.assertNotIn('Recien', {autor['nombre'] for autor in respuesta.json()})
+        self.assertNotIn('ETag', respuesta.headers)
+        # Quien escribió lee de la primaria en los requests siguientes
+        self.assertIn('Recien', self.nombres(self.client))
+        # Vencida la marca (acá, vaciando la caché) vuelve a leer de la réplica
+        caches['default'].clear()
+        self.assertNotIn('Recien', self.nombres(self.client))
+
+    def test_exportacion_streaming_lee_de_la_replica(self):
+        respuesta = self.anonimo.get(f'/api/memorias-anuales/{self.memoria.pk}/exportar/', {'formato': 'csv'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        # Las filas se consultan mientras se itera el cuerpo, ya fuera del middleware
+        self.assertIn('solo-en-replica', b''.join(respuesta.streaming_content).decode())
+
+
+class AccesoMetricasTests(TestCase):
+    url = '/api/internal/metricas/'
+
+    def test_sin_token_configurado_queda_cerrado(self):
+        # El cliente de pruebas llega desde 127.0.0.1, como detrás de un proxy local
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(METRICAS={'TOKEN': 'secreto'})
+    def test_requiere_el_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        respuesta = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'app_password_hash_pending', respuesta.content)
+
+    @override_settings(METRICAS={'CONFIAR_EN_RED': True})
+    def test_red_de_confianza_solo_si_se_configura(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='10.0.0.8').status_code, 403)
@@ -0,0 +1,158 @@
+"""
+Validación de campos únicos sin consultas repetidas.
+
+`UnicidadMixin` reemplaza los UniqueValidator que DRF agrega por cada campo
+`unique=True` (una consulta por campo) por una única consulta que busca todos los
+valores recibidos a la vez. Los mensajes salen de `error_messages['unique']` del
+campo del modelo.
+
+`errores_unicidad_en_lote` hace lo mismo para muchas filas a la vez (app/lotes.py):
+una consulta por campo único para todo el lote, más los choques dentro del lote.
+
+`ErroresIntegridadMixin` cubre la carrera entre esa consulta y el INSERT: traduce
+el IntegrityError al campo afectado a partir del nombre de la restricción que
+reporta la base (introspección de constraints), no buscando texto en el mensaje.
+"""
+import re
+from functools import lru_cache
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+
+def campos_unicos(modelo):
+    return [
+        campo for campo in modelo._meta.concrete_fields
+        if campo.unique and not campo.primary_key
+    ]
+
+
+def mensaje_unico(campo):
+    return campo.error_messages.get('unique') or f'Ya existe un registro con este {campo.verbose_name}.'
+
+
+@lru_cache(maxsize=None)
+def columnas_de_constraint(tabla, nombre):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, tabla)
+    return tuple(constraints.get(nombre, {}).get('columns') or ())
+
+
+def columnas_en_conflicto(error, modelo):
+    """
+    Columnas de la restricción única violada. PostgreSQL informa el nombre de la
+    restricción (diag.constraint_name), que se resuelve por introspección; SQLite
+    informa directamente `tabla.columna[, tabla.columna]`.
+    """
+    causa = error.__cause__ or error
+    nombre = getattr(getattr(causa, 'diag', None), 'constraint_name', None)
+    if nombre:
+        return columnas_de_constraint(modelo._meta.db_table, nombre)
+    coincidencia = re.match(r'UNIQUE constraint failed: (.+)', str(causa))
+    if coincidencia:
+        return tuple(c.strip().split('.')[-1] for c in coincidencia.group(1).split(','))
+    return ()
+
+
+def errores_de_integridad(error, modelo):
+    """Dict {campo: [mensaje]} para un IntegrityError, o None si no es de unicidad conocida."""
+    columnas = columnas_en_conflicto(error, modelo)
+    errores = {
+        campo.name: [mensaje_unico(campo)]
+        for campo in campos_unicos(modelo) if campo.column in columnas
+    }
+    return errores or None
+
+
+def errores_unicidad_en_lote(modelo, cambios):
+    """
+    {pk: {campo: [mensaje]}} de los valores únicos que chocan, para `cambios` = {pk:
+    validated_data}. Una fila del lote que cambia el campo libera su valor anterior.
+    """
+    errores = {}
+    for campo in campos_unicos(modelo):
+        nuevos = {
+            pk: getattr(datos[campo.name], 'pk', datos[campo.name]) for pk, datos in cambios.items()
+            if datos.get(campo.name) not in (None, '')
+        }
+        if not nuevos:
+            continue
+        por_valor = {}
+        for pk, valor in nuevos.items():
+            por_valor.setdefault(valor, []).append(pk)
+        ocupados = set(
+            modelo.objects.filter(**{f'{campo.attname}__in': list(por_valor)})
+            .exclude(pk__in=list(nuevos)).values_list(campo.attname, flat=True)
+        )
+        for valor, pks in por_valor.items():
+            if valor in ocupados or len(pks) > 1:
+                for pk in pks:
+                    errores.setdefault(pk, {})[campo.name] = [mensaje_unico(campo)]
+    return errores
+
+
+class UnicidadMixin:
+    """Para ModelSerializers: valida todos los campos únicos del modelo en una consulta."""
+
+    def get_extra_kwargs(self):
+        extra_kwargs = super().get_extra_kwargs()
+        for campo in campos_unicos(self.Meta.model):
+            # Sin UniqueValidator por campo: lo cubre validate() con una sola consulta
+            extra_kwargs.setdefault(campo.name, {}).setdefault('validators', [])
+        return extra_kwargs
+
+    def validate(self, data):
+        data = super().validate(data)
+        if self.context.get('unicidad_en_lote'):
+            # La valida errores_unicidad_en_lote para todas las filas juntas
+            return data
+        modelo = self.Meta.model
+        recibidos = {
+            campo: data[campo.name] for campo in campos_unicos(modelo)
+            if data.get(campo.name) not in (None, '')
+        }
+        if not recibidos:
+            return data
+
+        filtro = Q()
+        for campo, valor in recibidos.items():
+            filtro |= Q(**{campo.attname: getattr(valor, 'pk', valor)})
+        existentes = modelo.objects.filter(filtro)
+        if self.instance is not None:
+            existentes = existentes.exclude(pk=self.instance.pk)
+
+        errores = {}
+        for fila in existentes.values(*[campo.attname for campo in recibidos]):
+            for campo, valor in recibidos.items():
+                if fila[campo.attname] == getattr(valor, 'pk', valor):
+                    errores[campo.name] = mensaje_unico(campo)
+        if errores:
+            raise serializers.ValidationError(errores)
+        return data
+
+
+class ErroresIntegridadMixin:
+    """Para ModelViewSets: responde 400 con el mensaje del campo único violado."""
+
+    def create(self, request, *args, **kwargs):
+        try:
+            # El savepoint deja usable una transacción que envuelva al request
+            with transaction.atomic():
+                return super().create(request, *args, **kwargs)
+        except IntegrityError as e:
+            return self.respuesta_integridad(e)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().update(request, *args, **kwargs)
+        except IntegrityError as e:
+            return self.respuesta_integridad(e)
+
+    def respuesta_integridad(self, error):
+        errores = errores_de_integridad(error, self.get_queryset().model)
+        if errores is None:
+            errores = {'detail': 'Error de integridad en la base de datos.'}
+        return Response(errores, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,213 @@
+"""
+Versión por modelo y ETag/304 para los listados y detalles de los ViewSets.
+
+Cada modelo tiene un contador en la caché VERSIONES['CACHE_ALIAS'] (con varios
+workers, una caché compartida) que sube con cada cambio confirmado: las señales
+post_save/post_delete de todos los modelos de la app (ver signals.py) y, en los
+caminos que no disparan señales (bulk_create, QuerySet.update), la llamada explícita
+a `incrementar_versiones`. Un contador que falta en la caché (vaciada o expulsada)
+arranca en el instante actual en microsegundos, así nunca repite un valor anterior.
+
+`VersionesMixin` arma un ETag fuerte con las versiones de los modelos que lee la
+respuesta (el del queryset y los que recorre el serializer, ver app/relaciones.py),
+la ruta con sus parámetros y el formato. Si coincide con `If-None-Match` responde 304
+después de autenticar y verificar permisos, sin consultar el queryset ni serializar.
+
+Con réplica (app/replicas.py), un request que lee de la réplica poco después de un
+cambio puede recibir datos atrasados: en ese caso la respuesta sale sin ETag, para
+que el cliente no la guarde con la versión nueva.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .relaciones import relaciones_de_serializer
+from .replicas import lectura_en_replica, replicas_setting
+
+# Valores por defecto de settings.VERSIONES
+VERSIONES_DEFAULTS = {
+    'HABILITADO': True,
+    'CACHE_ALIAS': 'default',
+}
+
+
+def versiones_setting(nombre):
+    return getattr(settings, 'VERSIONES', {}).get(nombre, VERSIONES_DEFAULTS[nombre])
+
+
+def cache_versiones():
+    return caches[versiones_setting('CACHE_ALIAS')]
+
+
+def clave_version(modelo):
+    return f'versiones:{modelo._meta.label_lower}'
+
+
+def clave_cambio(modelo):
+    return f'versiones:{modelo._meta.label_lower}:cambio'
+
+
+def ahora_us():
+    return time.time_ns() // 1000
+
+
+def subir_versiones(modelos):
+    cache = cache_versiones()
+    ahora = ahora_us()
+    for modelo in modelos:
+        clave = clave_version(modelo)
+        if not cache.add(clave, ahora, None):
+            try:
+                cache.incr(clave)
+            except ValueError:
+                # Expulsada entre el add y el incr
+                cache.set(clave, ahora, None)
+    cache.set_many({clave_cambio(modelo): ahora for modelo in modelos}, None)
+
+
+def incrementar_versiones(*modelos):
+    """
+    Sube la versión de `modelos` cuando se confirma la transacción en curso (o ya, en
+    autocommit). Los cambios de una transacción se juntan en una sola subida por modelo.
+    """
+    conexion = transaction.get_connection()
+    if not hasattr(conexion, 'versiones_pendientes'):
+        conexion.versiones_pendientes = set()
+    pendientes = conexion.versiones_pendientes
+    pendientes.update(modelo._meta.concrete_model for modelo in modelos)
+
+    def confirmar():
+        # Después de un rollback quedan modelos de más: subirlos de nuevo es inofensivo
+        if pendientes:
+            modelos_confirmados = list(pendientes)
+            pendientes.clear()
+            subir_versiones(modelos_confirmados)
+
+    transaction.on_commit(confirmar)
+
+
+def leer_versiones(modelos):
+    """{modelo: (versión, instante del último cambio o None)}; inicializa las que faltan."""
+    cache = cache_versiones()
+    claves = [clave for modelo in modelos for clave in (clave_version(modelo), clave_cambio(modelo))]
+    valores = cache.get_many(claves)
+    faltantes = [modelo for modelo in modelos if clave_version(modelo) not in valores]
+    if faltantes:
+        ahora = ahora_us()
+        for modelo in faltantes:
+            cache.add(clave_version(modelo), ahora, None)
+        valores.update(cache.get_many([clave_version(modelo) for modelo in faltantes]))
+    return {
+        modelo: (valores.get(clave_version(modelo), 0), valores.get(clave_cambio(modelo)))
+        for modelo in modelos
+    }
+
+
+def etag_coincide(request, etag):
+    valor = request.headers.get('If-None-Match')
+    if not valor or etag is None:
+        return False
+    candidatos = [c.strip() for c in valor.split(',')]
+    return '*' in candidatos or any(c.removeprefix('W/') == etag for c in candidatos)
+
+
+def modelos_de_relaciones(modelo, caminos):
+    """El modelo y los que se recorren por `caminos` (a__b), con las tablas intermedias de los M2M."""
+    modelos = {modelo._meta.concrete_model}
+    for camino in caminos:
+        actual = modelo
+        for parte in camino.split('__'):
+            campo = actual._meta.get_field(parte)
+            if campo.many_to_many:
+                # ManyToManyRel (lado inverso) tiene `through`; el ManyToManyField lo tiene en remote_field
+                intermedia = getattr(campo, 'through', None) or campo.remote_field.through
+                modelos.add(intermedia._meta.concrete_model)
+            actual = campo.related_model
+            modelos.add(actual._meta.concrete_model)
+    return modelos
+
+
+def calcular_etag(versiones, ruta, formato):
+    partes = [f'{modelo._meta.label_lower}={version}' for modelo, (version, _) in sorted(
+        versiones.items(), key=lambda item: item[0]._meta.label_lower
+    )]
+    contenido = '\n'.join([ruta, formato, *partes]).encode()
+    return '"%s"' % hashlib.sha1(contenido).hexdigest()
+
+
+def recien_cambiado(versiones):
+    """True si algún modelo cambió hace menos de REPLICAS['STICKY_SEGUNDOS']."""
+    limite = ahora_us() - replicas_setting('STICKY_SEGUNDOS') * 1_000_000
+    return any(cambio is not None and cambio > limite for _, cambio in versiones.values())
+
+
+def etag_de_vista(vista, request, formato):
+    """(etag, versiones) de un list/retrieve de `vista` (un ViewSet con VersionesMixin)."""
+    versiones = leer_versiones(vista.modelos_de_respuesta())
+    return calcular_etag(versiones, request.get_full_path(), formato), versiones
+
+
+def admite_etag(versiones, response):
+    """False si la respuesta pudo leerse de una réplica atrasada: sale sin ETag."""
+    return response.status_code == 200 and not (lectura_en_replica() and recien_cambiado(versiones))
+
+
+def poner_etag(response, etag):
+    response['ETag'] = etag
+    if not response.has_header('Cache-Control'):
+        response['Cache-Control'] = 'private, no-cache'
+
+
+class NoModificado(Exception):
+    """Corta el request en `initial`: el cliente ya tiene la versión actual."""
+
+    def __init__(self, etag):
+        super().__init__(etag)
+        self.etag = etag
+
+
+class VersionesMixin:
+    """
+    Para ModelViewSets: ETag de list/retrieve derivado de las versiones de los modelos
+    y 304 ante `If-None-Match`. Se resuelve en `initial`, después de autenticar y
+    verificar permisos, así vale también para los ViewSets que redefinen list.
+    `versiones_modelos` suma modelos que la respuesta lee por fuera del serializer.
+    """
+    versiones_modelos = ()
+    acciones_con_etag = ('list', 'retrieve')
+
+    def modelos_de_respuesta(self):
+        modelo = self.get_queryset().model
+        select, prefetch = relaciones_de_serializer(self.get_serializer_class())
+        return modelos_de_relaciones(modelo, select + prefetch) | set(self.versiones_modelos)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag_versiones = None
+        if (
+            not versiones_setting('HABILITADO') or request.method not in ('GET', 'HEAD')
+            or self.action not in self.acciones_con_etag
+        ):
+            return
+        etag, versiones = etag_de_vista(self, request, request.accepted_renderer.media_type)
+        if etag_coincide(request, etag):
+            raise NoModificado(etag)
+        self.etag_versiones = (etag, versiones)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NoModificado):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': exc.etag})
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag_versiones', None) is not None:
+            etag, versiones = self.etag_versiones
+            if admite_etag(versiones, response):
+                poner_etag(response, etag)
+        return response
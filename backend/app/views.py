@@ -1,15 +1,14 @@
+import datetime
+import io
+
 from django.shortcuts import render
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth.hashers import make_password, check_password
-from django.core.mail import send_mail
-from django.conf import settings
-from django.db import IntegrityError
-from rest_framework.exceptions import ValidationError
 from .models import (
     ProgramaActividades, GrupoInvestigacion, InformeRendicionCuentas,
     Erogacion, ProyectoInvestigacion, LineaDeInvestigacion, Actividad,
@@ -34,12 +33,21 @@ from .serializers import (
     IntegranteMemoriaSerializer, ActividadMemoriaSerializer, PublicacionMemoriaSerializer, 
     PatenteMemoriaSerializer, ProyectoMemoriaSerializer
 )
-
-# Clase de paginación personalizada
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+from .pagination import KeysetPagination, StandardResultsSetPagination
+from .outbox import encolar_correo
+from .contrasenas import HashingNoDisponible, HashingSaturado, generar_hash, verificar_contrasena
+from .referencia import ReferenciaCacheMixin, responder_referencia
+from .metricas import MetricasMixin
+from .versiones import VersionesMixin
+from .relaciones import RelacionesMixin
+from .rendicion import resumen_rendicion
+from .estadisticas import estadisticas_grupo
+from .busqueda import FUENTES_BUSQUEDA, backend_busqueda, buscar as buscar_texto
+from .validacion import ErroresIntegridadMixin
+from .importacion import (
+    MAX_ERRORES_RESPUESTA, ArchivoIlegible, formato_desde_nombre, importar_trabajos, leer_filas
+)
+from .lotes import OperacionesEnLoteMixin
 
 # Create your views here.
 def get_token_for_user(persona):
@@ -70,12 +78,14 @@ def login(request):
     try:
         persona = Persona.objects.get(correo = correo)
     except Persona.DoesNotExist:
+        # Mismo trabajo que con un correo existente: el tiempo no revela si está registrado
+        verificar_contrasena(contrasena, None)
         return Response(
             {'error': 'Credenciales inválidas'},
             status = status.HTTP_401_UNAUTHORIZED
         )
     
-    if not check_password(contrasena, persona.contrasena):
+    if not verificar_contrasena(contrasena, persona.contrasena):
         return Response(
             {'error': 'Credenciales inválidas'},
             status = status.HTTP_401_UNAUTHORIZED
@@ -164,13 +174,16 @@ def register(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    # Fuera del try: si el pool de hashing está saturado responde 429/503
+    contrasena_hasheada = generar_hash(contrasena)
+    
     # Crear el usuario
     try:
         persona = Persona.objects.create(
             nombre=nombre,
             apellido=apellido,
             correo=correo,
-            contrasena=make_password(contrasena),
+            contrasena=contrasena_hasheada,
             horasSemanales=horas_semanales,
             tipoDePersonal=tipo_personal
         )
@@ -195,9 +208,10 @@ def get_tipos_personal(request):
     """
     Endpoint para obtener los tipos de personal disponibles.
     """
-    tipos = TipoDePersonal.objects.all()
-    tipos_list = [{'id': tipo.id, 'nombre': tipo.nombre} for tipo in tipos]
-    return Response(tipos_list, status=status.HTTP_200_OK)
+    def construir():
+        return lista_tipos_personal(), {}
+
+    return responder_referencia(request, 'tipos-personal', construir)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -284,7 +298,7 @@ def cambiar_contrasena(request, oidpersona):
         )
     
     # Verificar que la contraseña actual sea correcta
-    password_check = check_password(contrasena_actual, persona.contrasena)
+    password_check = verificar_contrasena(contrasena_actual, persona.contrasena)
     print(f"Verificación de contraseña actual: {password_check}")
     
     if not password_check:
@@ -304,7 +318,7 @@ def cambiar_contrasena(request, oidpersona):
     
     # Actualizar contraseña
     print("Actualizando contraseña...")
-    nueva_contrasena_hasheada = make_password(contrasena_nueva)
+    nueva_contrasena_hasheada = generar_hash(contrasena_nueva)
     print(f"Nueva contraseña hasheada: {nueva_contrasena_hasheada[:20]}...")
     persona.contrasena = nueva_contrasena_hasheada
     persona.save()
@@ -322,333 +336,391 @@ def cambiar_contrasena(request, oidpersona):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def listar_personas(request):
-    personas = Persona.objects.all()
+    paginator = KeysetPagination()
+    personas = paginator.paginate_queryset(
+        Persona.objects.select_related('tipoDePersonal'), request
+    )
     serializer = PersonaSerializer(personas, many=True)
     return Response({
         'personas': serializer.data
+    }, status=status.HTTP_200_OK, headers=paginator.get_pagination_headers())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def buscar(request):
+    """
+    Búsqueda de texto completo en publicaciones, patentes, proyectos, documentación
+    y trabajos presentados. Parámetros: `q`, `tipo` (uno o más, separados por coma),
+    `grupo`, `page` y `page_size`. Los resultados vienen ordenados por relevancia;
+    `facetas` cuenta las coincidencias por tipo.
+    """
+    q = request.query_params.get('q', '').strip()
+    if not q:
+        return Response({'q': 'Debe indicar un texto a buscar.'}, status=status.HTTP_400_BAD_REQUEST)
+    if backend_busqueda() is None:
+        return Response(
+            {'detail': 'La búsqueda no está disponible para este motor de base de datos.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+
+    tipos = [t for t in request.query_params.get('tipo', '').split(',') if t]
+    invalidos = [t for t in tipos if t not in FUENTES_BUSQUEDA]
+    if invalidos:
+        return Response(
+            {'tipo': f'Tipos inválidos: {", ".join(invalidos)}. Opciones: {", ".join(FUENTES_BUSQUEDA)}.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        grupo = int(request.query_params['grupo']) if request.query_params.get('grupo') else None
+        pagina = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', StandardResultsSetPagination.page_size)), 1),
+                        StandardResultsSetPagination.max_page_size)
+    except ValueError:
+        return Response({'detail': 'grupo, page y page_size deben ser números.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    resultados, facetas = buscar_texto(q, tipos=tipos, grupo=grupo, limite=page_size, desde=(pagina - 1) * page_size)
+    count = sum(n for tipo, n in facetas.items() if not tipos or tipo in tipos)
+    url = request.build_absolute_uri()
+    return Response({
+        'count': count,
+        'next': replace_query_param(url, 'page', pagina + 1) if pagina * page_size < count else None,
+        'previous': replace_query_param(url, 'page', pagina - 1) if pagina > 1 else None,
+        'facetas': {tipo: facetas.get(tipo, 0) for tipo in FUENTES_BUSQUEDA},
+        'results': resultados,
     }, status=status.HTTP_200_OK)
 
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_opciones_perfil(request):
     """
     Retorna las opciones disponibles para los campos del perfil
     """
-    from .models import TipoDePersonal, GrupoInvestigacion
-    
-    tipos_personal = TipoDePersonal.objects.all()
-    grupos = GrupoInvestigacion.objects.all()
-    
-    return Response({
-        'tiposPersonal': [{'id': tp.id, 'nombre': tp.nombre} for tp in tipos_personal],
-        'grupos': [{'id': g.oidGrupoInvestigacion, 'nombre': g.nombre} for g in grupos],
-        'gradosAcademicos': [
-            {'id': 1, 'nombre': 'Licenciatura'},
-            {'id': 2, 'nombre': 'Maestría'},
-            {'id': 3, 'nombre': 'Doctorado'},
-            {'id': 4, 'nombre': 'Post-Doctorado'}
-        ],
-        'categoriasUTN': [
-            {'id': 1, 'nombre': 'Categoría I'},
-            {'id': 2, 'nombre': 'Categoría II'},
-            {'id': 3, 'nombre': 'Categoría III'},
-            {'id': 4, 'nombre': 'Categoría IV'},
-            {'id': 5, 'nombre': 'Categoría V'}
-        ],
-        'dedicaciones': [
-            {'id': 1, 'nombre': 'Simple'},
-            {'id': 2, 'nombre': 'Semi-Exclusiva'},
-            {'id': 3, 'nombre': 'Exclusiva'}
-        ],
-        'programasIncentivos': [
-            {'id': 1, 'nombre': 'Programa Nacional de Incentivos'},
-            {'id': 2, 'nombre': 'Programa Provincial'},
-            {'id': 3, 'nombre': 'Otro'}
-        ],
-        'cursosCatedras': [
-            {'id': 1, 'nombre': 'Análisis Matemático'},
-            {'id': 2, 'nombre': 'Álgebra'},
-            {'id': 3, 'nombre': 'Física'},
-            {'id': 4, 'nombre': 'Química'},
-            {'id': 5, 'nombre': 'Programación'}
-        ],
-        'roles': [
-            {'id': 1, 'nombre': 'Profesor Titular'},
-            {'id': 2, 'nombre': 'Profesor Adjunto'},
-            {'id': 3, 'nombre': 'Jefe de Trabajos Prácticos'},
-            {'id': 4, 'nombre': 'Auxiliar Docente'}
-        ]
-    }, status=status.HTTP_200_OK)
+    return responder_referencia(request, 'opciones-perfil', construir_opciones_perfil)
+
+
+# Opciones del perfil que no salen de la base
+OPCIONES_PERFIL_FIJAS = {
+    'gradosAcademicos': [
+        {'id': 1, 'nombre': 'Licenciatura'},
+        {'id': 2, 'nombre': 'Maestría'},
+        {'id': 3, 'nombre': 'Doctorado'},
+        {'id': 4, 'nombre': 'Post-Doctorado'}
+    ],
+    'categoriasUTN': [
+        {'id': 1, 'nombre': 'Categoría I'},
+        {'id': 2, 'nombre': 'Categoría II'},
+        {'id': 3, 'nombre': 'Categoría III'},
+        {'id': 4, 'nombre': 'Categoría IV'},
+        {'id': 5, 'nombre': 'Categoría V'}
+    ],
+    'dedicaciones': [
+        {'id': 1, 'nombre': 'Simple'},
+        {'id': 2, 'nombre': 'Semi-Exclusiva'},
+        {'id': 3, 'nombre': 'Exclusiva'}
+    ],
+    'programasIncentivos': [
+        {'id': 1, 'nombre': 'Programa Nacional de Incentivos'},
+        {'id': 2, 'nombre': 'Programa Provincial'},
+        {'id': 3, 'nombre': 'Otro'}
+    ],
+    'cursosCatedras': [
+        {'id': 1, 'nombre': 'Análisis Matemático'},
+        {'id': 2, 'nombre': 'Álgebra'},
+        {'id': 3, 'nombre': 'Física'},
+        {'id': 4, 'nombre': 'Química'},
+        {'id': 5, 'nombre': 'Programación'}
+    ],
+    'roles': [
+        {'id': 1, 'nombre': 'Profesor Titular'},
+        {'id': 2, 'nombre': 'Profesor Adjunto'},
+        {'id': 3, 'nombre': 'Jefe de Trabajos Prácticos'},
+        {'id': 4, 'nombre': 'Auxiliar Docente'}
+    ]
+}
+
+
+def lista_tipos_personal():
+    return [{'id': tp.id, 'nombre': tp.nombre} for tp in TipoDePersonal.objects.all()]
+
+
+def lista_grupos():
+    grupos = GrupoInvestigacion.objects.only('oidGrupoInvestigacion', 'nombre')
+    return [{'id': g.oidGrupoInvestigacion, 'nombre': g.nombre} for g in grupos]
+
+
+def construir_opciones_perfil():
+    return {
+        'tiposPersonal': lista_tipos_personal(),
+        'grupos': lista_grupos(),
+        **OPCIONES_PERFIL_FIJAS,
+    }, {}
+
 
 # ViewSets for models
-class ProgramaActividadesViewSet(viewsets.ModelViewSet):
+class ProgramaActividadesViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = ProgramaActividades.objects.all()
     serializer_class = ProgramaActividadesSerializer
 
 
-class GrupoInvestigacionViewSet(viewsets.ModelViewSet):
+def leer_periodo(query_params):
+    """(desde, hasta) de `?desde=&hasta=` en AAAA-MM-DD; ValueError con el mensaje para el 400."""
+    try:
+        desde, hasta = (
+            datetime.date.fromisoformat(query_params[p]) if query_params.get(p) else None
+            for p in ('desde', 'hasta')
+        )
+    except ValueError:
+        raise ValueError('desde y hasta deben tener formato AAAA-MM-DD.')
+    if desde and hasta and desde > hasta:
+        raise ValueError('desde no puede ser posterior a hasta.')
+    return desde, hasta
+
+
+class GrupoInvestigacionViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = GrupoInvestigacion.objects.all()
     serializer_class = GrupoInvestigacionSerializer
     permission_classes = [AllowAny]
+    # De a PAGE_SIZE: el frontend sigue X-Next-Cursor (ver app/pagination.py)
+    paginar = True
+
+    @action(detail=True, methods=['get'], url_path='resumen-financiero', permission_classes=[IsAuthenticated])
+    def resumen_financiero(self, request, pk=None):
+        """Totales de erogaciones del grupo, por período, informe y tipo (opcional `?periodo=`)."""
+        grupo = self.get_object()
+        periodo = request.query_params.get('periodo') or None
+        return Response(resumen_rendicion(grupo=grupo.pk, periodo=periodo), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def estadisticas(self, request, pk=None):
+        """
+        Panel del grupo: trabajos por estado y tipo, patentes, registros, proyectos,
+        equipamiento, transferencia y personal. Se lee de la tabla EstadisticaGrupo que
+        mantienen las señales. `desde`/`hasta` (AAAA-MM-DD) definen qué proyectos están activos.
+        """
+        grupo = self.get_object()
+        try:
+            desde, hasta = leer_periodo(request.query_params)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(estadisticas_grupo(grupo.pk, desde, hasta), status=status.HTTP_200_OK)
 
 
-class InformeRendicionCuentasViewSet(viewsets.ModelViewSet):
+class InformeRendicionCuentasViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = InformeRendicionCuentas.objects.all()
     serializer_class = InformeRendicionCuentasSerializer
+    filterset_fields = ['GrupoInvestigacion', 'periodoReportado']
+
+    @action(detail=True, methods=['get'])
+    def resumen(self, request, pk=None):
+        """Totales, balance y desglose por tipo de las erogaciones del informe."""
+        informe = self.get_object()
+        return Response(
+            resumen_rendicion(grupo=informe.GrupoInvestigacion_id, informe=informe.pk), status=status.HTTP_200_OK
+        )
 
 
-class ErogacionViewSet(viewsets.ModelViewSet):
+class ErogacionViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = Erogacion.objects.all()
     serializer_class = ErogacionSerializer
+    filterset_fields = ['InformeRendicionCuentas', 'tipoErogacion']
+
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Totales, balance y desgloses (por tipo, informe, período y grupo) calculados en
+        la base. Filtros opcionales: `grupo`, `periodo` e `informe`.
+        """
+        try:
+            grupo = int(request.query_params['grupo']) if request.query_params.get('grupo') else None
+            informe = int(request.query_params['informe']) if request.query_params.get('informe') else None
+        except ValueError:
+            return Response({'detail': 'grupo e informe deben ser números.'}, status=status.HTTP_400_BAD_REQUEST)
+        periodo = request.query_params.get('periodo') or None
+        return Response(resumen_rendicion(grupo=grupo, periodo=periodo, informe=informe), status=status.HTTP_200_OK)
 
 
-class ProyectoInvestigacionViewSet(viewsets.ModelViewSet):
+class ProyectoInvestigacionViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = ProyectoInvestigacion.objects.all()
     serializer_class = ProyectoInvestigacionSerializer
+    filterset_fields = {
+        'GrupoInvestigacion': ['exact'],
+        'fechaInicio': ['exact', 'gte', 'lte'],
+        'fechaFinalizacion': ['exact', 'gte', 'lte'],
+    }
 
 
-class LineaDeInvestigacionViewSet(viewsets.ModelViewSet):
+class LineaDeInvestigacionViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = LineaDeInvestigacion.objects.all()
     serializer_class = LineaDeInvestigacionSerializer
 
 
-class ActividadViewSet(viewsets.ModelViewSet):
+class ActividadViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = Actividad.objects.all()
     serializer_class = ActividadSerializer
 
 
-class PersonaViewSet(viewsets.ModelViewSet):
+class PersonaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = Persona.objects.all()
     serializer_class = PersonaSerializer
+    filterset_fields = ['GrupoInvestigacion', 'tipoDePersonal']
 
 
-class ActividadDocenteViewSet(viewsets.ModelViewSet):
+class ActividadDocenteViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = ActividadDocente.objects.all()
     serializer_class = ActividadDocenteSerializer
 
 
-class InvestigadorDocenteViewSet(viewsets.ModelViewSet):
+class InvestigadorDocenteViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = InvestigadorDocente.objects.all()
     serializer_class = InvestigadorDocenteSerializer
 
 
-class BecarioPersonalFormacionViewSet(viewsets.ModelViewSet):
+class BecarioPersonalFormacionViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = BecarioPersonalFormacion.objects.all()
     serializer_class = BecarioPersonalFormacionSerializer
 
 
-class InvestigadorViewSet(viewsets.ModelViewSet):
+class InvestigadorViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = Investigador.objects.all()
     serializer_class = InvestigadorSerializer
 
 
-class DocumentacionBibliotecaViewSet(viewsets.ModelViewSet):
+class DocumentacionBibliotecaViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = DocumentacionBiblioteca.objects.all()
     serializer_class = DocumentacionBibliotecaSerializer
 
 
-class TrabajoPublicadoViewSet(viewsets.ModelViewSet):
+class TrabajoPublicadoViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, ErroresIntegridadMixin, OperacionesEnLoteMixin, viewsets.ModelViewSet):
     queryset = TrabajoPublicado.objects.all()
     serializer_class = TrabajoPublicadoSerializer
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
-    
-    def create(self, request, *args, **kwargs):
+    filterset_fields = ['estado', 'GrupoInvestigacion']
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Importa trabajos publicados desde un archivo CSV o JSONL (campo `archivo`).
+        Opcionales: `formato` (csv/jsonl, por defecto según la extensión) y
+        `GrupoInvestigacion` para las filas que no lo indiquen.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'archivo': 'Debe adjuntar un archivo CSV o JSONL.'}, status=status.HTTP_400_BAD_REQUEST)
+        formato = request.data.get('formato') or formato_desde_nombre(archivo.name)
+        if formato not in ('csv', 'jsonl'):
+            return Response({'formato': 'Debe ser csv o jsonl.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Solo se detallan las primeras MAX_ERRORES_RESPUESTA filas rechazadas: la memoria
+        # usada no crece con el archivo; el total está en `rechazados`
+        errores = []
+
+        def al_rechazar(numero, e):
+            if len(errores) < MAX_ERRORES_RESPUESTA:
+                errores.append({'fila': numero, 'errores': e})
+
+        # El archivo subido se lee línea a línea; Django lo guarda en disco si es grande
+        texto = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
         try:
-            return super().create(request, *args, **kwargs)
-        except ValidationError as e:
-            # El serializer ya maneja los mensajes en español, solo los pasamos
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except IntegrityError as e:
-            error_msg = str(e)
-            if 'titulo' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe un trabajo publicado con este título.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            elif 'issn' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe un trabajo publicado con este ISSN.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            return Response(
-                {'detail': 'Error de integridad en la base de datos.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    def update(self, request, *args, **kwargs):
-        try:
-            return super().update(request, *args, **kwargs)
-        except ValidationError as e:
-            # El serializer ya maneja los mensajes en español, solo los pasamos
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except IntegrityError as e:
-            error_msg = str(e)
-            if 'titulo' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe un trabajo publicado con este título.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            elif 'issn' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe un trabajo publicado con este ISSN.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            return Response(
-                {'detail': 'Error de integridad en la base de datos.'},
-                status=status.HTTP_400_BAD_REQUEST
+            resumen = importar_trabajos(
+                leer_filas(texto, formato), grupo=request.data.get('GrupoInvestigacion'), al_rechazar=al_rechazar,
             )
+        except ArchivoIlegible as e:
+            # Los lotes anteriores ya se confirmaron: se informa qué quedó importado
+            return Response({
+                'archivo': f'No se pudo leer el archivo después de la fila {e.resumen["ultimaFila"]}: {e}',
+                **e.resumen,
+                'errores': errores,
+                'erroresOmitidos': e.resumen['rechazados'] - len(errores),
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            **resumen, 'errores': errores, 'erroresOmitidos': resumen['rechazados'] - len(errores),
+        }, status=status.HTTP_200_OK)
 
 
-class ActividadTransferenciaViewSet(viewsets.ModelViewSet):
+class ActividadTransferenciaViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = ActividadTransferencia.objects.all()
     serializer_class = ActividadTransferenciaSerializer
 
 
-class ParteExternaViewSet(viewsets.ModelViewSet):
+class ParteExternaViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = ParteExterna.objects.all()
     serializer_class = ParteExternaSerializer
 
 
-class EquipamientoInfraestructuraViewSet(viewsets.ModelViewSet):
+class EquipamientoInfraestructuraViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = EquipamientoInfraestructura.objects.all()
     serializer_class = EquipamientoInfraestructuraSerializer
 
 
-class TrabajoPresentadoViewSet(viewsets.ModelViewSet):
+class TrabajoPresentadoViewSet(MetricasMixin, VersionesMixin, ErroresIntegridadMixin, OperacionesEnLoteMixin, viewsets.ModelViewSet):
     queryset = TrabajoPresentado.objects.all()
     serializer_class = TrabajoPresentadoSerializer
     pagination_class = StandardResultsSetPagination
-    
-    def create(self, request, *args, **kwargs):
-        try:
-            return super().create(request, *args, **kwargs)
-        except ValidationError as e:
-            # El serializer ya maneja los mensajes en español, solo los pasamos
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except IntegrityError as e:
-            error_msg = str(e)
-            if 'titulotrabajo' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe un trabajo presentado con este título.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            return Response(
-                {'detail': 'Error de integridad en la base de datos.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    def update(self, request, *args, **kwargs):
-        try:
-            return super().update(request, *args, **kwargs)
-        except ValidationError as e:
-            # El serializer ya maneja los mensajes en español, solo los pasamos
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except IntegrityError as e:
-            error_msg = str(e)
-            if 'titulotrabajo' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe un trabajo presentado con este título.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            return Response(
-                {'detail': 'Error de integridad en la base de datos.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
 
-class ActividadXPersonaViewSet(viewsets.ModelViewSet):
+class ActividadXPersonaViewSet(MetricasMixin, VersionesMixin, viewsets.ModelViewSet):
     queryset = ActividadXPersona.objects.all()
     serializer_class = ActividadXPersonaSerializer
 
 
-class PatenteViewSet(viewsets.ModelViewSet):
+class PatenteViewSet(MetricasMixin, VersionesMixin, ErroresIntegridadMixin, OperacionesEnLoteMixin, viewsets.ModelViewSet):
     queryset = Patente.objects.all()
     serializer_class = PatenteSerializer
     pagination_class = StandardResultsSetPagination
-    
-    def create(self, request, *args, **kwargs):
-        try:
-            return super().create(request, *args, **kwargs)
-        except ValidationError as e:
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except IntegrityError as e:
-            error_msg = str(e)
-            if 'numero' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe una patente con este número.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            return Response(
-                {'detail': 'Error de integridad en la base de datos.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-    def update(self, request, *args, **kwargs):
-        try:
-            return super().update(request, *args, **kwargs)
-        except ValidationError as e:
-            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
-        except IntegrityError as e:
-            error_msg = str(e)
-            if 'numero' in error_msg.lower() and 'unique' in error_msg.lower():
-                return Response(
-                    {'detail': 'Ya existe una patente con este número.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            return Response(
-                {'detail': 'Error de integridad en la base de datos.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
 
-class AutorViewSet(viewsets.ModelViewSet):
+class AutorViewSet(MetricasMixin, VersionesMixin, ReferenciaCacheMixin, viewsets.ModelViewSet):
+    referencia_clave = 'autores'
     queryset = Autor.objects.all()
     serializer_class = AutorSerializer
     permission_classes = [AllowAny]
 
 
-class TipoTrabajoPublicadoViewSet(viewsets.ModelViewSet):
+class TipoTrabajoPublicadoViewSet(MetricasMixin, VersionesMixin, ReferenciaCacheMixin, viewsets.ModelViewSet):
+    referencia_clave = 'tipo-trabajos-publicados'
     queryset = TipoTrabajoPublicado.objects.all()
     serializer_class = TipoTrabajoPublicadoSerializer
     permission_classes = [AllowAny]
 
-class RegistroViewSet(viewsets.ModelViewSet):
+class RegistroViewSet(MetricasMixin, VersionesMixin, OperacionesEnLoteMixin, viewsets.ModelViewSet):
     queryset = Registro.objects.all()
     serializer_class = RegistroSerializer
     pagination_class = StandardResultsSetPagination
 
 
-class TipoDeRegistroViewSet(viewsets.ModelViewSet):
+class TipoDeRegistroViewSet(MetricasMixin, VersionesMixin, ReferenciaCacheMixin, viewsets.ModelViewSet):
+    referencia_clave = 'tipo-registros'
     queryset = TipoDeRegistro.objects.all()
     serializer_class = TipoDeRegistroSerializer
 
 
-class IntegranteMemoriaViewSet(viewsets.ModelViewSet):
+class IntegranteMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = IntegranteMemoria.objects.all()
     serializer_class = IntegranteMemoriaSerializer
     filterset_fields = ['MemoriaAnual']
 
 
-class ActividadMemoriaViewSet(viewsets.ModelViewSet):
+class ActividadMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = ActividadMemoria.objects.all()
     serializer_class = ActividadMemoriaSerializer
     filterset_fields = ['MemoriaAnual']
 
 
-class PublicacionMemoriaViewSet(viewsets.ModelViewSet):
+class PublicacionMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = PublicacionMemoria.objects.all()
     serializer_class = PublicacionMemoriaSerializer
     filterset_fields = ['MemoriaAnual']
 
 
-class PatenteMemoriaViewSet(viewsets.ModelViewSet):
+class PatenteMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = PatenteMemoria.objects.all()
     serializer_class = PatenteMemoriaSerializer
     filterset_fields = ['MemoriaAnual']
 
 
-class ProyectoMemoriaViewSet(viewsets.ModelViewSet):
+class ProyectoMemoriaViewSet(MetricasMixin, VersionesMixin, RelacionesMixin, viewsets.ModelViewSet):
     queryset = ProyectoMemoria.objects.all()
     serializer_class = ProyectoMemoriaSerializer
     filterset_fields = ['MemoriaAnual']
@@ -691,7 +763,8 @@ def recuperar_password(request):
         # URL de recuperación
         reset_url = f"http://localhost:5173/reset-password?token={token}"
         
-        # Enviar email
+        # Encolar el email: lo envía el comando despachar_correos, así la respuesta
+        # no depende del servidor SMTP ni revela si el correo existe
         subject = 'Recuperación de Contraseña - UTN'
         message = f'''
 Hola {persona.nombre},
@@ -709,26 +782,8 @@ Saludos,
 Equipo UTN
         '''
         
-        print(f"Intentando enviar email a: {correo}")
-        print(f"Desde: {settings.DEFAULT_FROM_EMAIL}")
-        
-        try:
-            result = send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [correo],
-                fail_silently=False,
-            )
-            print(f"✓ Email enviado exitosamente (result={result})")
-            print(f"Token: {token}")
-            print(f"Enlace: {reset_url}")
-        except Exception as e:
-            print(f"✗ Error al enviar email: {type(e).__name__}: {str(e)}")
-            print(f"Token para desarrollo: {token}")
-            print(f"Enlace para desarrollo: {reset_url}")
-            import traceback
-            traceback.print_exc()
+        encolar_correo(correo, subject, message)
+        print(f"✓ Email encolado para: {correo}")
         
     except Persona.DoesNotExist:
         print(f"✗ No existe persona con email: {correo}")
@@ -795,7 +850,7 @@ def restablecer_password(request):
             print(f"✓ Persona encontrada: {persona.nombre} {persona.apellido}")
             
             # Verificar que la nueva contraseña no sea igual a la actual
-            if check_password(nueva_password, persona.contrasena):
+            if verificar_contrasena(nueva_password, persona.contrasena):
                 print("✗ Error: La nueva contraseña es idéntica a la actual")
                 return Response(
                     {'error': 'La nueva contraseña no puede ser igual a la contraseña actual'},
@@ -803,7 +858,7 @@ def restablecer_password(request):
                 )
             
             # Actualizar la contraseña
-            persona.contrasena = make_password(nueva_password)
+            persona.contrasena = generar_hash(nueva_password)
             persona.save()
             
             print(f"✓ Contraseña actualizada exitosamente")
@@ -821,6 +876,9 @@ def restablecer_password(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    except (HashingSaturado, HashingNoDisponible):
+        # 429/503 del pool de hashing, no un token inválido
+        raise
     except Exception as e:
         print(f"✗ Error al procesar token: {type(e).__name__}: {str(e)}")
         import traceback
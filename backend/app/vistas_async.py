@@ -0,0 +1,275 @@
+"""
+Vistas de lectura async para los GET más pedidos, servidas bajo /api/async/ por la
+misma aplicación ASGI (core/asgi.py) que las vistas sync de DRF.
+
+Bajo ASGI una vista sync ocupa un hilo durante todo el request, incluida la espera a
+la base. Estas vistas son corrutinas: mientras esperan, el event loop atiende otros
+requests, y las consultas independientes de un mismo pedido corren a la vez con
+asyncio.gather.
+
+El ORM async de Django (5.x) ejecuta las consultas de un request de a una, en el hilo
+de ese request. Para que el gather sea concurrente de verdad, cada rama corre con
+`en_paralelo`: en un hilo de `hilos_consultas` (VISTAS_ASYNC['HILOS_CONSULTAS']) con
+la conexión de ese hilo. Los hilos son fijos, así que la conexión se reutiliza entre
+pedidos mientras CONN_MAX_AGE lo permita, o vuelve al pool de psycopg al terminar cada
+rama. Como en la vista sync en autocommit, cada consulta lee su propio snapshot.
+
+En SQLite no hay fan-out: las lecturas no ganan nada en paralelo y cada hilo abriría
+su conexión (con sus PRAGMA) por rama; las funciones corren en orden en el hilo del
+request, con la misma conexión que las vistas sync. Las consultas sueltas (la página
+de un listado, los tipos de personal) usan el ORM async directamente.
+
+- memorias-anuales/<pk>/completa/: la memoria y sus cinco tablas intermedias a la vez.
+- grupos/<pk>/estadisticas/: panel del grupo; filas de EstadisticaGrupo, existencia
+  del grupo y nombres de los tipos a la vez.
+- opciones-perfil/ y tipos-personal/: datos de referencia con la misma caché y ETag
+  que las vistas sync (app/referencia.py).
+- <prefijo>/: listado de los viewsets del router que usan el list y la paginación por
+  cursor de DRF sin cambios (ver `admite_listado_async` y core/urls.py), con el ETag
+  por versiones de app/versiones.py.
+
+Las respuestas son las mismas que las de las vistas sync equivalentes. Autenticación
+JWT, permisos, filtros y serializers son los de DRF; el enrutado a la réplica y las
+métricas siguen funcionando porque viajan en ContextVars.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from rest_framework import exceptions, mixins
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import PersonaJWTAuthentication
+from .estadisticas import TIPOS_PANEL, armar_estadisticas, filas_estadisticas
+from .memoria_views import RELACIONES_MEMORIA, MemoriaAnualViewSet
+from .models import GrupoInvestigacion, MemoriaAnual, TipoDePersonal
+from .pagination import KeysetPagination
+from .referencia import cabeceras, referencia_cache
+from .relaciones import relaciones_de_serializer
+from .serializers import MemoriaAnualSerializer
+from .versiones import admite_etag, etag_coincide, etag_de_vista, poner_etag, versiones_setting
+from .views import OPCIONES_PERFIL_FIJAS, leer_periodo, lista_grupos, lista_tipos_personal
+
+# Clave del payload de /completa/ -> (tabla intermedia, serializer)
+SECCIONES_COMPLETA = {
+    clave: (modelo, dict(MemoriaAnualViewSet.SERIALIZERS_COMPLETA.values())[modelo])
+    for clave, (modelo, *_) in RELACIONES_MEMORIA.items()
+}
+
+
+def respuesta_json(data, status=200, headers=None):
+    contenido = JSONRenderer().render(data) if data is not None else b''
+    return HttpResponse(contenido, status=status, content_type='application/json', headers=headers)
+
+
+def respuesta_error(request, error):
+    """La respuesta que arma el exception_handler de DRF para una APIException."""
+    headers = {}
+    if isinstance(error, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = PersonaJWTAuthentication().authenticate_header(request)
+    data = error.detail if isinstance(error.detail, (list, dict)) else {'detail': error.detail}
+    return respuesta_json(data, error.status_code, headers)
+
+
+def no_encontrado(modelo):
+    # El mismo mensaje que get_object() de DRF (Http404 de get_object_or_404)
+    return exceptions.NotFound(f'No {modelo._meta.object_name} matches the given query.')
+
+
+def verificar_permisos(request, permisos, vista=None):
+    for permiso in permisos:
+        if not permiso.has_permission(request, vista):
+            if request.authenticators and not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permiso, 'message', None))
+
+
+def lectura_async(permisos=()):
+    """
+    Vista async de solo lectura: recibe el Request de DRF ya autenticado, con
+    `permisos` (clases de DRF) verificados, y las APIException se responden como en DRF.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            request = Request(request, authenticators=[PersonaJWTAuthentication()])
+            try:
+                if request.method not in ('GET', 'HEAD'):
+                    raise exceptions.MethodNotAllowed(request.method)
+                # Autenticar puede leer la Persona de la base
+                await sync_to_async(getattr)(request, 'user')
+                verificar_permisos(request, [permiso() for permiso in permisos])
+                return await vista(request, *args, **kwargs)
+            except exceptions.APIException as error:
+                return respuesta_error(request, error)
+        return envoltura
+    return decorador
+
+
+VISTAS_ASYNC_DEFAULTS = {
+    'HILOS_CONSULTAS': 16,
+}
+
+
+def vistas_async_setting(nombre):
+    return getattr(settings, 'VISTAS_ASYNC', {}).get(nombre, VISTAS_ASYNC_DEFAULTS[nombre])
+
+
+class HilosConsultas:
+    """Executor propio de `en_paralelo`, creado en el primer pedido; acota las conexiones en uso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=vistas_async_setting('HILOS_CONSULTAS'), thread_name_prefix='consultas-async'
+                )
+            return self._executor
+
+
+hilos_consultas = HilosConsultas()
+
+
+def consulta_aislada(funcion):
+    def correr():
+        # Como al empezar y terminar un request: solo cierra la conexión del hilo si ya
+        # venció CONN_MAX_AGE o quedó inutilizable (con pool, la devuelve)
+        close_old_connections()
+        try:
+            return funcion()
+        finally:
+            close_old_connections()
+    return sync_to_async(correr, thread_sensitive=False, executor=hilos_consultas.executor())()
+
+
+def admite_paralelo():
+    return connection.vendor != 'sqlite'
+
+
+async def en_paralelo(*funciones):
+    """
+    Corre cada función (consultas sync) en un hilo de `hilos_consultas`, a la vez;
+    en SQLite, en orden en el hilo del request. Resultados en el orden de `funciones`.
+    """
+    if not admite_paralelo():
+        return await sync_to_async(lambda: [funcion() for funcion in funciones])()
+    return await asyncio.gather(*(consulta_aislada(funcion) for funcion in funciones))
+
+
+def serializar_memoria(pk, contexto):
+    select = relaciones_de_serializer(MemoriaAnualSerializer)[0]
+    memoria = MemoriaAnual.objects.select_related(*select).filter(pk=pk).first()
+    return None if memoria is None else MemoriaAnualSerializer(memoria, context=contexto).data
+
+
+def serializar_seccion(pk, modelo, serializer, contexto):
+    filas = modelo.objects.filter(MemoriaAnual_id=pk).select_related(*relaciones_de_serializer(serializer)[0])
+    return serializer(filas, many=True, context=contexto).data
+
+
+@lectura_async()
+async def memoria_completa(request, pk):
+    """Como MemoriaAnualViewSet.completa: la memoria con sus cinco tablas intermedias."""
+    contexto = {'request': request}
+    data, *secciones = await en_paralelo(
+        functools.partial(serializar_memoria, pk, contexto),
+        *(
+            functools.partial(serializar_seccion, pk, modelo, serializer, contexto)
+            for modelo, serializer in SECCIONES_COMPLETA.values()
+        ),
+    )
+    if data is None:
+        raise no_encontrado(MemoriaAnual)
+    data.update(zip(SECCIONES_COMPLETA, secciones))
+    return respuesta_json(data)
+
+
+def nombres_de(modelo):
+    return dict(modelo.objects.values_list('pk', 'nombre'))
+
+
+@lectura_async(permisos=[IsAuthenticated])
+async def estadisticas_grupo(request, pk):
+    """Como GrupoInvestigacionViewSet.estadisticas, con `?desde=&hasta=`."""
+    existe, por_metrica, *nombres = await en_paralelo(
+        GrupoInvestigacion.objects.filter(pk=pk).exists,
+        functools.partial(filas_estadisticas, pk),
+        # Tablas de tipos chicas: se leen enteras sin esperar a saber qué ids aparecen
+        *(functools.partial(nombres_de, modelo) for modelo in TIPOS_PANEL.values()),
+    )
+    if not existe:
+        raise no_encontrado(GrupoInvestigacion)
+    try:
+        desde, hasta = leer_periodo(request.query_params)
+    except ValueError as e:
+        return respuesta_json({'detail': str(e)}, 400)
+    return respuesta_json(armar_estadisticas(pk, por_metrica, dict(zip(TIPOS_PANEL, nombres)), desde, hasta))
+
+
+async def responder_referencia_async(request, clave, construir, variante=''):
+    """Como referencia.responder_referencia; `construir` es async."""
+    etag, data, headers = await referencia_cache.aobtener(clave, variante, construir)
+    headers = cabeceras(headers, etag)
+    if etag_coincide(request, etag):
+        return respuesta_json(None, 304, headers)
+    return respuesta_json(data, 200, headers)
+
+
+@lectura_async()
+async def opciones_perfil(request):
+    async def construir():
+        tipos_personal, grupos = await en_paralelo(lista_tipos_personal, lista_grupos)
+        return {'tiposPersonal': tipos_personal, 'grupos': grupos, **OPCIONES_PERFIL_FIJAS}, {}
+
+    return await responder_referencia_async(request, 'opciones-perfil', construir)
+
+
+@lectura_async()
+async def tipos_personal(request):
+    async def construir():
+        return [{'id': tp.id, 'nombre': tp.nombre} async for tp in TipoDePersonal.objects.all()], {}
+
+    return await responder_referencia_async(request, 'tipos-personal', construir)
+
+
+def admite_listado_async(viewset):
+    """Viewsets cuyo listado es el de DRF sin cambios, con paginación por cursor."""
+    paginacion = viewset.pagination_class
+    return (
+        viewset.list is mixins.ListModelMixin.list
+        and paginacion is not None and issubclass(paginacion, KeysetPagination)
+    )
+
+
+@lectura_async()
+async def listado(request, viewset):
+    """GET /api/async/<prefijo>/: mismo cuerpo, headers de cursor y ETag/304 que el listado sync."""
+    vista = viewset(request=request, args=(), kwargs={}, format_kwarg=None, action='list')
+    verificar_permisos(request, vista.get_permissions(), vista)
+    etag = None
+    if versiones_setting('HABILITADO'):
+        etag, versiones = await sync_to_async(etag_de_vista)(vista, request, JSONRenderer.media_type)
+        if etag_coincide(request, etag):
+            return respuesta_json(None, 304, {'ETag': etag})
+    # Los filtros validan sus valores con consultas (p. ej. que exista la FK)
+    queryset = await sync_to_async(lambda: vista.filter_queryset(vista.get_queryset()))()
+    pagina = await vista.paginator.apaginate_queryset(queryset, request, vista)
+    filas = pagina if pagina is not None else [fila async for fila in queryset]
+    # Algún serializer puede leer relaciones que no vienen en el JOIN
+    data = await sync_to_async(lambda: vista.get_serializer(filas, many=True).data)()
+    headers = vista.paginator.get_pagination_headers() if pagina is not None else None
+    response = respuesta_json(data, headers=headers)
+    if etag is not None and admite_etag(versiones, response):
+        poner_etag(response, etag)
+    return response
@@ -2,6 +2,8 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The same application serves the sync DRF views and the async read views under
+/api/async/ (app/vistas_async.py), e.g. ``uvicorn core.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
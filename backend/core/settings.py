@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import copy
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.metricas.MetricasMiddleware',
+    'app.replicas.ReplicasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -80,13 +84,85 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Perfil de base de datos elegido con DB_PERFIL: 'sqlite' (por defecto) o 'postgresql'.
+DB_PERFIL = config('DB_PERFIL', default='sqlite')
+
+# Pragmas que app/basedatos.py aplica a cada conexión SQLite nueva (señal connection_created).
+# WAL deja leer mientras alguien escribe; busy_timeout espera el lock en vez de fallar con
+# "database is locked"; synchronous=NORMAL con WAL no pierde integridad ante un corte.
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='normal'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+    # Negativo: tamaño en KiB (20 MB por conexión)
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-20000, cast=int),
+    'temp_store': 'memory',
+}
+
+if DB_PERFIL == 'postgresql':
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='grupos'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Con el pool de psycopg las conexiones ya se reutilizan: Django exige CONN_MAX_AGE = 0
+            'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': config('DB_POOL_MIN', default=2, cast=int),
+                    'max_size': config('DB_POOL_MAX', default=10, cast=int),
+                    'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+                },
+            } if DB_POOL else {},
+        }
+    }
+elif DB_PERFIL == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # BEGIN IMMEDIATE: la transacción toma el lock de escritura al empezar y espera
+                # busy_timeout, en vez de fallar al pasar de lectura a escritura a mitad de camino
+                'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+                'timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int) / 1000,
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f"DB_PERFIL debe ser 'sqlite' o 'postgresql', no {DB_PERFIL!r}")
+
+# Réplica de lectura (app/replicas.py): con DB_REPLICA_NAME (sqlite, otro archivo) o
+# DB_REPLICA_HOST (postgresql) se agrega el alias 'replica' con los mismos parámetros
+# que 'default'. La replicación en sí queda fuera de Django.
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_PERFIL == 'sqlite' and DB_REPLICA_NAME:
+    DATABASES['replica'] = {**copy.deepcopy(DATABASES['default']), 'NAME': DB_REPLICA_NAME}
+elif DB_PERFIL == 'postgresql' and DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+    }
+
+REPLICAS = {
+    # Alias al que van las lecturas de GET/HEAD/OPTIONS; vacío: todo en 'default'
+    'ALIAS': 'replica' if 'replica' in DATABASES else '',
+    # Después de escribir, la Persona lee de la primaria durante estos segundos
+    'STICKY_SEGUNDOS': config('DB_REPLICA_STICKY_SEGUNDOS', default=5, cast=int),
+    # Caché de las marcas de escritura: tiene que ser compartida entre workers (ver CACHES)
+    'CACHE_ALIAS': config('DB_REPLICA_CACHE_ALIAS', default='default'),
 }
 
+DATABASE_ROUTERS = ['app.replicas.RouterReplicas']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,6 +213,11 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    # Cursor sobre la PK; el cuerpo sigue siendo una lista y la página siguiente llega en
+    # X-Next-Cursor. Solo se pagina con ?page_size= o en los viewsets con `paginar = True`
+    # (de a PAGE_SIZE filas); el resto de los listados vienen completos
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=500, cast=int),
 }
 
 SIMPLE_JWT = {
@@ -162,10 +243,22 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Resolución de la Persona autenticada (app.authentication.PersonaJWTAuthentication)
+PERSONA_AUTH = {
+    'CACHE_TTL': config('PERSONA_AUTH_CACHE_TTL', default=60, cast=int),
+    'CACHE_MAX_ENTRIES': config('PERSONA_AUTH_CACHE_MAX_ENTRIES', default=1024, cast=int),
+    # Alias de CACHES para compartir la caché entre workers (vacío = solo memoria del proceso)
+    'CACHE_ALIAS': config('PERSONA_AUTH_CACHE_ALIAS', default='') or None,
+    # Armar el usuario con los claims del token sin consultar la base
+    'USE_TOKEN_CLAIMS': config('PERSONA_AUTH_USE_TOKEN_CLAIMS', default=False, cast=bool),
+}
+
 #CORS
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Headers de paginación por cursor (app.pagination.KeysetPagination) y ETag
+CORS_EXPOSE_HEADERS = ['Link', 'X-Next-Cursor', 'X-Previous-Cursor', 'ETag']
 
 # Media files (uploads)
 # MEDIA_URL and MEDIA_ROOT removed — file uploads disabled
@@ -178,3 +271,99 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='noreply@utn.edu.ar')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER', default='noreply@utn.edu.ar')
+
+# Bandeja de salida (app/outbox.py, comando despachar_correos)
+OUTBOX = {
+    'HILOS': config('OUTBOX_HILOS', default=4, cast=int),
+    'LOTE': config('OUTBOX_LOTE', default=100, cast=int),
+    'MAX_INTENTOS': config('OUTBOX_MAX_INTENTOS', default=5, cast=int),
+    'BACKOFF_BASE': config('OUTBOX_BACKOFF_BASE', default=30, cast=int),
+    'HUERFANO_MINUTOS': config('OUTBOX_HUERFANO_MINUTOS', default=15, cast=int),
+}
+
+# Datos de referencia (app/referencia.py): segundos que el navegador puede reutilizar
+# la respuesta sin revalidar; con 0 siempre revalida con If-None-Match
+REFERENCIA_CACHE_MAX_AGE = config('REFERENCIA_CACHE_MAX_AGE', default=0, cast=int)
+
+# Exportación de memorias (app/exportacion.py): filas por consulta y caché del archivo generado
+EXPORTACION = {
+    'LOTE': config('EXPORTACION_LOTE', default=2000, cast=int),
+    # Caché aparte de 'default': guarda archivos de hasta CACHE_MAX_BYTES (ver CACHES)
+    'CACHE_ALIAS': config('EXPORTACION_CACHE_ALIAS', default='exportacion'),
+    'CACHE_TTL': config('EXPORTACION_CACHE_TTL', default=3600, cast=int),
+    'CACHE_MAX_BYTES': config('EXPORTACION_CACHE_MAX_BYTES', default=5 * 1024 * 1024, cast=int),
+}
+
+# Cachés. 'default' es memoria del proceso (como sin CACHES). 'pdf' guarda en disco el
+# estado y los archivos de los PDF de memorias: la comparten los workers de la máquina y
+# sobrevive al comando renderizar_memorias. 'exportacion' guarda en disco, con un máximo
+# de entradas, los archivos de las exportaciones de memorias
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pdf': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('PDF_CACHE_DIR', default=str(BASE_DIR / 'pdf_cache')),
+        'OPTIONS': {'MAX_ENTRIES': config('PDF_CACHE_MAX_ENTRIES', default=2000, cast=int)},
+    },
+    'exportacion': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('EXPORTACION_CACHE_DIR', default=str(BASE_DIR / 'exportacion_cache')),
+        'OPTIONS': {'MAX_ENTRIES': config('EXPORTACION_CACHE_MAX_ENTRIES', default=200, cast=int)},
+    },
+}
+
+# Con réplica, una marca de escritura guardada en memoria del proceso no la ven los
+# otros workers: la Persona podría leer de la réplica justo después de escribir
+if REPLICAS['ALIAS'] and CACHES[REPLICAS['CACHE_ALIAS']]['BACKEND'].endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'La réplica necesita una caché compartida entre workers: configurar '
+        f"DB_REPLICA_CACHE_ALIAS (hoy {REPLICAS['CACHE_ALIAS']!r}, memoria del proceso)"
+    )
+
+# PDF de memorias (app/memoria_pdf.py): procesos del pool y caché de trabajos y archivos.
+# CACHE_ALIAS tiene que ser una caché compartida entre procesos (archivo, base de datos,
+# Redis); con varias máquinas, una que vean todas
+PDF = {
+    'PROCESOS': config('PDF_PROCESOS', default=2, cast=int),
+    'CACHE_ALIAS': config('PDF_CACHE_ALIAS', default='pdf'),
+    'CACHE_TTL': config('PDF_CACHE_TTL', default=24 * 60 * 60, cast=int),
+    'TIMEOUT_TRABAJO': config('PDF_TIMEOUT_TRABAJO', default=10 * 60, cast=int),
+}
+
+# ETag por versión de modelo en los ViewSets (app/versiones.py). Con varios workers
+# CACHE_ALIAS tiene que apuntar a una caché compartida
+VERSIONES = {
+    'HABILITADO': config('VERSIONES_HABILITADO', default=True, cast=bool),
+    'CACHE_ALIAS': config('VERSIONES_CACHE_ALIAS', default='default'),
+}
+
+# Hash de contraseñas (app/contrasenas.py): hilos dedicados y pedidos en cola antes de
+# responder 429; ESPERA_SEGUNDOS es el máximo que un request espera antes de un 503
+CONTRASENAS = {
+    'HILOS': config('CONTRASENAS_HILOS', default=2, cast=int),
+    'COLA_MAXIMA': config('CONTRASENAS_COLA_MAXIMA', default=32, cast=int),
+    'ESPERA_SEGUNDOS': config('CONTRASENAS_ESPERA_SEGUNDOS', default=5, cast=float),
+    'REINTENTAR_SEGUNDOS': config('CONTRASENAS_REINTENTAR_SEGUNDOS', default=2, cast=int),
+}
+
+# Vistas async (app/vistas_async.py): hilos para las consultas en paralelo de un request.
+# Cada hilo mantiene su conexión, así que es también el máximo de conexiones que usan.
+VISTAS_ASYNC = {
+    'HILOS_CONSULTAS': config('VISTAS_ASYNC_HILOS_CONSULTAS', default=16, cast=int),
+}
+
+# Instrumentación por request (app/metricas.py): Server-Timing, histogramas por ruta
+# en /api/internal/metricas/ y log de requests lentos con su SQL. Para leer el endpoint
+# hace falta `Authorization: Bearer <METRICAS_TOKEN>`; sin token queda cerrado. Con
+# METRICAS_CONFIAR_EN_RED también lo leen INTERNAL_IPS sin token: no activarlo detrás de
+# un proxy en el mismo host, donde todos los requests llegan desde 127.0.0.1
+METRICAS = {
+    'HABILITADO': config('METRICAS_HABILITADO', default=True, cast=bool),
+    'SLOW_REQUEST_MS': config('METRICAS_SLOW_REQUEST_MS', default=1000, cast=int),
+    'SLOW_LOG_MAX_SQL': config('METRICAS_SLOW_LOG_MAX_SQL', default=50, cast=int),
+    'TOKEN': config('METRICAS_TOKEN', default=''),
+    'CONFIAR_EN_RED': config('METRICAS_CONFIAR_EN_RED', default=False, cast=bool),
+}
+INTERNAL_IPS = ['127.0.0.1', '::1']
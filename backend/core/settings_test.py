@@ -0,0 +1,21 @@
+"""
+Settings de las pruebas (`python manage.py test` las toma por defecto, ver manage.py).
+
+Las pruebas de app/tests.py necesitan un alias 'replica' aunque no haya réplica: es
+una base de pruebas aparte (con datos distintos se ve de dónde leyó cada consulta).
+REPLICAS['ALIAS'] queda como estaba; lo activan con override_settings solo las
+pruebas que lo usan.
+"""
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHES, DATABASES, DB_PERFIL
+
+if 'replica' not in DATABASES:
+    DATABASES['replica'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'TEST': {'NAME': f'test_{DATABASES["default"]["NAME"]}_replica'} if DB_PERFIL == 'postgresql' else {},
+    }
+
+# Las exportaciones cacheadas de las pruebas quedan en memoria, no en exportacion_cache/
+CACHES = {**CACHES, 'exportacion': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'exportacion'}}
@@ -12,8 +12,10 @@ from app.views import (
     ParteExternaViewSet, EquipamientoInfraestructuraViewSet,
     TrabajoPresentadoViewSet, ActividadXPersonaViewSet,
     login, register, perfil, actualizar_perfil, eliminar_persona, listar_personas, cambiar_contrasena, refresh_token, get_opciones_perfil, RegistroViewSet, PatenteViewSet, AutorViewSet, TipoTrabajoPublicadoViewSet, TipoDeRegistroViewSet,
-    recuperar_password, restablecer_password, get_tipos_personal
+    recuperar_password, restablecer_password, get_tipos_personal, buscar
 )
+from app.metricas import exportar_metricas
+from app import vistas_async
 from app.memoria_views import (
     MemoriaAnualViewSet, IntegranteMemoriaViewSet, ActividadMemoriaViewSet,
     PublicacionMemoriaViewSet, PatenteMemoriaViewSet, ProyectoMemoriaViewSet
@@ -68,6 +70,19 @@ urlpatterns = [
     path('api/auth/recuperar-password/', recuperar_password, name='recuperar_password'),
     path('api/auth/restablecer-password/', restablecer_password, name='restablecer_password'),
     path('api/auth/tipos-personal/', get_tipos_personal, name='tipos_personal'),
+    path('api/buscar/', buscar, name='buscar'),
+    path('api/internal/metricas/', exportar_metricas, name='metricas'),
+    # Lecturas async (app/vistas_async.py): mismas respuestas que las rutas sync equivalentes
+    path('api/async/memorias-anuales/<int:pk>/completa/', vistas_async.memoria_completa, name='memoria-completa-async'),
+    path('api/async/grupos/<int:pk>/estadisticas/', vistas_async.estadisticas_grupo, name='grupo-estadisticas-async'),
+    path('api/async/opciones-perfil/', vistas_async.opciones_perfil, name='opciones-perfil-async'),
+    path('api/async/tipos-personal/', vistas_async.tipos_personal, name='tipos-personal-async'),
+]
+
+urlpatterns += [
+    path(f'api/async/{prefijo}/', vistas_async.listado, {'viewset': viewset}, name=f'{basename}-list-async')
+    for prefijo, viewset, basename in router.registry
+    if vistas_async.admite_listado_async(viewset)
 ]
 
 # media serving removed (file uploads disabled)
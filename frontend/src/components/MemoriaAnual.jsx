@@ -4,6 +4,7 @@ import { ChevronDown, Plus, Trash2, Edit, Search } from 'lucide-react';
 import { obtenerGrupos, obtenerPersonas, crearPersona, obtenerOpcionesPerfil, listarTrabajosPresentados, crearTrabajoPresentado, listarActividades, crearActividad, listarLineasInvestigacion, listarTrabajosPublicados, crearTrabajoPublicado, actualizarTrabajoPublicado, eliminarTrabajoPublicado, listarAutores, listarTiposTrabajoPublicado, listarPatentes, crearPatente, actualizarPatente, eliminarPatente, listarProyectos, crearProyecto, actualizarProyecto, eliminarProyecto } from '../services/api';
 import ConfirmModal from './ConfirmModal';
 import Alert from './Alert';
+import { obtenerTodasLasPaginas } from '../utils/paginacion';
 
 const API_BASE_URL = 'http://127.0.0.1:8000/api';
 
@@ -467,8 +468,7 @@ const MemoriaAnual = () => {
       setLoading(true);
       
       // Primero obtenemos la memoria más reciente
-      const memoriasRes = await fetch(`${API_BASE_URL}/memorias/`);
-      const memorias = await memoriasRes.json();
+      const memorias = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias/`);
       
       if (memorias.length > 0) {
         const currentMemoria = memorias[0]; // Tomar la primera memoria
@@ -557,39 +557,33 @@ const MemoriaAnual = () => {
 
   const loadIntegrantes = async (memoriaId) => {
     console.log('Cargando integrantes para memoria:', memoriaId);
-    const res = await fetch(`${API_BASE_URL}/memorias-integrantes/?memoria=${memoriaId}`);
-    const data = await res.json();
+    const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias-integrantes/?memoria=${memoriaId}`);
     console.log('Integrantes cargados:', data);
     setFormData(prev => ({ ...prev, integrantes: data }));
   };
 
   const loadTrabajos = async (memoriaId) => {
-    const res = await fetch(`${API_BASE_URL}/memorias-trabajos/?memoria=${memoriaId}`);
-    const data = await res.json();
+    const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias-trabajos/?memoria=${memoriaId}`);
     setFormData(prev => ({ ...prev, trabajos: data }));
   };
 
   const loadActividades = async (memoriaId) => {
-    const res = await fetch(`${API_BASE_URL}/memorias-actividades/?memoria=${memoriaId}`);
-    const data = await res.json();
+    const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias-actividades/?memoria=${memoriaId}`);
     setFormData(prev => ({ ...prev, actividades: data }));
   };
 
   const loadPublicaciones = async (memoriaId) => {
-    const res = await fetch(`${API_BASE_URL}/memorias-publicaciones/?memoria=${memoriaId}`);
-    const data = await res.json();
+    const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias-publicaciones/?memoria=${memoriaId}`);
     setFormData(prev => ({ ...prev, publicaciones: data }));
   };
 
   const loadPatentes = async (memoriaId) => {
-    const res = await fetch(`${API_BASE_URL}/memorias-patentes/?memoria=${memoriaId}`);
-    const data = await res.json();
+    const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias-patentes/?memoria=${memoriaId}`);
     setFormData(prev => ({ ...prev, patentes: data }));
   };
 
   const loadProyectos = async (memoriaId) => {
-    const res = await fetch(`${API_BASE_URL}/memorias-proyectos/?memoria=${memoriaId}`);
-    const data = await res.json();
+    const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/memorias-proyectos/?memoria=${memoriaId}`);
     setFormData(prev => ({ ...prev, proyectos: data }));
   };
 
@@ -3,6 +3,7 @@ import { Eye, Download, Trash2, Calendar, Users as UsersIcon, FileText } from 'l
 import './VerMemorias.css';
 import ConfirmModal from './ConfirmModal';
 import Alert from './Alert';
+import { obtenerTodasLasPaginas } from '../utils/paginacion';
 
 const API_BASE_URL = 'http://127.0.0.1:8000';
 
@@ -25,8 +26,7 @@ function VerMemorias() {
   const loadMemorias = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`${API_BASE_URL}/api/memorias-anuales/`);
-      const data = await response.json();
+      const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/api/memorias-anuales/`);
       // Ordenar por fecha de creación descendente (más reciente primero)
       const sortedData = data.sort((a, b) => {
         return new Date(b.fechaCreacion) - new Date(a.fechaCreacion);
@@ -42,8 +42,7 @@ function VerMemorias() {
 
   const loadGrupos = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/grupos/`);
-      const data = await response.json();
+      const data = await obtenerTodasLasPaginas(`${API_BASE_URL}/api/grupos/`);
       setGrupos(data);
     } catch (error) {
       console.error('Error cargando grupos:', error);
@@ -52,35 +51,13 @@ function VerMemorias() {
 
   const handleViewDetails = async (memoria) => {
     try {
-      // Cargar detalles completos de la memoria
-      const response = await fetch(`${API_BASE_URL}/api/memorias-anuales/${memoria.oidMemoriaAnual}/`);
+      // Cargar la memoria con todas sus relaciones en una sola petición
+      const response = await fetch(`${API_BASE_URL}/api/memorias-anuales/${memoria.oidMemoriaAnual}/completa/`);
       const data = await response.json();
       
       console.log('Cargando detalles para memoria:', memoria.oidMemoriaAnual);
-      
-      // Cargar relaciones
-      const [integrantes, actividades, publicaciones, patentes, proyectos] = await Promise.all([
-        fetch(`${API_BASE_URL}/api/integrantes-memoria/?MemoriaAnual=${memoria.oidMemoriaAnual}`).then(r => r.json()).catch(err => { console.error('Error integrantes:', err); return []; }),
-        fetch(`${API_BASE_URL}/api/actividades-memoria/?MemoriaAnual=${memoria.oidMemoriaAnual}`).then(r => r.json()).catch(err => { console.error('Error actividades:', err); return []; }),
-        fetch(`${API_BASE_URL}/api/publicaciones-memoria/?MemoriaAnual=${memoria.oidMemoriaAnual}`).then(r => r.json()).catch(err => { console.error('Error publicaciones:', err); return []; }),
-        fetch(`${API_BASE_URL}/api/patentes-memoria/?MemoriaAnual=${memoria.oidMemoriaAnual}`).then(r => r.json()).catch(err => { console.error('Error patentes:', err); return []; }),
-        fetch(`${API_BASE_URL}/api/proyectos-memoria/?MemoriaAnual=${memoria.oidMemoriaAnual}`).then(r => r.json()).catch(err => { console.error('Error proyectos:', err); return []; })
-      ]);
 
-      console.log('Integrantes:', integrantes);
-      console.log('Actividades:', actividades);
-      console.log('Publicaciones:', publicaciones);
-      console.log('Patentes:', patentes);
-      console.log('Proyectos:', proyectos);
-
-      setSelectedMemoria({
-        ...data,
-        integrantes,
-        actividades,
-        publicaciones,
-        patentes,
-        proyectos
-      });
+      setSelectedMemoria(data);
     } catch (error) {
       console.error('Error cargando detalles:', error);
       setAlert({ type: 'error', message: 'Error al cargar los detalles de la memoria' });
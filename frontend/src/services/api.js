@@ -1,4 +1,5 @@
 import { authenticatedFetch } from '../utils/auth';
+import { obtenerTodasLasPaginas } from '../utils/paginacion';
 
 // Configuración base de la API
 const API_BASE_URL = 'http://localhost:8000/api';
@@ -288,13 +289,7 @@ export async function crearPatente(data) {
 }
 
 export async function listarGrupos() {
-    const response = await authenticatedFetch('http://localhost:8000/api/grupos/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/grupos/', { fetcher: authenticatedFetch });
 }
 
 export async function crearRegistro(data) {
@@ -333,13 +328,7 @@ export async function listarPatentes(page = 1, pageSize = 10) {
 }
 
 export async function listarProyectos() {
-    const response = await authenticatedFetch('http://localhost:8000/api/proyectos/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/proyectos/', { fetcher: authenticatedFetch });
 }
 
 export async function crearProyecto(data) {
@@ -382,13 +371,7 @@ export async function eliminarProyecto(id) {
 }
 
 export async function listarTipoRegistros() {
-    const response = await authenticatedFetch('http://localhost:8000/api/tipo-registros/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/tipo-registros/', { fetcher: authenticatedFetch });
 }
 
 export async function crearTrabajoPresentado(data) {
@@ -416,23 +399,11 @@ export async function listarTrabajosPresentados(page = 1, pageSize = 10) {
 }
 
 export async function listarActividades() {
-    const response = await authenticatedFetch('http://localhost:8000/api/actividades/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/actividades/', { fetcher: authenticatedFetch });
 }
 
 export async function listarLineasInvestigacion() {
-    const response = await authenticatedFetch('http://localhost:8000/api/lineas-investigacion/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/lineas-investigacion/', { fetcher: authenticatedFetch });
 }
 
 export async function crearActividad(data) {
@@ -450,13 +421,7 @@ export async function crearActividad(data) {
 }
 
 export async function listarAutores() {
-    const response = await authenticatedFetch('http://localhost:8000/api/autores/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/autores/', { fetcher: authenticatedFetch });
 }
 
 export async function crearAutor(data) {
@@ -474,13 +439,7 @@ export async function crearAutor(data) {
 }
 
 export async function listarTiposTrabajoPublicado() {
-    const response = await authenticatedFetch('http://localhost:8000/api/tipo-trabajos-publicados/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/tipo-trabajos-publicados/', { fetcher: authenticatedFetch });
 }
 
 // Trabajos Presentados
@@ -585,23 +544,11 @@ export async function crearGrupo(grupoData) {
 }
 
 export async function obtenerGrupos() {
-    const response = await authenticatedFetch('http://localhost:8000/api/grupos/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/grupos/', { fetcher: authenticatedFetch });
 }
 
 export async function obtenerPersonas() {
-    const response = await authenticatedFetch('http://localhost:8000/api/auth/personas/');
-    const json = await response.json().catch(() => null);
-    if (!response.ok) {
-        const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
-        throw new Error(err);
-    }
-    return json.personas || json;
+    return obtenerTodasLasPaginas('http://localhost:8000/api/auth/personas/', { fetcher: authenticatedFetch, clave: 'personas' });
 }
 
 export async function crearPersona(personaData) {
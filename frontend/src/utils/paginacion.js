@@ -0,0 +1,23 @@
+// Los listados del backend vienen paginados por cursor (app/pagination.py en el backend):
+// el cuerpo es la página y la URL de la siguiente llega en el header X-Next-Cursor.
+// Estas funciones recorren todas las páginas y devuelven la lista completa.
+
+// Lee `url` y las páginas que siguen. `clave` es la propiedad del cuerpo que trae la lista
+// cuando no viene sola (p. ej. 'personas' en /auth/personas/). Lanza un Error si alguna
+// página responde con error, con el mismo mensaje que el resto de las funciones de api.js.
+export const obtenerTodasLasPaginas = async (url, { fetcher = fetch, clave = null, options = {} } = {}) => {
+    const filas = [];
+    let siguiente = url;
+    while (siguiente) {
+        const response = await fetcher(siguiente, options);
+        const json = await response.json().catch(() => null);
+        if (!response.ok) {
+            const err = json ? JSON.stringify(json) : `HTTP ${response.status}`;
+            throw new Error(err);
+        }
+        const pagina = clave ? json[clave] : json;
+        filas.push(...pagina);
+        siguiente = response.headers.get('X-Next-Cursor');
+    }
+    return filas;
+};